@@ -0,0 +1,93 @@
+# mp4museum - serving the control API
+# The Werkzeug dev server used to start one OS thread per request. The default here is a
+# fixed pool of worker threads, so a burst of tablets cannot flood the Pi with threads
+# that fight the playback thread for the GIL.
+#
+# Selectable with environment variables:
+#   MP4MUSEUM_SERVER            pool (default) | waitress | dev
+#   MP4MUSEUM_THREADS           worker threads (default 8)
+#   MP4MUSEUM_CONNECTION_LIMIT  connections accepted before new ones wait in the backlog (default 64)
+#   MP4MUSEUM_EVENT_CLIENTS     simultaneous /events streams (default: threads - 2)
+
+import os
+import logging
+from threading import BoundedSemaphore
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger("mp4museum.api")
+
+SERVER_MODE = os.environ.get("MP4MUSEUM_SERVER", "pool")
+SERVER_THREADS = int(os.environ.get("MP4MUSEUM_THREADS", "8"))
+CONNECTION_LIMIT = int(os.environ.get("MP4MUSEUM_CONNECTION_LIMIT", "64"))
+# Every open /events stream holds a worker for as long as the tablet is connected,
+# so keep at least two workers free for ordinary requests
+EVENT_CLIENT_LIMIT = int(os.environ.get("MP4MUSEUM_EVENT_CLIENTS", str(max(1, SERVER_THREADS - 2))))
+
+
+def make_pooled_server(host, port, app, threads, connection_limit):
+    """Werkzeug server that hands connections to a fixed ThreadPoolExecutor"""
+    from werkzeug.serving import BaseWSGIServer
+
+    # Stays single-threaded in Werkzeug's eyes, so responses use HTTP/1.0 without keep-alive:
+    # an idle keep-alive connection would otherwise pin a pool worker
+    class PooledWSGIServer(BaseWSGIServer):
+        request_queue_size = connection_limit  # listen() backlog
+
+        def __init__(self):
+            super().__init__(host, port, app)
+            self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="APIWorker")
+            # Accepted-but-unserved connections; beyond this accept() pauses and the kernel queues
+            self.slots = BoundedSemaphore(connection_limit)
+
+        def process_request(self, request, client_address):
+            self.slots.acquire()
+            self.pool.submit(self._handle, request, client_address)
+
+        def _handle(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+                self.slots.release()
+
+        def server_close(self):
+            super().server_close()
+            self.pool.shutdown(wait=False)
+
+    return PooledWSGIServer()
+
+
+def serve(app, host="0.0.0.0", port=5000, mode=None, threads=None, connection_limit=None):
+    """Run the API in the calling thread until the process exits"""
+    mode = mode or SERVER_MODE
+    threads = threads or SERVER_THREADS
+    connection_limit = connection_limit or CONNECTION_LIMIT
+    # One access-log line per request is write amplification on an SD card
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    if mode == "waitress":
+        try:
+            from waitress import serve as waitress_serve
+        except ImportError:
+            log.warning("⚠️ waitress not installed (pip3 install waitress) - using the pooled server")
+            mode = "pool"
+        else:
+            log.info(f"🌐 API on {host}:{port} - waitress, {threads} threads, {connection_limit} connections")
+            waitress_serve(app, host=host, port=port, threads=threads,
+                           connection_limit=connection_limit, ident="mp4museum")
+            return
+
+    if mode == "pool":
+        server = make_pooled_server(host, port, app, threads, connection_limit)
+        log.info(f"🌐 API on {host}:{port} - pooled server, {threads} threads, {connection_limit} connections")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+        return
+
+    # "dev": the old Werkzeug development server, one thread per request
+    log.info(f"🌐 API on {host}:{port} - Flask development server")
+    app.run(host=host, port=port, threaded=True, use_reloader=False, debug=False)
@@ -0,0 +1,206 @@
+# mp4museum - end-to-end benchmark of mp4museum.py without a screen or VLC
+# Builds a synthetic media tree (thousands of empty .mp4 files), starts the real backend
+# in-process on the simulated player (player_backend.SimulatedBackend) and measures:
+#
+#   - library index build and reload time
+#   - inter-clip gap (end of one clip -> first frame of the next)
+#   - collection switch latency (POST /set_collection -> first frame of the new collection)
+#   - API latency of /status and /collections under concurrent clients
+#   - CPU use while idle-playing and while serving the API
+#
+#   python3 bench/bench_e2e.py                                  # 20 collections x 200 files
+#   python3 bench/bench_e2e.py --collections 50 --files 400 --clip-seconds 0.1 --startup-ms 80
+#
+# CPU is process time over wall time of the whole process (1.0 = one core busy); the API
+# phase includes the benchmark's own client threads.
+
+import os
+import sys
+import json
+import time
+import socket
+import random
+import shutil
+import argparse
+import tempfile
+import urllib.request
+from threading import Thread, Event, Lock
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+
+def percentile(samples, pct):
+    if not samples:
+        return float("nan")
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))]
+
+
+def build_tree(root, collections, files):
+    """media/internal/<collection>/ and media/videos/<collection>/ with `files` clips each"""
+    started = time.perf_counter()
+    names = [f"collection{c:03d}" for c in range(collections)]
+    for top in ("internal", "videos"):
+        for name in names:
+            directory = os.path.join(root, top, name)
+            os.makedirs(directory)
+            for i in range(files):
+                with open(os.path.join(directory, f"clip{i:05d}.mp4"), "wb") as f:
+                    f.write(b"\0" * 64)
+    print(f"🌳 {2 * collections * files} files in {2 * collections} directories "
+          f"({time.perf_counter() - started:.1f}s to create)")
+    return names
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def request(url, method="GET", body=None):
+    data = json.dumps(body).encode() if body is not None else (b"{}" if method == "POST" else None)
+    req = urllib.request.Request(url, data=data, method=method,
+                                 headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=10) as response:
+        return response.read()
+
+
+def cpu_during(seconds, action=None):
+    """(process CPU / wall) over `seconds`, optionally while action(stop_event) runs"""
+    stop = Event()
+    thread = Thread(target=action, args=(stop,), daemon=True) if action else None
+    cpu, wall = time.process_time(), time.perf_counter()
+    if thread:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    if thread:
+        thread.join()
+    return (time.process_time() - cpu) / (time.perf_counter() - wall)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="mp4museum end-to-end benchmark (simulated player)")
+    parser.add_argument("--collections", type=int, default=20)
+    parser.add_argument("--files", type=int, default=200, help="clips per collection")
+    parser.add_argument("--clip-seconds", type=float, default=0.2)
+    parser.add_argument("--startup-ms", type=float, default=40)
+    parser.add_argument("--seconds", type=float, default=10, help="length of each measuring phase")
+    parser.add_argument("--switches", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--keep", action="store_true", help="keep the synthetic tree")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="mp4museum-bench-")
+    media_root = os.path.join(workdir, "media")
+    names = build_tree(media_root, args.collections, args.files)
+
+    # Read at import time by state_store, museum_log and mp4museum
+    os.environ["MP4MUSEUM_STATE_DIR"] = os.path.join(workdir, "state")
+    os.environ["MP4MUSEUM_MEDIA_ROOT"] = media_root
+    os.environ.setdefault("MP4MUSEUM_LOG_FILE", "")
+    os.environ.setdefault("MP4MUSEUM_CONSOLE_LEVEL", "ERROR")
+
+    try:
+        import mp4museum
+        import metrics
+        from museum_log import setup_logging
+        from library_index import LibraryIndex
+        from player_backend import SimulatedBackend
+
+        setup_logging("bench")
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+
+        started = time.perf_counter()
+        mp4museum.start(SimulatedBackend(args.clip_seconds, args.startup_ms), port=port)
+        cold_start = time.perf_counter() - started
+        mp4museum.library.save()
+        started = time.perf_counter()
+        LibraryIndex([mp4museum.INTERNAL_ROOT, mp4museum.VIDEOS_ROOT]).load()
+        warm_load = time.perf_counter() - started
+        print(f"📚 start() with a cold index: {cold_start * 1000:.0f} ms, reload of the saved index: {warm_load * 1000:.0f} ms")
+
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                request(base_url + "/status")
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+
+        # Phase 1: undisturbed playback
+        played = metrics.CLIPS_PLAYED.get()
+        mp4museum.gap_samples.clear()
+        cpu = cpu_during(args.seconds)
+        gaps = list(mp4museum.gap_samples)
+        print(f"🎬 playback: {metrics.CLIPS_PLAYED.get() - played} clips, gap p50={percentile(gaps, 50) * 1000:.2f} ms "
+              f"p99={percentile(gaps, 99) * 1000:.2f} ms max={max(gaps, default=float('nan')) * 1000:.2f} ms, "
+              f"CPU {cpu * 100:.1f}%")
+
+        # Phase 2: collection switches, measured by the backend's own histogram
+        rng = random.Random(1)
+        switches = []
+        for _ in range(args.switches):
+            count, total = metrics.COLLECTION_SWITCH.count, metrics.COLLECTION_SWITCH.sum
+            request(base_url + "/set_collection", "POST", {"collection": rng.choice(names)})
+            deadline = time.monotonic() + 10
+            while metrics.COLLECTION_SWITCH.count == count and time.monotonic() < deadline:
+                time.sleep(0.001)
+            if metrics.COLLECTION_SWITCH.count > count:
+                switches.append(metrics.COLLECTION_SWITCH.sum - total)
+            time.sleep(args.clip_seconds / 2)
+        print(f"🔀 collection switch: {len(switches)}/{args.switches} completed, "
+              f"p50={percentile(switches, 50) * 1000:.1f} ms p99={percentile(switches, 99) * 1000:.1f} ms")
+
+        # Phase 3: API clients while playing
+        lock = Lock()
+        latencies = {"/status": [], "/collections": []}
+        errors = [0]
+
+        def client(stop):
+            endpoints = list(latencies)
+            i = 0
+            while not stop.is_set():
+                endpoint = endpoints[i % len(endpoints)]
+                i += 1
+                begun = time.perf_counter()
+                try:
+                    request(base_url + endpoint)
+                except OSError:
+                    with lock:
+                        errors[0] += 1
+                    continue
+                with lock:
+                    latencies[endpoint].append(time.perf_counter() - begun)
+
+        def clients(stop):
+            threads = [Thread(target=client, args=(stop,), daemon=True) for _ in range(args.clients)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        mp4museum.gap_samples.clear()
+        cpu = cpu_during(args.seconds, clients)
+        for endpoint, samples in latencies.items():
+            print(f"🌐 {endpoint:12s} requests={len(samples):6d} rps={len(samples) / args.seconds:7.1f} "
+                  f"p50={percentile(samples, 50) * 1000:6.2f} ms p99={percentile(samples, 99) * 1000:6.2f} ms")
+        gaps = list(mp4museum.gap_samples)
+        print(f"🌐 {args.clients} clients: errors={errors[0]}, CPU {cpu * 100:.1f}%, "
+              f"gap under load p99={percentile(gaps, 99) * 1000:.2f} ms")
+
+        mp4museum.cleanup()
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+        else:
+            print(f"📁 Kept {workdir}")
+
+
+if __name__ == "__main__":
+    main()
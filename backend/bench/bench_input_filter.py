@@ -0,0 +1,178 @@
+# mp4museum - button filter benchmark
+# Replays a noisy edge trace through the fake_rpi GPIO stub into input_filter.MajorityFilter
+# and through a model of the old 200 x 1 ms sampling callback, then compares detected
+# presses, false triggers, callback time and press-to-action latency.
+#
+#   python3 bench/bench_input_filter.py                    # synthetic trace (seeded)
+#   python3 bench/bench_input_filter.py --trace edges.json # recorded [[seconds, level], ...]
+#
+# A recorded trace is a JSON list of [timestamp in seconds, level] pairs, one per edge, e.g.
+# from a logic analyser export. Ground truth (real presses) is only known for synthetic traces.
+
+import os
+import sys
+import json
+import time
+import bisect
+import random
+import argparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "fake_rpi"))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+import RPi.GPIO as GPIO  # The stub - inject_edge() drives the registered callbacks
+from input_filter import MajorityFilter
+
+PIN = 11
+LEGACY_SAMPLES = 200
+LEGACY_THRESHOLD = 50
+LEGACY_BOUNCETIME = 0.234
+
+
+def synthetic_trace(seconds, presses, spikes, bursts, seed):
+    """Real presses with contact bounce, single static spikes and EMI bursts (low duty cycle)"""
+    rng = random.Random(seed)
+    pulses = []  # (start, end) high intervals
+    truth = []
+    for _ in range(presses):
+        start = rng.uniform(0, seconds - 1)
+        truth.append(start)
+        t = start
+        for _ in range(rng.randint(0, 6)):  # Contact bounce
+            width = rng.uniform(0.0002, 0.002)
+            pulses.append((t, t + width))
+            t += width + rng.uniform(0.0002, 0.002)
+        pulses.append((t, t + rng.uniform(0.08, 0.4)))  # Held
+    for _ in range(spikes):
+        start = rng.uniform(0, seconds)
+        pulses.append((start, start + rng.uniform(0.00001, 0.005)))
+    for _ in range(bursts):
+        t = rng.uniform(0, seconds - 0.1)
+        end = t + rng.uniform(0.02, 0.08)
+        while t < end:
+            width = rng.uniform(0.0001, 0.001)
+            pulses.append((t, t + width))
+            t += width + rng.uniform(0.001, 0.006)
+    # Merge overlapping pulses into one level timeline
+    pulses.sort()
+    merged = []
+    for start, end in pulses:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    edges = []
+    for start, end in merged:
+        edges.append((start, 1))
+        edges.append((end, 0))
+    return edges, sorted(truth)
+
+
+def level_at(edges, times, t):
+    i = bisect.bisect_right(times, t) - 1
+    return edges[i][1] if i >= 0 else 0
+
+
+def run_legacy(edges):
+    """Old callback: on a rising edge (after bouncetime) sample 200 x 1 ms, busy meanwhile"""
+    times = [e[0] for e in edges]
+    detections = []
+    busy_until = -1.0
+    last_callback = -1e9
+    lost = 0
+    for t, level in edges:
+        if not level:
+            continue
+        if t < busy_until:
+            lost += 1  # Callback thread still sleeping in the sampling loop
+            continue
+        if t - last_callback < LEGACY_BOUNCETIME:
+            continue
+        last_callback = t
+        high = sum(level_at(edges, times, t + k * 0.001) for k in range(LEGACY_SAMPLES))
+        busy_until = t + LEGACY_SAMPLES * 0.00105  # sleep(.001) overshoots a little
+        if high > LEGACY_THRESHOLD:
+            detections.append((t, busy_until))
+    return detections, lost
+
+
+def run_filter(edges):
+    """MajorityFilter fed through the stub's inject_edge(), with a virtual clock"""
+    clock = [0.0]
+    detections = []
+    flt = MajorityFilter(lambda pin, pressed_at: detections.append((pressed_at, clock[0])),
+                         holdoff_ms=LEGACY_BOUNCETIME * 1000, clock=lambda: clock[0], timer=False)
+    GPIO.cleanup()
+    flt.watch(GPIO, PIN)
+    callback_time = 0.0
+    for t, level in edges:
+        # Fire every check that falls before this edge at its due time, like the timer thread
+        while flt.checks and flt.checks[0][0] <= t:
+            clock[0] = flt.checks[0][0]
+            flt.evaluate(clock[0])
+        clock[0] = t
+        started = time.perf_counter()
+        GPIO.inject_edge(PIN, GPIO.RISING if level else GPIO.FALLING, timestamp=t)
+        callback_time += time.perf_counter() - started
+    # Drain the remaining checks at their due times
+    while flt.checks:
+        clock[0] = flt.checks[0][0]
+        flt.evaluate(clock[0])
+    return detections, callback_time / max(1, len(edges))
+
+
+def score(detections, truth, tolerance=0.05):
+    """(true presses found, false triggers) - a detection counts for a press that began
+    between its window start (minus tolerance) and the moment it was acted on"""
+    found = set()
+    false = 0
+    for pressed_at, acted_at in detections:
+        i = bisect.bisect_left(truth, pressed_at - tolerance)
+        while i < len(truth) and truth[i] <= acted_at and i in found:
+            i += 1
+        if i < len(truth) and truth[i] <= acted_at:
+            found.add(i)
+        else:
+            false += 1
+    return len(found), false
+
+
+def report(name, detections, truth, callback_us, lost=None):
+    latencies = sorted(acted - pressed for pressed, acted in detections)
+    median = latencies[len(latencies) // 2] * 1000 if latencies else float("nan")
+    line = f"{name:8s} detected={len(detections):4d} callback={callback_us:10.1f}us median_latency={median:6.1f}ms"
+    if truth is not None:
+        found, false = score(detections, truth)
+        line += f" presses={found}/{len(truth)} false={false}"
+    if lost is not None:
+        line += f" edges_lost_while_blocked={lost}"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="mp4museum button filter benchmark")
+    parser.add_argument("--trace", help="JSON list of [seconds, level] edges")
+    parser.add_argument("--seconds", type=float, default=600)
+    parser.add_argument("--presses", type=int, default=200)
+    parser.add_argument("--spikes", type=int, default=2000)
+    parser.add_argument("--bursts", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.trace:
+        with open(args.trace) as f:
+            edges = sorted((float(t), 1 if level else 0) for t, level in json.load(f))
+        truth = None
+    else:
+        edges, truth = synthetic_trace(args.seconds, args.presses, args.spikes, args.bursts, args.seed)
+    print(f"🔬 {len(edges)} edges" + (f", {len(truth)} real presses" if truth is not None else ""))
+
+    legacy, lost = run_legacy(edges)
+    report("legacy", legacy, truth, LEGACY_SAMPLES * 1050.0, lost)
+    filtered, per_edge = run_filter(edges)
+    report("filter", filtered, truth, per_edge * 1e6)
+
+
+if __name__ == "__main__":
+    main()
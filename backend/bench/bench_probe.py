@@ -0,0 +1,172 @@
+# mp4museum - throughput of the container header probe (media_probe.py)
+# Writes a synthetic library of small but valid headers: MP4 with moov first, MP4 with moov
+# after a large sparse mdat (as cameras write them), QuickTime MOV, and Matroska. Then:
+#
+#   - probes every file cold (no cache) and checks duration, size and codec
+#   - repeats through MediaProbe with a warm (path, size, mtime) cache
+#   - builds the library index with and without the probe hook
+#
+#   python3 bench/bench_probe.py                       # 10 000 files
+#   python3 bench/bench_probe.py --files 2000 --mdat-mb 2000
+#
+# The page cache is warm after the files are written, so "cold" means no probe cache, not
+# a cold disk. On a Pi with a USB stick, drop the caches first (echo 3 > /proc/sys/vm/drop_caches).
+
+import os
+import sys
+import time
+import shutil
+import struct
+import argparse
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+from bench_e2e import percentile
+
+
+# ---- synthetic headers -----------------------------------------------------
+
+def box(kind, payload):
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def mp4_file(duration, width, height, codec=b"avc1", profile=100, level=41, brand=b"isom",
+             moov_last=False, mdat_bytes=0):
+    """(bytes up to and including the mdat box header, bytes after the mdat payload)"""
+    mvhd = box(b"mvhd", struct.pack(">IIIII", 0, 0, 0, 1000, int(duration * 1000)) + b"\0" * 80)
+    hdlr = box(b"hdlr", struct.pack(">II4s", 0, 0, b"vide") + b"\0" * 12 + b"VideoHandler\0")
+    config = box(b"avcC", bytes([1, profile, 0, level, 0xFF, 0xE0]))
+    entry = (b"\0" * 6 + struct.pack(">H", 1) + b"\0" * 16 + struct.pack(">HH", width, height) +
+             b"\0" * 50 + config)
+    stsd = box(b"stsd", struct.pack(">II", 0, 1) + box(codec, entry))
+    trak = box(b"trak", box(b"tkhd", b"\0" * 84) +
+               box(b"mdia", box(b"mdhd", b"\0" * 24) + hdlr +
+                   box(b"minf", box(b"stbl", stsd))))
+    moov = box(b"moov", mvhd + trak)
+    ftyp = box(b"ftyp", brand + b"\0\0\0\0" + brand)
+    mdat_header = struct.pack(">I4s", 8 + mdat_bytes, b"mdat")
+    if moov_last:
+        return ftyp + mdat_header, moov
+    return ftyp + moov + mdat_header, b""
+
+
+def ebml(element_id, payload):
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+    return id_bytes + (0x01 << 56 | len(payload)).to_bytes(8, "big") + payload  # 8-byte size
+
+
+def mkv_file(duration, width, height):
+    header = ebml(0x1A45DFA3, ebml(0x4282, b"matroska"))
+    info = ebml(0x1549A966, ebml(0x2AD7B1, (1000000).to_bytes(3, "big")) +
+                ebml(0x4489, struct.pack(">d", duration * 1000)))
+    video = ebml(0xE0, ebml(0xB0, width.to_bytes(2, "big")) + ebml(0xBA, height.to_bytes(2, "big")))
+    track = ebml(0xAE, ebml(0x83, b"\x01") + ebml(0x86, b"V_MPEG4/ISO/AVC") + video +
+                 ebml(0x63A2, bytes([1, 77, 0, 40, 0xFF, 0xE1])))
+    cluster = ebml(0x1F43B675, b"\0" * 64)
+    return header + ebml(0x18538067, info + ebml(0x1654AE6B, track) + cluster)
+
+
+def build_library(root, files, mdat_mb):
+    """media/internal/collectionNNN/ with 100 files each; returns {path: (duration, width, codec)}"""
+    expected = {}
+    for i in range(files):
+        directory = os.path.join(root, "internal", f"collection{i // 100:03d}")
+        os.makedirs(directory, exist_ok=True)
+        duration = 5 + i % 600 + 0.5
+        width, height = ((1920, 1080), (1280, 720), (3840, 2160))[i % 3]
+        kind = i % 4
+        if kind == 3:
+            path = os.path.join(directory, f"clip{i:05d}.mkv")
+            with open(path, "wb") as f:
+                f.write(mkv_file(duration, width, height))
+        else:
+            path = os.path.join(directory, f"clip{i:05d}.{'mov' if kind == 2 else 'mp4'}")
+            mdat_bytes = mdat_mb * 1024 * 1024 if kind == 1 else 1024
+            head, tail = mp4_file(duration, width, height, brand=b"qt  " if kind == 2 else b"isom",
+                                  moov_last=kind == 1, mdat_bytes=mdat_bytes)
+            with open(path, "wb") as f:
+                f.write(head)
+                f.seek(len(head) + mdat_bytes if kind == 1 else len(head))
+                if kind != 1:
+                    f.write(b"\0" * mdat_bytes)  # Real (tiny) media data after a faststart moov
+                f.write(tail)  # Sparse gap: a big file on disk that costs nothing to make
+        expected[path] = (duration, width, "h264")
+    return expected
+
+
+# ---- benchmark -------------------------------------------------------------
+
+def timed(label, count, action):
+    samples = []
+    started = time.perf_counter()
+    for item in action():
+        samples.append(item)
+    elapsed = time.perf_counter() - started
+    print(f"⏱️ {label}: {count / elapsed:,.0f} files/s ({elapsed * 1000:.0f} ms, "
+          f"p50 {percentile(samples, 50) * 1e6:.0f} µs, p99 {percentile(samples, 99) * 1e6:.0f} µs per file)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="mp4museum media probe benchmark")
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--mdat-mb", type=int, default=500, help="size of the sparse mdat before a trailing moov")
+    parser.add_argument("--keep", action="store_true", help="keep the synthetic library")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="mp4museum-probe-")
+    os.environ["MP4MUSEUM_STATE_DIR"] = os.path.join(root, "state")
+    import media_probe
+    from library_index import LibraryIndex
+
+    try:
+        started = time.perf_counter()
+        expected = build_library(os.path.join(root, "media"), args.files, args.mdat_mb)
+        print(f"🌳 {len(expected)} files (mp4, mp4 with moov after {args.mdat_mb} MB, mov, mkv) "
+              f"in {time.perf_counter() - started:.1f}s")
+        paths = list(expected)
+
+        wrong = []
+
+        def cold():
+            for path in paths:
+                t = time.perf_counter()
+                info = media_probe.probe(path)
+                yield time.perf_counter() - t
+                duration, width, codec = expected[path]
+                if info.duration != duration or info.width != width or info.codec != codec:
+                    wrong.append((path, info.to_dict()))
+        timed("probe, no cache", len(paths), cold)
+        print(f"{'❌' if wrong else '✅'} {len(paths) - len(wrong)}/{len(paths)} headers read correctly")
+        for path, info in wrong[:5]:
+            print(f"   {os.path.basename(path)}: {info}")
+
+        probe = media_probe.default_probe()
+
+        def fill():
+            for path in paths:
+                t = time.perf_counter()
+                probe.info(path)
+                yield time.perf_counter() - t
+        timed("MediaProbe, empty cache", len(paths), fill)
+        probe.save()
+        probe = media_probe.default_probe()  # Reload the cache from disk like a restart
+        timed("MediaProbe, cache hit", len(paths), fill)
+
+        roots = [os.path.join(root, "media", "internal")]
+        for label, hook in (("without probe", None), ("with probe", media_probe.MediaProbe().duration)):
+            index_path = os.path.join(root, "state", f"library-{hook is not None}.json")
+            started = time.perf_counter()
+            LibraryIndex(roots, path=index_path, probe=hook).load()
+            print(f"📚 Library index build {label}: {(time.perf_counter() - started) * 1000:.0f} ms")
+    finally:
+        if args.keep:
+            print(f"📁 Kept {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# mp4museum - startup time benchmark
+# Launches mp4museum.py as a fresh process several times and reports, from process start:
+#
+#   - API ready: first successful GET /status
+#   - first frame: the backend's own startup_s.first_frame (reported on /status)
+#
+# The first run builds the library index from scratch, later runs load the saved one.
+#
+#   python3 bench/bench_startup.py                        # simulated player, synthetic tree
+#   python3 bench/bench_startup.py --player vlc --media-root /media --runs 3   # on the Pi
+
+import os
+import sys
+import json
+import time
+import shutil
+import signal
+import argparse
+import tempfile
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPT = os.path.join(HERE, "..", "mp4museum.py")
+
+from bench_e2e import build_tree, free_port, request, percentile
+
+
+def one_run(env, port, timeout):
+    """(api_ready_s, first_frame_s) measured from Popen, first frame as reported by the backend"""
+    started = time.time()
+    process = subprocess.Popen([sys.executable, SCRIPT], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    api_ready = first_frame = None
+    try:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and process.poll() is None:
+            try:
+                status = json.loads(request(f"http://127.0.0.1:{port}/status"))
+            except OSError:
+                time.sleep(0.005)
+                continue
+            if api_ready is None:
+                api_ready = time.time() - started
+            reported = status.get("startup_s", {}).get("first_frame")
+            if reported is not None:
+                # The backend measures from its own process start, which is a hair after Popen
+                first_frame = reported
+                break
+            time.sleep(0.005)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    return api_ready, first_frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description="mp4museum startup time benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--player", default="simulated", help="simulated or vlc")
+    parser.add_argument("--media-root", help="existing media tree (default: a synthetic one)")
+    parser.add_argument("--collections", type=int, default=20)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--startup-ms", type=float, default=40, help="simulated clip start-up delay")
+    parser.add_argument("--boot-video", default="", help="boot video to play first (default: none)")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="mp4museum-startup-")
+    try:
+        media_root = args.media_root
+        if not media_root:
+            media_root = os.path.join(workdir, "media")
+            build_tree(media_root, args.collections, args.files)
+        port = free_port()
+        env = dict(os.environ,
+                   MP4MUSEUM_PLAYER=args.player,
+                   MP4MUSEUM_SIM_STARTUP_MS=str(args.startup_ms),
+                   MP4MUSEUM_MEDIA_ROOT=media_root,
+                   MP4MUSEUM_STATE_DIR=os.path.join(workdir, "state"),
+                   MP4MUSEUM_BOOT_VIDEO=args.boot_video,
+                   MP4MUSEUM_PORT=str(port),
+                   MP4MUSEUM_LOG_FILE="")
+
+        results = []
+        for run in range(args.runs):
+            api_ready, first_frame = one_run(env, port, args.timeout)
+            results.append((api_ready, first_frame))
+            index = "cold index" if run == 0 else "saved index"
+            print(f"🚀 run {run + 1}: API ready {api_ready * 1000 if api_ready else float('nan'):7.1f} ms, "
+                  f"first frame {first_frame * 1000 if first_frame else float('nan'):7.1f} ms ({index})")
+
+        warm = results[1:] or results
+        api = [r[0] for r in warm if r[0] is not None]
+        frame = [r[1] for r in warm if r[1] is not None]
+        print(f"📊 saved index: API ready p50={percentile(api, 50) * 1000:.1f} ms, "
+              f"first frame p50={percentile(frame, 50) * 1000:.1f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# mp4museum - control API load test
+# Hammers /status (GET) and /next (POST) from many concurrent clients and prints
+# p50/p99 latencies, then reads /status once more to show playback kept going.
+#
+#   python3 bench/load_test.py --url http://mp4museum.local:5000 --clients 50 --seconds 20
+#
+# Compare serving modes by restarting the backend with MP4MUSEUM_SERVER=dev|pool|waitress.
+
+import sys
+import json
+import time
+import argparse
+import urllib.request
+from threading import Thread, Event, Lock
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+    return samples[index]
+
+
+def request(url, method):
+    data = b"{}" if method == "POST" else None
+    req = urllib.request.Request(url, data=data, method=method,
+                                 headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=10) as response:
+        return response.read()
+
+
+def client(base_url, next_every, stop, results, lock):
+    """One simulated tablet: mostly /status, every next_every-th request a /next"""
+    count = 0
+    while not stop.is_set():
+        count += 1
+        endpoint, method = ("/next", "POST") if next_every and count % next_every == 0 else ("/status", "GET")
+        started = time.perf_counter()
+        try:
+            request(base_url + endpoint, method)
+            ok = True
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            results.setdefault(endpoint, {"latencies": [], "errors": 0})
+            if ok:
+                results[endpoint]["latencies"].append(elapsed)
+            else:
+                results[endpoint]["errors"] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="mp4museum control API load test")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--next-every", type=int, default=50,
+                        help="every Nth request of a client is POST /next (0 disables)")
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip("/")
+    stop = Event()
+    lock = Lock()
+    results = {}
+    threads = [Thread(target=client, args=(base_url, args.next_every, stop, results, lock), daemon=True)
+               for _ in range(args.clients)]
+
+    print(f"🔨 {args.clients} clients against {base_url} for {args.seconds}s")
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=15)
+    wall = time.perf_counter() - started
+
+    for endpoint, data in sorted(results.items()):
+        latencies = data["latencies"]
+        p50 = percentile(latencies, 50)
+        p99 = percentile(latencies, 99)
+        print(f"{endpoint:8s} requests={len(latencies):6d} errors={data['errors']:4d} "
+              f"rps={len(latencies) / wall:7.1f} "
+              f"p50={p50 * 1000 if p50 is not None else float('nan'):7.1f}ms "
+              f"p99={p99 * 1000 if p99 is not None else float('nan'):7.1f}ms")
+
+    # Playback health after the run (thread count, inter-clip gaps where the backend reports them)
+    try:
+        status = json.loads(request(base_url + "/status", "GET"))
+        print("📊 /status after load:", json.dumps(status, indent=2))
+    except Exception as e:
+        print(f"⚠️ Could not read /status: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
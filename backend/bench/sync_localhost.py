@@ -0,0 +1,94 @@
+# mp4museum - sync engine test on one machine
+# Runs a leader and several followers in one process, each on its own simulated player
+# (player_backend.SimulatedBackend) with a deliberately wrong clock and a random start
+# offset, then prints how far each follower is from the leader as the engine pulls it in.
+# Exits with status 1 if any follower is still off by more than --tolerance-ms at the end.
+#
+#   python3 bench/sync_localhost.py                       # 5 followers, unicast on 127.0.0.1
+#   python3 bench/sync_localhost.py --followers 6 --seconds 60 --multicast
+
+import os
+import sys
+import time
+import random
+import argparse
+from threading import Event
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+from player_backend import SimulatedBackend
+from sync_engine import SyncLeader, SyncFollower, SYNC_GROUP
+
+from bench_e2e import free_port
+
+
+def looping_player(clip_seconds, clock_error, offset):
+    """Simulated player that restarts its clip at the end, started `offset` seconds into it"""
+    backend = SimulatedBackend(clip_seconds, startup_ms=0, clock_error=clock_error)
+    media = backend.new_media("sync.mp4")
+    backend.on_end = lambda: backend.play(media)
+    backend.play(media)
+    time.sleep(0.01)
+    backend.seek(offset)
+    return backend
+
+
+def main():
+    parser = argparse.ArgumentParser(description="mp4museum sync engine localhost test")
+    parser.add_argument("--followers", type=int, default=5)
+    parser.add_argument("--seconds", type=float, default=40)
+    parser.add_argument("--clip-seconds", type=float, default=30)
+    parser.add_argument("--max-clock-error-ppm", type=float, default=3000)
+    parser.add_argument("--tolerance-ms", type=float, default=10)
+    parser.add_argument("--multicast", action="store_true", help=f"use the {SYNC_GROUP} group instead of unicast")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    leader_backend = looping_player(args.clip_seconds, 0.0, 0.0)
+    followers = []
+    ports = []
+    for i in range(args.followers):
+        clock_error = rng.uniform(-1, 1) * args.max_clock_error_ppm / 1e6
+        # Most start close, the last one far enough off to need a seek
+        offset = 2.0 if i == args.followers - 1 else rng.uniform(0, 0.4)
+        port = free_port() if not args.multicast else int(os.environ.get("MP4MUSEUM_SYNC_PORT", "7777"))
+        ports.append(port)
+        backend = looping_player(args.clip_seconds, clock_error, offset)
+        follower = SyncFollower(backend, "sync.mp4", group=SYNC_GROUP if args.multicast else "127.0.0.1", port=port)
+        followers.append((follower.start(), clock_error))
+
+    targets = None if args.multicast else [("127.0.0.1", port) for port in ports]
+    leader = SyncLeader(leader_backend, "sync.mp4", targets=targets).start()
+
+    started = time.monotonic()
+    stop = Event()
+    while not stop.wait(2.0):
+        elapsed = time.monotonic() - started
+        row = []
+        for follower, _ in followers:
+            status = follower.status()
+            drift = status["drift_ms"]
+            row.append(f"{drift:+7.1f}" if drift is not None else "    n/a")
+        print(f"{elapsed:5.1f}s  drift ms: " + " ".join(row))
+        if elapsed >= args.seconds:
+            break
+
+    print(f"👑 leader: {leader.status()}")
+    failed = 0
+    for i, (follower, clock_error) in enumerate(followers):
+        status = follower.status()
+        off = status["drift_ms"] is None or abs(status["drift_ms"]) > args.tolerance_ms
+        failed += off
+        print(f"{'❌' if off else '✅'} follower {i + 1}: drift {status['drift_ms']} ms, "
+              f"clock {clock_error * 1e6:+.0f} ppm (learned {status['clock_drift_ppm']:+d}), "
+              f"rate {status['rate']}, seeks {status['seeks']}, rtt {status['rtt_ms']} ms")
+    leader.stop()
+    for follower, _ in followers:
+        follower.stop()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
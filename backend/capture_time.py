@@ -0,0 +1,217 @@
+# mp4museum - capture time of camera files
+# ctime/mtime on FAT and exFAT cards is when the file was copied, not when it was shot.
+# This reads the real capture time from the file header: EXIF DateTimeOriginal for JPEGs,
+# the mvhd creation time for MP4/MOV. Only header bytes are read (bounded read() calls,
+# seeking over the media data). Results are cached on disk keyed by (path, size, mtime),
+# and the first scan of a card runs the extraction in a small thread pool.
+# Both are the camera's wall clock without a zone, so both are read as UTC (EXIF with timegm,
+# mvhd as it is) - a photo and a clip shot a minute apart stay a minute apart.
+
+import os
+import time
+import struct
+import calendar
+import logging
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+
+from state_store import state_path, load_json, save_json
+
+log = logging.getLogger("mp4museum.capture")
+
+CACHE_VERSION = 2  # 2: EXIF times read as UTC like mvhd
+EXIF_READ_LIMIT = 128 * 1024  # APP1 (EXIF) comes first in camera JPEGs and is at most 64 KB
+MP4_MAX_BOXES = 64  # Top-level boxes to walk before giving up
+WORKERS = 4  # Card reads are I/O bound - a few threads overlap the USB latency
+MP4_EPOCH_OFFSET = 2082844800  # Seconds between 1904-01-01 (QuickTime epoch) and 1970-01-01
+
+TAG_DATETIME = 0x0132
+TAG_EXIF_IFD = 0x8769
+TAG_DATETIME_ORIGINAL = 0x9003
+
+
+def _parse_exif_datetime(value):
+    """'YYYY:MM:DD HH:MM:SS' (camera wall clock) -> timestamp on the same UTC scale as mvhd, or None"""
+    try:
+        return float(calendar.timegm(time.strptime(value.strip("\x00 "), "%Y:%m:%d %H:%M:%S")))
+    except (ValueError, OverflowError):
+        return None
+
+
+def _read_ifd(tiff, offset, endian):
+    """{tag: (type, count, value/offset field)} for one IFD of a TIFF block"""
+    tags = {}
+    if offset + 2 > len(tiff):
+        return tags
+    count = struct.unpack_from(endian + "H", tiff, offset)[0]
+    for i in range(count):
+        pos = offset + 2 + i * 12
+        if pos + 12 > len(tiff):
+            break
+        tag, kind, n = struct.unpack_from(endian + "HHI", tiff, pos)
+        tags[tag] = (kind, n, pos + 8)
+    return tags
+
+
+def _ifd_string(tiff, field, endian):
+    kind, n, pos = field
+    if kind != 2:  # ASCII
+        return None
+    if n > 4:
+        pos = struct.unpack_from(endian + "I", tiff, pos)[0]
+    return tiff[pos:pos + n].decode("ascii", "replace")
+
+
+def exif_capture_time(path):
+    """DateTimeOriginal (or DateTime) from a JPEG's EXIF block, or None"""
+    with open(path, "rb") as f:
+        data = f.read(EXIF_READ_LIMIT)
+    if data[:2] != b"\xff\xd8":
+        return None
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        length = struct.unpack_from(">H", data, pos + 2)[0]
+        if marker == 0xE1 and data[pos + 4:pos + 10] == b"Exif\x00\x00":
+            tiff = data[pos + 10:pos + 2 + length]
+            break
+        if marker in (0xDA, 0xD9):  # Start of scan / end of image - no EXIF
+            return None
+        pos += 2 + length
+    else:
+        return None
+
+    endian = "<" if tiff[:2] == b"II" else ">"
+    if len(tiff) < 8:
+        return None
+    ifd0 = _read_ifd(tiff, struct.unpack_from(endian + "I", tiff, 4)[0], endian)
+    if TAG_EXIF_IFD in ifd0:
+        exif_offset = struct.unpack_from(endian + "I", tiff, ifd0[TAG_EXIF_IFD][2])[0]
+        exif = _read_ifd(tiff, exif_offset, endian)
+        if TAG_DATETIME_ORIGINAL in exif:
+            value = _ifd_string(tiff, exif[TAG_DATETIME_ORIGINAL], endian)
+            if value:
+                return _parse_exif_datetime(value)
+    if TAG_DATETIME in ifd0:
+        value = _ifd_string(tiff, ifd0[TAG_DATETIME], endian)
+        if value:
+            return _parse_exif_datetime(value)
+    return None
+
+
+def _boxes(f, start, end):
+    """Yield (type, payload offset, payload size) for the boxes between start and end"""
+    pos = start
+    for _ in range(MP4_MAX_BOXES):
+        if pos + 8 > end:
+            return
+        f.seek(pos)
+        header = f.read(16)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack(">I4s", header[:8])
+        header_size = 8
+        if size == 1:
+            if len(header) < 16:
+                return
+            size = struct.unpack(">Q", header[8:16])[0]
+            header_size = 16
+        elif size == 0:
+            size = end - pos  # Box runs to the end of the file
+        if size < header_size:
+            return
+        yield kind, pos + header_size, size - header_size
+        pos += size
+
+
+def mp4_capture_time(path):
+    """Creation time from the mvhd box of an MP4/MOV file, or None"""
+    with open(path, "rb") as f:
+        end = os.fstat(f.fileno()).st_size
+        for kind, offset, size in _boxes(f, 0, end):
+            if kind != b"moov":
+                continue  # Seek over mdat, never read it
+            for child, child_offset, _child_size in _boxes(f, offset, offset + size):
+                if child != b"mvhd":
+                    continue
+                f.seek(child_offset)
+                head = f.read(12)
+                if len(head) < 8:
+                    return None
+                if head[0] == 1:
+                    if len(head) < 12:
+                        return None
+                    created = struct.unpack(">Q", head[4:12])[0]
+                else:
+                    created = struct.unpack(">I", head[4:8])[0]
+                if created <= MP4_EPOCH_OFFSET:
+                    return None  # Unset (0) - many cheap cameras
+                return float(created - MP4_EPOCH_OFFSET)
+            return None
+    return None
+
+
+def read_capture_time(path):
+    """Capture time from the file header, or None when the format has none"""
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        if ext in (".jpg", ".jpeg"):
+            return exif_capture_time(path)
+        if ext in (".mp4", ".mov", ".m4v", ".3gp"):
+            return mp4_capture_time(path)
+    except (OSError, struct.error, IndexError, ValueError) as e:
+        log.debug(f"🧪 No capture time for {path}: {e}")
+    return None
+
+
+class CaptureTimeCache:
+    """Capture times cached on disk by (path, size, mtime); falls back to mtime"""
+
+    def __init__(self, path=None, workers=WORKERS):
+        self.path = path or state_path("capture_times.json")
+        self.workers = workers
+        self.lock = Lock()
+        self.entries = {}  # path -> [size, mtime, capture time]
+        self.dirty = False
+        data = load_json(self.path)
+        if data and data.get("version") == CACHE_VERSION:
+            self.entries = data.get("entries", {})
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            snapshot = dict(self.entries)
+            self.dirty = False
+        save_json(self.path, {"version": CACHE_VERSION, "entries": snapshot})
+
+    def lookup(self, path, size, mtime):
+        """Capture time of one file (cached or read now)"""
+        with self.lock:
+            cached = self.entries.get(path)
+        if cached and cached[0] == size and cached[1] == mtime:
+            return cached[2]
+        taken = read_capture_time(path)
+        if taken is None:
+            taken = mtime
+        with self.lock:
+            self.entries[path] = [size, mtime, taken]
+            self.dirty = True
+        return taken
+
+    def __call__(self, items):
+        """Capture times for a batch of (path, size, mtime); misses are read in the thread pool"""
+        items = list(items)
+        with self.lock:
+            misses = sum(1 for path, size, mtime in items
+                         if self.entries.get(path, [None, None])[:2] != [size, mtime])
+        if misses > 1 and self.workers > 1:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="CaptureTime") as pool:
+                result = list(pool.map(lambda item: self.lookup(*item), items))
+        else:
+            result = [self.lookup(*item) for item in items]
+        if misses:
+            self.save()
+        return result
@@ -0,0 +1,201 @@
+# mp4museum - playback controller for the button-driven players (GPIO, keyboard)
+# Input callbacks only enqueue commands. One controller thread owns the VLC player and
+# works through the queue, so a press never blocks the input thread, presses never nest
+# (the old scripts called vlc_play() recursively from the button handler) and nothing
+# polls get_state(). The time from the press to the clip's first frame is measured.
+# prewarm() creates and parses the Media of every mapped clip up front and can keep the
+# start of each file resident in RAM, so a press does not wait for the SD card.
+
+import os
+import time
+import queue
+import logging
+from collections import deque
+from threading import Thread
+
+import vlc
+
+from page_cache import pin_file
+
+log = logging.getLogger("mp4museum.controller")
+
+LOOP_REPEAT = 65535  # VLC's maximum input-repeat; the controller restarts the clip after that
+PIN_BUDGET_MB = 256  # Upper bound for all pinned file heads together (hundreds of mapped keys)
+
+
+class ClipController:
+    """Single thread that plays, stops and pauses clips on one shared VLC player"""
+
+    def __init__(self, vlc_instance):
+        self.vlc_instance = vlc_instance
+        self.player = vlc_instance.media_player_new()
+        self.commands = queue.Queue()
+        self.media = None
+        self.source = None
+        self.pressed_at = None  # Press time of the clip we are waiting to see on screen
+        self.latencies = deque(maxlen=100)  # Press -> first frame, seconds
+        self.last_latency_ms = None
+        self.clip_latencies = {}  # source -> deque of press -> first frame, seconds
+        self.warm = {}  # source -> pre-parsed vlc.Media, kept for the controller's lifetime
+        self.pinned = []  # PinnedRegion per pre-warmed file
+        self.thread = Thread(target=self._run, daemon=True, name="ClipController")
+
+        # libvlc events arrive on VLC's own thread - only note them, never call VLC from there
+        event_manager = self.player.event_manager()
+        event_manager.event_attach(vlc.EventType.MediaPlayerVout, self._on_first_frame)
+        event_manager.event_attach(vlc.EventType.MediaPlayerPlaying, self._on_playing)
+        event_manager.event_attach(vlc.EventType.MediaPlayerEndReached, self._on_end)
+        event_manager.event_attach(vlc.EventType.MediaPlayerEncounteredError, self._on_error)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def prewarm(self, sources, pin_mb=0, pin_budget_mb=PIN_BUDGET_MB):
+        """Create and parse a Media for every clip now; optionally keep its first pin_mb MB in RAM"""
+        budget = pin_budget_mb * 1024 * 1024
+        for source in sources:
+            if source in self.warm or not os.path.isfile(source):
+                continue
+            started = time.monotonic()
+            if pin_mb and budget > 0:
+                region = pin_file(source, min(pin_mb, budget / (1024 * 1024)))
+                if region is not None:
+                    self.pinned.append(region)
+                    budget -= region.length
+            media = self._new_media(source)
+            media.parse_with_options(vlc.MediaParseFlag.local, -1)  # Asynchronous
+            self.warm[source] = media
+            log.info(f"🔥 Pre-warmed {os.path.basename(source)} in {round((time.monotonic() - started) * 1000, 1)} ms")
+        locked = sum(1 for region in self.pinned if region.locked)
+        if pin_mb:
+            log.info(f"📌 {len(self.pinned)} clips in page cache, {locked} locked (first {pin_mb} MB each)")
+        return self
+
+    # Commands - safe to call from any thread, they return immediately
+    def play(self, source, pressed_at=None):
+        self.commands.put(("play", source, pressed_at or time.monotonic()))
+
+    def stop(self, pressed_at=None):
+        self.commands.put(("stop", None, pressed_at or time.monotonic()))
+
+    def toggle_pause(self, pressed_at=None):
+        self.commands.put(("toggle", None, pressed_at or time.monotonic()))
+
+    def close(self, timeout=2):
+        self.commands.put(("quit", None, time.monotonic()))
+        self.thread.join(timeout)
+
+    def wait(self):
+        """Block until close() (used by the scripts' main thread)"""
+        while self.thread.is_alive():
+            self.thread.join(1)  # Short joins keep Ctrl+C responsive
+
+    def latency_stats(self):
+        """Press-to-first-frame summary in milliseconds, overall and per clip"""
+        def summary(latencies):
+            samples = sorted(latencies)
+            return {
+                "samples": len(samples),
+                "median_ms": round(samples[len(samples) // 2] * 1000, 1),
+                "max_ms": round(samples[-1] * 1000, 1),
+            }
+
+        if not self.latencies:
+            return {"samples": 0}
+        stats = summary(self.latencies)
+        stats["last_ms"] = self.last_latency_ms
+        stats["clips"] = {os.path.basename(source): summary(latencies)
+                          for source, latencies in self.clip_latencies.items()}
+        return stats
+
+    # VLC event callbacks
+    def _record_latency(self, kind):
+        pressed_at = self.pressed_at
+        if pressed_at is None:
+            return
+        self.pressed_at = None
+        latency = time.monotonic() - pressed_at
+        self.latencies.append(latency)
+        self.clip_latencies.setdefault(self.source, deque(maxlen=20)).append(latency)
+        self.last_latency_ms = round(latency * 1000, 1)
+        warm = "warm" if self.source in self.warm else "cold"
+        log.info(f"⏱️ Press to {kind}: {self.last_latency_ms} ms ({os.path.basename(self.source)}, {warm})")
+
+    def _on_first_frame(self, event):
+        if getattr(event.u, "new_count", 1) >= 1:
+            self._record_latency("first frame")
+
+    def _on_playing(self, event):
+        if self.source and not self.source.lower().endswith((".mp3", ".wav", ".flac", ".ogg")):
+            return  # Video clips are measured at their first frame
+        self._record_latency("playing")
+
+    def _on_end(self, event):
+        self.commands.put(("ended", None, None))
+
+    def _on_error(self, event):
+        log.error(f"❌ VLC could not play {self.source}")
+        self.commands.put(("ended", None, None))
+
+    # Controller thread
+    def _run(self):
+        while True:
+            command, source, pressed_at = self.commands.get()
+            try:
+                if command == "quit":
+                    self._release()
+                    self.unpin()
+                    return
+                getattr(self, "_do_" + command)(source, pressed_at)
+            except Exception as e:
+                log.error(f"❌ Controller {command} failed: {e}")
+
+    def _new_media(self, source):
+        media = self.vlc_instance.media_new(source)
+        if ".loop." in source:
+            media.add_option(f"input-repeat={LOOP_REPEAT}")
+        return media
+
+    def _do_play(self, source, pressed_at):
+        self._release()
+        media = self.warm.get(source) or self._new_media(source)
+        self.source = source
+        self.pressed_at = pressed_at
+        self.player.set_media(media)
+        self.player.play()
+        self.media = media
+        log.info(f"🎬 Playing {os.path.basename(source)}")
+
+    def _do_stop(self, source, pressed_at):
+        if self.player.is_playing() or self.player.get_state() == vlc.State.Paused:
+            self.player.stop()
+            log.info("⏹️ Playback stopped")
+
+    def _do_toggle(self, source, pressed_at):
+        if self.player.is_playing():
+            self.player.pause()
+            log.info("⏸️ Playback paused")
+        elif self.media is not None:
+            self.player.play()
+            log.info("▶️ Playback resumed")
+
+    def _do_ended(self, source, pressed_at):
+        if self.source and ".loop." in self.source and self.player.get_state() == vlc.State.Ended:
+            # Repeat count exhausted - start the loop clip over
+            self.player.set_media(self.media)
+            self.player.play()
+
+    def _release(self):
+        if self.media is not None:
+            self.player.stop()
+            if self.source not in self.warm:
+                self.media.release()
+            self.media = None
+            self.source = None
+
+    def unpin(self):
+        """Give the pinned file heads back to the kernel"""
+        for region in self.pinned:
+            region.close()
+        self.pinned = []
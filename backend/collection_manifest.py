@@ -0,0 +1,246 @@
+# mp4museum - per-collection playlist manifests
+# A manifest is the collection's playlist with everything the player needs precomputed:
+# order, per-item loop flag and dwell time, size, mtime and duration. It lives in the state
+# directory (~/.mp4museum/manifests/) and is loaded in one read, so switching to a huge
+# collection does not list or stat it. When the directory (or its playlist.json) changes,
+# the manifest is rebuilt by a background thread; until then the previous one keeps playing.
+#
+# Curating: put a playlist.json into the collection folder, e.g.
+#
+#   {"items": [{"file": "intro.mp4"},
+#              {"file": "poster.jpg", "dwell": 20},
+#              {"file": "ambient.mp4", "loop": true}],
+#    "append_new": true}
+#
+# Listed files play in that order; other files follow sorted by name unless append_new is
+# false. Without a playlist.json the order is by name and "loop." in a name sets loop.
+
+import os
+import time
+import queue
+import hashlib
+import logging
+from threading import Thread, Lock
+
+from state_store import state_path, load_json, save_json
+from library_index import scan_dir
+
+log = logging.getLogger("mp4museum.manifest")
+
+MANIFEST_VERSION = 2  # 2: dwell and loop from playlist.json are validated
+CURATED_NAME = "playlist.json"  # Optional, hand-written, inside the collection folder
+
+
+class PlaylistItem:
+    __slots__ = ("path", "loop", "dwell", "duration", "size")
+
+    def __init__(self, path, loop=False, dwell=None, duration=None, size=None):
+        self.path = path
+        self.loop = loop
+        self.dwell = dwell  # Seconds to show the item, None = until it ends
+        self.duration = duration
+        self.size = size
+
+
+def parse_curated(data, source=CURATED_NAME):
+    """([(name, loop or None, dwell or None)], append_new) from a playlist.json; bad parts are logged and skipped.
+    entries is None when the whole file is unusable (the folder then plays by name)."""
+    if not isinstance(data, dict):
+        log.warning(f"⚠️ Ignoring {source}: expected an object with \"items\"")
+        return None, True
+    raw_items = data.get("items", [])
+    if not isinstance(raw_items, list):
+        log.warning(f"⚠️ Ignoring {source}: \"items\" is not a list")
+        return None, True
+    entries = []
+    for raw in raw_items:
+        if isinstance(raw, str):
+            entries.append((raw, None, None))
+            continue
+        if not isinstance(raw, dict) or not isinstance(raw.get("file"), str):
+            log.warning(f"⚠️ Ignoring playlist entry {raw!r} in {source}")
+            continue
+        loop = raw.get("loop")
+        if loop is not None and not isinstance(loop, (bool, int)):
+            log.warning(f"⚠️ Ignoring loop {loop!r} of {raw['file']} in {source}")
+            loop = None
+        dwell = raw.get("dwell")
+        if dwell is not None:
+            try:
+                dwell = float(dwell)
+                if isinstance(raw["dwell"], bool) or not 0 < dwell < float("inf"):
+                    raise ValueError(dwell)
+            except (TypeError, ValueError):
+                log.warning(f"⚠️ Ignoring dwell {raw['dwell']!r} of {raw['file']} in {source}")
+                dwell = None
+        entries.append((raw["file"], None if loop is None else bool(loop), dwell))
+    return entries, bool(data.get("append_new", True))
+
+
+def _stat_mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+class ManifestStore:
+    """Playlists per collection from precomputed manifests, rebuilt in the background"""
+
+    def __init__(self, extensions=None, probe=None, directory=None):
+        self.extensions = tuple(extensions) if extensions else None  # None = every file, like the library
+        self.probe = probe  # Optional callable(path) -> duration in seconds
+        self.directory = directory or state_path("manifests")
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+        except OSError:
+            pass  # Read-only filesystem - manifests are rebuilt in memory each run
+        self.lock = Lock()
+        self.manifests = {}  # collection path -> manifest dict
+        self.items = {}  # collection path -> [PlaylistItem], built from the manifest once
+        self.pending = set()
+        self.jobs = queue.Queue()
+        self.worker = None
+
+    def _path(self, collection):
+        return os.path.join(self.directory, hashlib.sha1(collection.encode()).hexdigest()[:16] + ".json")
+
+    # ---- queries -----------------------------------------------------------
+
+    def playlist(self, collection):
+        """[PlaylistItem] for a collection - from memory or one file read; stale ones are rebuilt in the background"""
+        collection = os.path.normpath(collection)
+        with self.lock:
+            manifest = self.manifests.get(collection)
+        if manifest is None:
+            manifest = load_json(self._path(collection))
+            if not manifest or manifest.get("version") != MANIFEST_VERSION or manifest.get("collection") != collection:
+                manifest = self._rebuild_or_by_name(collection)  # First visit - nothing to play until it exists
+            else:
+                self._set(collection, manifest)
+        if self._stale(manifest):
+            self.invalidate(collection)
+        with self.lock:
+            return self.items.get(collection, [])
+
+    def _stale(self, manifest):
+        collection = manifest["collection"]
+        return (manifest.get("dir_mtime") != _stat_mtime(collection) or
+                manifest.get("curated_mtime") != _stat_mtime(os.path.join(collection, CURATED_NAME)))
+
+    def _set(self, collection, manifest):
+        items = [PlaylistItem(os.path.join(collection, item["file"]), item.get("loop", False),
+                              item.get("dwell"), item.get("duration"), item.get("size"))
+                 for item in manifest["items"]]
+        with self.lock:
+            self.manifests[collection] = manifest
+            self.items[collection] = items
+
+    # ---- rebuilding --------------------------------------------------------
+
+    def invalidate(self, collection):
+        """Queue a rebuild (e.g. from the library's change notification); returns at once"""
+        collection = os.path.normpath(collection)
+        with self.lock:
+            if collection in self.pending:
+                return
+            self.pending.add(collection)
+            if self.worker is None:
+                self.worker = Thread(target=self._work, daemon=True, name="ManifestBuilder")
+                self.worker.start()
+        self.jobs.put(collection)
+
+    def changed(self, path):
+        """Library listener: rebuild if path is a collection whose manifest is in use"""
+        path = os.path.normpath(path)
+        with self.lock:
+            known = path in self.manifests
+        if known:
+            self.invalidate(path)
+
+    def _work(self):
+        while True:
+            collection = self.jobs.get()
+            with self.lock:
+                self.pending.discard(collection)
+            try:
+                self._rebuild_or_by_name(collection)
+            except Exception as e:
+                log.warning(f"⚠️ Manifest rebuild for {collection} failed: {e}")
+
+    def _rebuild_or_by_name(self, collection):
+        try:
+            return self.rebuild(collection)
+        except Exception as e:
+            # playlist() runs on the player thread - play the folder by name rather than nothing.
+            # The manifest still records playlist.json's mtime, so it is not stale until the file changes.
+            log.warning(f"⚠️ Manifest for {collection} failed ({e}) - playing by name")
+            return self.rebuild(collection, curated=False)
+
+    def rebuild(self, collection, curated=True):
+        """Scan the collection once, merge the curated order, keep known durations, save"""
+        collection = os.path.normpath(collection)
+        started = time.monotonic()
+        dir_mtime = _stat_mtime(collection)  # Before the scan: a change during it triggers another rebuild
+        curated_path = os.path.join(collection, CURATED_NAME)
+        curated_mtime = _stat_mtime(curated_path)  # Recorded even when not used, for _stale()
+        try:
+            _subdirs, files = scan_dir(collection)
+        except OSError:
+            files = {}
+        files.pop(CURATED_NAME, None)
+        if self.extensions:
+            files = {name: stat for name, stat in files.items() if name.lower().endswith(self.extensions)}
+
+        with self.lock:
+            previous = self.manifests.get(collection)
+        previous = previous or load_json(self._path(collection)) or {}
+        known = {item["file"]: item for item in previous.get("items", [])}
+
+        entries, append_new = parse_curated(load_json(curated_path), curated_path) \
+            if curated and curated_mtime is not None else (None, True)
+        curated = entries is not None
+        order = []
+        flags = {}
+        for name, loop, dwell in entries or ():
+            if name in files and name not in flags:
+                order.append(name)
+                flags[name] = (loop, dwell)
+        if append_new:
+            order.extend(sorted(name for name in files if name not in flags))
+
+        items = []
+        for name in order:
+            size, mtime = files[name][:2]
+            old = known.get(name)
+            if old and old.get("size") == size and old.get("mtime") == mtime and old.get("duration") is not None:
+                duration = old["duration"]
+            else:  # New, changed, or not probed yet when the manifest was built
+                duration = self._probe(os.path.join(collection, name))
+            loop, dwell = flags.get(name, (None, None))
+            items.append({
+                "file": name, "size": size, "mtime": mtime, "duration": duration,
+                "loop": "loop." in name if loop is None else loop,
+                "dwell": dwell,
+            })
+
+        manifest = {
+            "version": MANIFEST_VERSION, "collection": collection, "built": time.time(),
+            "dir_mtime": dir_mtime, "curated_mtime": curated_mtime,
+            "curated": curated, "items": items,
+        }
+        self._set(collection, manifest)
+        save_json(self._path(collection), manifest)
+        log.info(f"🗂️ Manifest for {os.path.basename(collection)}: {len(items)} items "
+                 f"({'curated' if curated else 'by name'}) in "
+                 f"{round((time.monotonic() - started) * 1000, 1)} ms")
+        return manifest
+
+    def _probe(self, file_path):
+        if self.probe is None:
+            return None
+        try:
+            return self.probe(file_path)
+        except Exception as e:
+            log.warning(f"⚠️ Could not probe {file_path}: {e}")
+            return None
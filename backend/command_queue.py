@@ -0,0 +1,139 @@
+# mp4museum - player command queue
+# HTTP handlers never touch the player themselves. They submit a command and return its id
+# at once. The player thread is the only consumer: it waits on this queue (and is woken by
+# the player process exiting) and runs the commands in order. Player state therefore has
+# one writer, and no request waits for a process to die. GET /commands/<id> tells a remote
+# whether its command has run, how long it queued, and when it finished.
+
+import time
+import itertools
+from collections import deque, OrderedDict
+from threading import Condition, Event
+
+HISTORY_SIZE = 256  # Finished commands kept for /commands/<id>
+SUPERSEDED_BY_NEWER = {"switch"}  # A queued switch is pointless once another one is queued
+INTERRUPTING = {"switch", "stop"}  # Cut the player thread's other waits short (player start-up)
+
+
+class Command:
+    __slots__ = ("id", "kind", "args", "state", "result", "submitted", "started", "finished",
+                 "finished_wall", "done")
+
+    def __init__(self, command_id, kind, args):
+        self.id = command_id
+        self.kind = kind
+        self.args = args
+        self.state = "queued"  # queued -> running -> done | failed | superseded
+        self.result = None
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+        self.finished_wall = None
+        self.done = Event()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "command": self.kind,
+            "args": self.args,
+            "state": self.state,
+            "result": self.result,
+            "queued_ms": round(((self.started or time.monotonic()) - self.submitted) * 1000, 2)
+                         if self.state != "superseded" else None,
+            "took_ms": round((self.finished - self.started) * 1000, 2)
+                       if self.finished is not None and self.started is not None else None,
+            "completed_at": self.finished_wall,
+        }
+
+
+class CommandQueue:
+    """Many producers (API workers, scheduler), one consumer (the player thread)"""
+
+    def __init__(self, history=HISTORY_SIZE):
+        self.condition = Condition()
+        self.queue = deque()
+        self.commands = OrderedDict()  # id -> Command, queued and recent
+        self.history = history
+        self.ids = itertools.count(1)
+        self.woken = False
+        self.interrupted = Event()  # Set while an interrupting command is queued, or on shutdown
+
+    # ---- producers ---------------------------------------------------------
+
+    def submit(self, kind, **args):
+        """Queue a command and return it at once (lock held for microseconds)"""
+        with self.condition:
+            command = Command(next(self.ids), kind, args)
+            if kind in SUPERSEDED_BY_NEWER:
+                for older in self.queue:
+                    if older.kind == kind and older.state == "queued":
+                        self._finish(older, "superseded", {"superseded_by": command.id})
+            self.queue.append(command)
+            self.commands[command.id] = command
+            if kind in INTERRUPTING:
+                self.interrupted.set()
+            while len(self.commands) > self.history:
+                oldest_id, oldest = next(iter(self.commands.items()))
+                if oldest.state in ("queued", "running"):
+                    break
+                del self.commands[oldest_id]
+            self.condition.notify()
+        return command
+
+    def wake(self):
+        """Wake the consumer without a command (player process exited, shutdown)"""
+        with self.condition:
+            self.woken = True
+            self.condition.notify()
+
+    def interrupt(self):
+        """wake() that also ends any wait on `interrupted` (shutdown)"""
+        self.interrupted.set()
+        self.wake()
+
+    def get(self, command_id):
+        with self.condition:
+            return self.commands.get(command_id)
+
+    def recent(self, count=20):
+        with self.condition:
+            return [command.to_dict() for command in list(self.commands.values())[-count:]]
+
+    @property
+    def pending(self):
+        return len(self.queue)
+
+    # ---- consumer ----------------------------------------------------------
+
+    def wait(self, timeout=None):
+        """Block until a command is queued, wake() is called or timeout passes"""
+        with self.condition:
+            if not self.queue and not self.woken:
+                self.condition.wait(timeout)
+            self.woken = False
+            return bool(self.queue)
+
+    def take(self):
+        """Next queued command, marked running, or None"""
+        with self.condition:
+            while self.queue:
+                command = self.queue.popleft()
+                if command.state == "queued":
+                    command.state = "running"
+                    command.started = time.monotonic()
+                    if command.kind in INTERRUPTING and not any(
+                            queued.kind in INTERRUPTING and queued.state == "queued" for queued in self.queue):
+                        self.interrupted.clear()
+                    return command
+        return None
+
+    def finish(self, command, result, failed=False):
+        with self.condition:
+            self._finish(command, "failed" if failed else "done", result)
+
+    def _finish(self, command, state, result):
+        command.state = state
+        command.result = result
+        command.finished = time.monotonic()
+        command.finished_wall = time.time()
+        command.done.set()
@@ -0,0 +1,136 @@
+# mp4museum - chronological index of a camera card (DCIM)
+# Walks the card one directory at a time and yields files as soon as they are found, so
+# playback starts right away. Every directory's mtime and files are kept in a JSON index;
+# on the next pass a directory whose mtime did not change is taken from the index without
+# listing it again. Within the index files are ordered by capture time.
+
+import os
+import heapq
+import logging
+import time
+
+from state_store import state_path, load_json, save_json
+
+log = logging.getLogger("mp4museum.dcim")
+
+INDEX_VERSION = 2  # 2: capture times from file headers instead of mtimes
+MEDIA_EXTENSIONS = ('.jpg', '.jpeg', '.mp4', '.avi', '.mov')
+SAVE_INTERVAL = 30  # Seconds between index saves during a long first walk
+
+
+def file_mtimes(items):
+    """Default capture times for a batch of (path, size, mtime): the file mtimes"""
+    return [mtime for _path, _size, mtime in items]
+
+
+class DCIMIndex:
+    """Persisted, incrementally refreshed index of the media files below a DCIM folder"""
+
+    def __init__(self, root, path=None, capture_times=None):
+        self.root = os.path.normpath(root)
+        self.path = path or state_path("dcim_index.json")
+        # callable([(path, size, mtime), ...]) -> [timestamp, ...], e.g. capture_time.CaptureTimeCache
+        self.capture_times = capture_times or file_mtimes
+        # relative dir -> {"mtime": float, "subdirs": [names], "files": [[taken, name, size, mtime], ...]}
+        # files are kept sorted by (taken, name)
+        self.dirs = {}
+        self.dirty = False
+
+    def load(self):
+        data = load_json(self.path)
+        if data and data.get("version") == INDEX_VERSION and data.get("root") == self.root:
+            self.dirs = data.get("dirs", {})
+            log.info(f"📷 DCIM index loaded: {len(self)} files in {len(self.dirs)} folders")
+        return self
+
+    def save(self):
+        if save_json(self.path, {"version": INDEX_VERSION, "root": self.root, "dirs": self.dirs}):
+            self.dirty = False
+
+    def __len__(self):
+        return sum(len(d["files"]) for d in self.dirs.values())
+
+    def _scan_dir(self, rel, full, mtime):
+        """List one directory and return its new index entry (capture times reused where unchanged)"""
+        old = {f[1]: f for f in self.dirs.get(rel, {}).get("files", [])}
+        subdirs = []
+        files = []
+        new = []  # (path, size, mtime) that need a capture time
+        with os.scandir(full) as entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue  # macOS metadata, camera thumbnails
+                try:
+                    if entry.is_dir():
+                        subdirs.append(entry.name)
+                    elif entry.is_file() and entry.name.lower().endswith(MEDIA_EXTENSIONS):
+                        st = entry.stat()
+                        known = old.get(entry.name)
+                        if known and known[2] == st.st_size and known[3] == st.st_mtime:
+                            files.append(known)
+                        else:
+                            new.append((entry.path, st.st_size, st.st_mtime))
+                except OSError:
+                    continue  # Vanished while scanning
+        if new:
+            # One batch per folder so the extractor can read the headers in parallel
+            for (file_path, size, file_mtime), taken in zip(new, self.capture_times(new)):
+                files.append([taken, os.path.basename(file_path), size, file_mtime])
+        files.sort()
+        return {"mtime": mtime, "subdirs": sorted(subdirs), "files": files}
+
+    def walk(self):
+        """Yield media files directory by directory as they are found, updating the index.
+        Directories whose mtime is unchanged are served from the index without a listing."""
+        seen = set()
+        stack = [""]
+        last_save = time.monotonic()
+        while stack:
+            rel = stack.pop()
+            full = os.path.join(self.root, rel) if rel else self.root
+            try:
+                mtime = os.stat(full).st_mtime
+            except OSError:
+                continue  # Card removed or folder deleted
+            seen.add(rel)
+            entry = self.dirs.get(rel)
+            if entry is None or entry["mtime"] != mtime:
+                try:
+                    entry = self._scan_dir(rel, full, mtime)
+                except OSError as e:
+                    log.warning(f"⚠️ Cannot list {full}: {e}")
+                    continue
+                self.dirs[rel] = entry
+                self.dirty = True
+            # Reverse so the stack pops subfolders in name order (100CANON before 101CANON)
+            stack.extend(os.path.join(rel, d) for d in reversed(entry["subdirs"]))
+            for f in entry["files"]:
+                yield os.path.join(full, f[1])
+            if self.dirty and time.monotonic() - last_save > SAVE_INTERVAL:
+                self.save()
+                last_save = time.monotonic()
+
+        removed = [rel for rel in self.dirs if rel not in seen]
+        for rel in removed:
+            del self.dirs[rel]
+        if removed:
+            self.dirty = True
+        if self.dirty:
+            self.save()
+            log.info(f"📷 DCIM index updated: {len(self)} files in {len(self.dirs)} folders")
+
+    def refresh(self):
+        """Bring the index up to date; unchanged folders cost one stat() each"""
+        for _ in self.walk():
+            pass
+        return self
+
+    def chronological(self):
+        """Yield every indexed file in capture-time order (lazy k-way merge of the sorted folders)"""
+        def folder(rel, entry):
+            base = os.path.join(self.root, rel) if rel else self.root
+            for taken, name, _size, _mtime in entry["files"]:
+                yield taken, os.path.join(base, name)
+
+        for _taken, path in heapq.merge(*(folder(rel, e) for rel, e in list(self.dirs.items()))):
+            yield path
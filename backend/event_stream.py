@@ -0,0 +1,76 @@
+# mp4museum - Server-Sent Events for the remote
+# The player threads publish state changes here; every connected client gets its own
+# small bounded queue. A slow client loses its oldest events instead of ever blocking
+# the player thread that publishes them.
+
+import json
+import time
+import queue
+from threading import Lock
+
+CLIENT_QUEUE_SIZE = 32  # Events buffered per client before the oldest are dropped
+KEEPALIVE_INTERVAL = 15  # Seconds - comment line so proxies and tablets keep the connection
+
+
+class EventBroadcaster:
+    """Fan-out of named events to any number of SSE clients"""
+
+    def __init__(self, queue_size=CLIENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.clients = set()
+        self.lock = Lock()
+        self.event_id = 0
+        self.dropped = 0  # Events discarded because a client was too slow
+
+    def subscribe(self):
+        client = queue.Queue(maxsize=self.queue_size)
+        with self.lock:
+            self.clients.add(client)
+        return client
+
+    def unsubscribe(self, client):
+        with self.lock:
+            self.clients.discard(client)
+
+    @property
+    def client_count(self):
+        return len(self.clients)
+
+    def publish(self, event, data):
+        """Queue an event for every client - never blocks"""
+        with self.lock:
+            self.event_id += 1
+            message = f"id: {self.event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+            clients = list(self.clients)
+        for client in clients:
+            try:
+                client.put_nowait(message)
+            except queue.Full:
+                # Drop the oldest event for this client and keep the newest
+                try:
+                    client.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+                try:
+                    client.put_nowait(message)
+                except queue.Full:
+                    self.dropped += 1
+
+    def stream(self, initial=None):
+        """Generator for a Flask streaming Response. initial is an optional (event, data)
+        snapshot sent first so a new client does not have to poll /status."""
+        client = self.subscribe()
+        try:
+            yield "retry: 3000\n\n"
+            if initial is not None:
+                event, data = initial
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+            while True:
+                try:
+                    yield client.get(timeout=KEEPALIVE_INTERVAL)
+                except queue.Empty:
+                    yield f": keepalive {int(time.time())}\n\n"
+        finally:
+            # Runs when the client disconnects (GeneratorExit) or the server shuts down
+            self.unsubscribe(client)
@@ -1,11 +1,53 @@
-BCM = BOARD = IN = OUT = PUD_UP = PUD_DOWN = HIGH = LOW = RISING = FALLING = BOTH = None
+import time
+
+# Same values as the real RPi.GPIO so code can compare them
+BCM, BOARD = 11, 10
+OUT, IN = 0, 1
+PUD_DOWN, PUD_UP = 21, 22
+LOW, HIGH = 0, 1
+RISING, FALLING, BOTH = 31, 32, 33
+
+# Pin levels and edge callbacks, so input can be simulated with inject_edge()
+_levels = {}
+_detect = {}  # pin -> [edge, bouncetime in seconds, last callback time, [callbacks]]
 
 def setmode(*args, **kwargs): pass
 def setup(*args, **kwargs): pass
-def input(*args, **kwargs): return False
+def input(channel, *args, **kwargs): return _levels.get(channel, LOW)
 def output(*args, **kwargs): pass
-def cleanup(*args, **kwargs): pass
-def add_event_detect(*args, **kwargs): pass
-def remove_event_detect(*args, **kwargs): pass
-def add_event_callback(*args, **kwargs): pass
+def cleanup(*args, **kwargs):
+    _levels.clear()
+    _detect.clear()
+
+def add_event_detect(channel, edge, callback=None, bouncetime=None):
+    _detect[channel] = [edge, (bouncetime or 0) / 1000.0, None, [callback] if callback else []]
+
+def remove_event_detect(channel):
+    _detect.pop(channel, None)
+
+def add_event_callback(channel, callback):
+    if channel in _detect:
+        _detect[channel][3].append(callback)
+
 def setwarnings(flag): pass
+
+# --- test helpers (not part of RPi.GPIO) ---
+
+def set_level(channel, level):
+    """Change a pin level without firing callbacks"""
+    _levels[channel] = level
+
+def inject_edge(channel, edge=RISING, timestamp=None):
+    """Simulate an edge: updates the level and runs the callbacks in the calling thread,
+    honouring the edge type and bouncetime like the real library's event thread"""
+    _levels[channel] = HIGH if edge == RISING else LOW
+    detect = _detect.get(channel)
+    if not detect or detect[0] not in (edge, BOTH):
+        return False
+    now = time.monotonic() if timestamp is None else timestamp
+    if detect[2] is not None and now - detect[2] < detect[1]:
+        return False
+    detect[2] = now
+    for callback in list(detect[3]):
+        callback(channel)
+    return True
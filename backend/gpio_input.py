@@ -0,0 +1,49 @@
+# mp4museum - edge-triggered button input
+# RPi.GPIO calls us on an edge instead of the scripts polling GPIO.input() every 100 ms.
+# Bounces are rejected by timestamp (a press within DEBOUNCE_MS of the last accepted one
+# on the same pin is ignored), so the callback never sleeps and idle CPU is zero.
+
+import time
+import logging
+from threading import Lock
+
+log = logging.getLogger("mp4museum.gpio")
+
+DEBOUNCE_MS = 200  # Minimum time between two accepted presses of the same button
+
+
+class EdgeInput:
+    """Rising-edge detection on a set of pins, reported as on_press(pin, timestamp)"""
+
+    def __init__(self, gpio, pins, on_press, debounce_ms=DEBOUNCE_MS):
+        self.gpio = gpio
+        self.pins = list(pins)
+        self.on_press = on_press
+        self.debounce = debounce_ms / 1000.0
+        self.lock = Lock()
+        self.last_press = {}  # pin -> monotonic time of the last accepted press
+        self.presses = 0
+        self.bounces = 0
+
+    def start(self):
+        for pin in self.pins:
+            self.gpio.setup(pin, self.gpio.IN, pull_up_down=self.gpio.PUD_DOWN)
+            self.gpio.add_event_detect(pin, self.gpio.RISING, callback=self._on_edge)
+        log.info(f"🔘 Watching pins {self.pins} (debounce {int(self.debounce * 1000)} ms)")
+        return self
+
+    def stop(self):
+        for pin in self.pins:
+            self.gpio.remove_event_detect(pin)
+
+    def _on_edge(self, pin):
+        """RPi.GPIO callback thread - timestamp, debounce, hand over; never blocks"""
+        now = time.monotonic()
+        with self.lock:
+            last = self.last_press.get(pin)
+            if last is not None and now - last < self.debounce:
+                self.bounces += 1
+                return
+            self.last_press[pin] = now
+            self.presses += 1
+        self.on_press(pin, now)
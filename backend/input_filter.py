@@ -0,0 +1,130 @@
+# mp4museum - glitch filter for button inputs
+# The old buttonPause()/buttonNext() sampled the pin 200 times with sleep(.001) inside the
+# GPIO callback and accepted the press when more than 50 samples were high. That blocked
+# the callback thread for 200+ ms per edge, and edges arriving meanwhile were lost.
+#
+# This filter applies the same majority rule to edge timestamps instead: the callback only
+# records (pin, level, time). A timer thread adds up how long the pin has been high since
+# the rising edge. The press is accepted as soon as the high time reaches the threshold,
+# and rejected when the window closes without it. Short static spikes never add up to
+# enough high time. A clean press is accepted after ~50 ms instead of 200 ms.
+
+import time
+import heapq
+import logging
+from threading import Thread, Condition
+
+log = logging.getLogger("mp4museum.input")
+
+WINDOW_MS = 200  # Same span the old 200 x 1 ms sampling loop covered
+MIN_HIGH_RATIO = 0.25  # The old loop accepted > 50 of 200 samples
+
+
+class _PinState:
+    __slots__ = ("level", "since", "start", "high", "last_press")
+
+    def __init__(self, level, since):
+        self.level = level
+        self.since = since
+        self.start = None  # Start of the open window (rising edge), None when idle
+        self.high = 0.0  # High time inside the open window up to `since`
+        self.last_press = None
+
+
+class MajorityFilter:
+    """Non-blocking majority-vote filter: on_press(pin, edge time) for presses that hold"""
+
+    def __init__(self, on_press, window_ms=WINDOW_MS, min_high_ratio=MIN_HIGH_RATIO,
+                 holdoff_ms=0, clock=time.monotonic, timer=True):
+        self.on_press = on_press
+        self.window = window_ms / 1000.0
+        self.need = self.window * min_high_ratio
+        # Per-pin dead time after an accepted press (what bouncetime= used to do), int or {pin: ms}
+        self.holdoff = holdoff_ms
+        self.clock = clock
+        self.cond = Condition()
+        self.pins = {}
+        self.checks = []  # heap of (time, pin) when a window must be looked at
+        self.accepted = 0
+        self.rejected = 0
+        if timer:
+            Thread(target=self._timer_loop, daemon=True, name="InputFilter").start()
+
+    def _holdoff(self, pin):
+        ms = self.holdoff.get(pin, 0) if isinstance(self.holdoff, dict) else self.holdoff
+        return ms / 1000.0
+
+    def watch(self, gpio, pin):
+        """Register pin for both edges; the callback reads the level and returns at once"""
+        gpio.add_event_detect(pin, gpio.BOTH, callback=lambda channel: self.edge(channel, gpio.input(channel)))
+
+    def edge(self, pin, level, timestamp=None):
+        """Record a level change - O(1), safe in the GPIO callback thread"""
+        now = self.clock() if timestamp is None else timestamp
+        level = 1 if level else 0
+        with self.cond:
+            state = self.pins.get(pin)
+            if state is None:
+                state = self.pins[pin] = _PinState(0, now)
+            self._accumulate(state, now)
+            state.level = level
+            state.since = now
+            if level and state.start is None:
+                holdoff = self._holdoff(pin)
+                if state.last_press is None or now - state.last_press >= holdoff:
+                    state.start = now
+                    state.high = 0.0
+                    heapq.heappush(self.checks, (now + self.need, pin))
+                    self.cond.notify()
+
+    def _accumulate(self, state, now):
+        """Add the high time between state.since and now that lies inside the open window"""
+        if state.start is None or not state.level:
+            return
+        end = min(now, state.start + self.window)
+        begin = max(state.since, state.start)
+        if end > begin:
+            state.high += end - begin
+
+    def evaluate(self, now=None):
+        """Decide every window due by now; returns the accepted (pin, press time) list"""
+        now = self.clock() if now is None else now
+        accepted = []
+        with self.cond:
+            while self.checks and self.checks[0][0] <= now:
+                due, pin = heapq.heappop(self.checks)
+                state = self.pins[pin]
+                if state.start is None:
+                    continue
+                high = state.high
+                if state.level:
+                    high += max(0.0, min(due, state.start + self.window) - max(state.since, state.start))
+                end = state.start + self.window
+                if high >= self.need - 1e-9:
+                    accepted.append((pin, state.start))
+                    state.last_press = state.start
+                    state.start = None
+                    self.accepted += 1
+                elif due >= end:
+                    state.start = None
+                    self.rejected += 1
+                else:
+                    # Earliest moment the threshold could still be reached
+                    heapq.heappush(self.checks, (min(end, due + self.need - high), pin))
+        for pin, pressed_at in accepted:
+            self.on_press(pin, pressed_at)
+        return accepted
+
+    def _timer_loop(self):
+        while True:
+            with self.cond:
+                while not self.checks:
+                    self.cond.wait()
+                delay = self.checks[0][0] - self.clock()
+                if delay > 0:
+                    self.cond.wait(delay)
+                    continue
+            try:
+                self.evaluate()
+            except Exception as e:
+                log.error(f"❌ Input filter callback failed: {e}")
@@ -0,0 +1,367 @@
+# mp4museum - persistent media library index
+# Keeps collections and their files (size, mtime, duration) in one JSON file so the
+# player never has to glob big USB drives again. Updates come from inotify when the
+# kernel supports it, otherwise from a cheap directory-mtime rescan.
+
+import os
+import logging
+import time
+import struct
+import select
+import ctypes
+import ctypes.util
+from threading import Thread, Event, Lock
+
+from state_store import state_path, load_json, save_json
+
+log = logging.getLogger("mp4museum.library")
+
+INDEX_VERSION = 2  # 2: durations filled in by media_probe
+POLL_INTERVAL = 30  # Seconds between mtime checks when inotify is not available
+SETTLE_TIME = 0.5  # Coalesce bursts of inotify events (file copies) into one rescan
+
+# inotify constants from <sys/inotify.h>
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+              IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_libc():
+    """Return libc with the inotify calls, or None on platforms without them"""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1  # Raises AttributeError when missing (macOS dev machines)
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+def scan_dir(path):
+    """One scandir pass: returns (subdirectory names, {file name: [size, mtime]})"""
+    subdirs = []
+    files = {}
+    with os.scandir(path) as entries:
+        for entry in entries:
+            # Skip hidden files/directories - often macOS metadata on USB drives
+            if entry.name.startswith('.'):
+                continue
+            try:
+                if entry.is_dir():
+                    subdirs.append(entry.name)
+                elif entry.is_file() and '.' in entry.name:
+                    st = entry.stat()
+                    files[entry.name] = [st.st_size, st.st_mtime]
+            except OSError:
+                continue  # Vanished while scanning
+    return sorted(subdirs), files
+
+
+class LibraryIndex:
+    """Collections (sub-directories of the media roots) and the files inside them"""
+
+    def __init__(self, roots, path=None, probe=None):
+        self.roots = [os.path.normpath(r) for r in roots]
+        self.path = path or state_path("library.json")
+        self.probe = probe  # Optional callable(path) -> duration in seconds
+        self.lock = Lock()
+        self.stop_event = Event()
+        self.watch_thread = None
+        self.mode = "none"
+        # dir path -> {"mtime": float, "subdirs": [...], "files": {name: [size, mtime, duration]}}
+        self.dirs = {}
+        self.sorted_files = {}  # dir path -> sorted full paths, rebuilt on change only
+        self.dirty = False
+        self.listeners = []  # callable(dir path) after a directory was rescanned (watcher thread)
+
+    # ---- persistence -------------------------------------------------------
+
+    def load(self):
+        """Load the saved index in one read, then bring changed directories up to date"""
+        data = load_json(self.path)
+        if data and data.get("version") == INDEX_VERSION:
+            with self.lock:
+                self.dirs = data.get("dirs", {})
+                self.sorted_files = {}
+            log.info(f"📚 Library index loaded: {len(self.dirs)} directories from {self.path}")
+        else:
+            log.info("📚 No usable library index yet - building one")
+        self.refresh()
+        return self
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            # Shallow copy: a rescan on another thread may add directories while this is written
+            # (the per-directory dicts are replaced, never changed in place)
+            data = {"version": INDEX_VERSION, "saved": time.time(), "dirs": dict(self.dirs)}
+            self.dirty = False
+        save_json(self.path, data)
+
+    # ---- queries -----------------------------------------------------------
+
+    def collections(self, root):
+        """Sorted full paths of the collection directories under a root"""
+        root = os.path.normpath(root)
+        with self.lock:
+            info = self.dirs.get(root)
+        if info is None:
+            info = self._rescan(root)
+        if not info:
+            return []
+        return [os.path.join(root, name) for name in info["subdirs"]]
+
+    def files(self, collection_path):
+        """Sorted full paths of the playable files in a collection"""
+        collection_path = os.path.normpath(collection_path)
+        with self.lock:
+            cached = self.sorted_files.get(collection_path)
+            if cached is not None:
+                return cached
+            known = collection_path in self.dirs
+        if not known:
+            self._rescan(collection_path)  # First request for a directory outside the roots
+        with self.lock:
+            info = self.dirs.get(collection_path)
+            if not info:
+                return []
+            result = [os.path.join(collection_path, name) for name in sorted(info["files"])]
+            self.sorted_files[collection_path] = result
+            return result
+
+    def entry(self, file_path):
+        """(size, mtime, duration) for an indexed file, or None"""
+        directory, name = os.path.split(os.path.normpath(file_path))
+        with self.lock:
+            info = self.dirs.get(directory)
+            if info and name in info["files"]:
+                return tuple(info["files"][name])
+        return None
+
+    # ---- updates -----------------------------------------------------------
+
+    def _rescan(self, path):
+        """Re-read one directory, keeping durations of files that did not change"""
+        try:
+            dir_mtime = os.stat(path).st_mtime
+            subdirs, files = scan_dir(path)
+        except OSError:
+            with self.lock:
+                if self.dirs.pop(path, None) is not None:
+                    self.sorted_files.pop(path, None)
+                    self.dirty = True
+            return None
+
+        with self.lock:
+            old_files = self.dirs.get(path, {}).get("files", {})
+        for name, stat in files.items():
+            old = old_files.get(name)
+            if old and old[0] == stat[0] and old[1] == stat[1]:
+                stat.append(old[2])  # Unchanged - keep the known duration
+            else:
+                stat.append(self._probe(os.path.join(path, name)))
+
+        info = {"mtime": dir_mtime, "subdirs": subdirs, "files": files}
+        with self.lock:
+            self.dirs[path] = info
+            self.sorted_files.pop(path, None)
+            self.dirty = True
+        for listener in self.listeners:
+            listener(path)
+        return info
+
+    def fill_durations(self):
+        """Probe the files that have no duration yet (after a listing-only load); returns how many got one"""
+        with self.lock:
+            paths = list(self.dirs)
+        filled = 0
+        for path in paths:
+            with self.lock:
+                info = self.dirs.get(path)
+            if not info:
+                continue
+            files = {name: list(entry) for name, entry in info["files"].items()}
+            found = 0
+            for name, entry in files.items():
+                if entry[2] is None:
+                    entry[2] = self._probe(os.path.join(path, name))
+                    found += entry[2] is not None
+            if not found:
+                continue  # Images and other non-video files stay None
+            with self.lock:
+                if self.dirs.get(path) is not info:
+                    continue  # Rescanned meanwhile - that rescan probed with the hook set
+                self.dirs[path] = dict(info, files=files)  # Replaced, never changed in place
+                self.dirty = True
+            filled += found
+            for listener in self.listeners:
+                listener(path)
+        if filled:
+            log.info(f"📚 Library index: {filled} durations filled in")
+        self.save()
+        return filled
+
+    def _probe(self, file_path):
+        if self.probe is None:
+            return None
+        try:
+            return self.probe(file_path)
+        except Exception as e:
+            log.warning(f"⚠️ Could not probe {file_path}: {e}")
+            return None
+
+    def _tracked_dirs(self):
+        """Roots plus every collection directory below them"""
+        paths = []
+        for root in self.roots:
+            paths.append(root)
+            paths.extend(self.collections_if_known(root))
+        return paths
+
+    def refresh(self):
+        """Cheap mtime-based rescan: one stat per directory, rescan only what changed"""
+        changed = 0
+        live = set(self.roots)
+        for root in self.roots:
+            if self._changed(root):
+                self._rescan(root)
+                changed += 1
+            for path in self.collections_if_known(root):
+                live.add(path)
+                if self._changed(path):
+                    self._rescan(path)
+                    changed += 1
+        with self.lock:
+            # Forget collections that disappeared from their root
+            for path in list(self.dirs):
+                if os.path.dirname(path) in self.roots and path not in live:
+                    del self.dirs[path]
+                    self.sorted_files.pop(path, None)
+                    self.dirty = True
+        if changed:
+            log.info(f"📚 Library index refreshed {changed} directories")
+        self.save()
+        return changed
+
+    def collections_if_known(self, root):
+        with self.lock:
+            info = self.dirs.get(root)
+        return [os.path.join(root, name) for name in info["subdirs"]] if info else []
+
+    def _changed(self, path):
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            with self.lock:
+                return path in self.dirs  # Gone - rescan drops it
+        with self.lock:
+            info = self.dirs.get(path)
+        return info is None or info["mtime"] != mtime
+
+    # ---- watching ----------------------------------------------------------
+
+    def start_watching(self):
+        """Keep the index current in a background thread (inotify, or mtime polling)"""
+        libc = _load_libc()
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC) if libc else -1
+        if fd < 0:
+            self.mode = "poll"
+            log.info(f"📚 inotify unavailable - polling directory mtimes every {POLL_INTERVAL}s")
+            self.watch_thread = Thread(target=self._poll_loop, daemon=True, name="LibraryPoll")
+        else:
+            self.mode = "inotify"
+            log.info("📚 Watching media directories with inotify")
+            self.watch_thread = Thread(target=self._inotify_loop, args=(libc, fd),
+                                       daemon=True, name="LibraryWatch")
+        self.watch_thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        self.save()
+
+    def _poll_loop(self):
+        while not self.stop_event.wait(POLL_INTERVAL):
+            try:
+                self.refresh()
+            except Exception as e:
+                log.warning(f"⚠️ Library refresh failed: {e}")
+
+    def _inotify_loop(self, libc, fd):
+        watches = {}  # wd -> directory path
+
+        def add_watches():
+            watched = set(watches.values())
+            for path in self._tracked_dirs():
+                if path in watched or not os.path.isdir(path):
+                    continue
+                wd = libc.inotify_add_watch(fd, path.encode(), WATCH_MASK)
+                if wd >= 0:
+                    watches[wd] = path
+
+        pending = set()
+        last_event = 0.0
+        last_root_check = time.monotonic()
+        add_watches()
+        try:
+            while not self.stop_event.is_set():
+                timeout = SETTLE_TIME if pending else POLL_INTERVAL
+                readable, _, _ = select.select([fd], [], [], timeout)
+                now = time.monotonic()
+                if readable:
+                    try:
+                        buf = os.read(fd, 64 * 1024)
+                    except BlockingIOError:
+                        buf = b""
+                    offset = 0
+                    while offset + EVENT_HEADER.size <= len(buf):
+                        wd, mask, _cookie, length = EVENT_HEADER.unpack_from(buf, offset)
+                        offset += EVENT_HEADER.size + length
+                        if mask & IN_Q_OVERFLOW:
+                            pending.update(self._tracked_dirs())
+                            continue
+                        path = watches.get(wd)
+                        if path is None:
+                            continue
+                        if mask & IN_IGNORED:
+                            del watches[wd]  # Directory removed or drive unmounted
+                        pending.add(path)
+                    last_event = now
+                    continue
+
+                if pending and now - last_event >= SETTLE_TIME:
+                    # Overwritten files do not touch the directory mtime, so rescan
+                    # collections explicitly; refresh() then handles roots and new folders
+                    for path in pending:
+                        if path not in self.roots:
+                            self._rescan(path)
+                    pending.clear()
+                    self.refresh()
+                    add_watches()
+                    last_root_check = now
+
+                # Roots that appear later (USB drive mounted after boot)
+                if now - last_root_check >= POLL_INTERVAL:
+                    last_root_check = now
+                    if self.refresh():
+                        add_watches()
+        except Exception as e:
+            log.warning(f"⚠️ inotify watcher stopped: {e} - falling back to polling")
+            self.mode = "poll"
+            self._poll_loop()
+        finally:
+            os.close(fd)
@@ -0,0 +1,400 @@
+# mp4museum - container header probe (duration, resolution, codec) without a player
+# Reads only the headers (seek + read, never the whole file), so a 4 GB clip costs a few reads
+# and nothing needs to fit in a 32-bit address space:
+#   MP4/MOV  moov/mvhd (duration), trak/mdia/hdlr (video track), stsd (codec, size,
+#            avcC/hvcC profile). mdat is skipped by its size, wherever moov is.
+#   MKV/WebM EBML header, Segment/Info (TimecodeScale, Duration) and Tracks (CodecID,
+#            PixelWidth/Height, CodecPrivate profile). Stops at the first Cluster.
+# Results are cached by (path, size, mtime) and can be kept in ~/.mp4museum/media_probe.json.
+# hw_decode says whether the Pi's video decoder takes the stream (H.264 up to 1080p).
+
+import os
+import struct
+import logging
+from threading import Lock
+
+from state_store import state_path, load_json, save_json
+
+log = logging.getLogger("mp4museum.probe")
+
+PROBE_VERSION = 1
+MAX_HEADER_BOX = 64 * 1024 * 1024  # moov bigger than this is a damaged file, not a header
+MKV_HEADER_BYTES = 1024 * 1024  # Info and Tracks come before the first Cluster, well inside this
+
+# Hardware decoder limits (codec -> max width, height); HEVC needs a Pi 4 and is left to VLC
+HW_DECODE = {"h264": (1920, 1088)}
+HW_UNSUPPORTED_PROFILES = {"high10", "high422", "high444"}  # 8-bit 4:2:0 only
+
+MP4_CODECS = {
+    b"avc1": "h264", b"avc3": "h264", b"hvc1": "hevc", b"hev1": "hevc",
+    b"mp4v": "mpeg4", b"av01": "av1", b"vp09": "vp9", b"mjpa": "mjpeg", b"jpeg": "mjpeg",
+    b"apch": "prores", b"apcn": "prores", b"apcs": "prores", b"apco": "prores", b"ap4h": "prores",
+}
+MKV_CODECS = {
+    "V_MPEG4/ISO/AVC": "h264", "V_MPEGH/ISO/HEVC": "hevc", "V_VP8": "vp8", "V_VP9": "vp9",
+    "V_AV1": "av1", "V_MPEG4/ISO/ASP": "mpeg4", "V_MPEG2": "mpeg2", "V_MJPEG": "mjpeg",
+}
+H264_PROFILES = {66: "baseline", 77: "main", 88: "extended", 100: "high", 110: "high10",
+                 122: "high422", 244: "high444"}
+HEVC_PROFILES = {1: "main", 2: "main10", 3: "mainstillpicture", 4: "rext"}
+
+# MP4 boxes that only hold other boxes, on the way to stsd
+MP4_CONTAINERS = {b"trak", b"mdia", b"minf", b"stbl"}
+
+# Matroska element IDs (with their length marker bits, as written in the file)
+EBML_HEADER = 0x1A45DFA3
+EBML_DOCTYPE = 0x4282
+MKV_SEGMENT = 0x18538067
+MKV_INFO = 0x1549A966
+MKV_TIMECODE_SCALE = 0x2AD7B1
+MKV_DURATION = 0x4489
+MKV_TRACKS = 0x1654AE6B
+MKV_TRACK_ENTRY = 0xAE
+MKV_TRACK_TYPE = 0x83
+MKV_CODEC_ID = 0x86
+MKV_CODEC_PRIVATE = 0x63A2
+MKV_VIDEO = 0xE0
+MKV_PIXEL_WIDTH = 0xB0
+MKV_PIXEL_HEIGHT = 0xBA
+MKV_CLUSTER = 0x1F43B675
+
+
+class MediaInfo:
+    __slots__ = ("container", "duration", "width", "height", "codec", "profile", "level")
+
+    def __init__(self, container, duration=None, width=None, height=None, codec=None,
+                 profile=None, level=None):
+        self.container = container
+        self.duration = duration  # Seconds
+        self.width = width
+        self.height = height
+        self.codec = codec
+        self.profile = profile
+        self.level = level  # e.g. 4.1 for H.264 level 41
+
+    @property
+    def hw_decode(self):
+        limit = HW_DECODE.get(self.codec)
+        if not limit or not self.width or not self.height:
+            return False
+        if self.profile in HW_UNSUPPORTED_PROFILES:
+            return False
+        return self.width <= limit[0] and self.height <= limit[1]
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["hw_decode"] = self.hw_decode
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(*(data.get(name) for name in cls.__slots__))
+
+
+class ProbeError(ValueError):
+    """The file is not a container this module understands, or its header is damaged"""
+
+
+# ---- MP4 / MOV -------------------------------------------------------------
+
+def _boxes(buf, start, end):
+    """(type, payload start, box end) for each box in buf[start:end]"""
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", buf, pos)
+        header = 8
+        if size == 1:
+            if pos + 16 > end:
+                return
+            size = struct.unpack_from(">Q", buf, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos  # Runs to the end of the file / parent
+        if size < header:
+            raise ProbeError(f"bad box size {size} at {pos}")
+        yield kind, pos + header, min(pos + size, end)
+        pos += size
+
+
+def _parse_avcc(buf, start, end):
+    if end - start < 4:
+        return None, None
+    profile, level = buf[start + 1], buf[start + 3]
+    return H264_PROFILES.get(profile, str(profile)), level / 10
+
+
+def _parse_hvcc(buf, start, end):
+    if end - start < 13:
+        return None, None
+    profile = buf[start + 1] & 0x1F
+    return HEVC_PROFILES.get(profile, str(profile)), buf[start + 12] / 30
+
+
+def _parse_stsd(buf, start, end, info):
+    # FullBox header (4) + entry count (4), then the first sample entry
+    for kind, entry_start, entry_end in _boxes(buf, start + 8, end):
+        info.codec = MP4_CODECS.get(kind, kind.decode("latin-1").strip())
+        # VisualSampleEntry: 6 reserved, 2 data ref, 16 pre-defined/reserved, then width, height
+        if entry_end - entry_start >= 28:
+            info.width, info.height = struct.unpack_from(">HH", buf, entry_start + 24)
+        # Codec configuration boxes follow the 78-byte VisualSampleEntry fields
+        for child, child_start, child_end in _boxes(buf, entry_start + 78, entry_end):
+            if child == b"avcC":
+                info.profile, info.level = _parse_avcc(buf, child_start, child_end)
+            elif child == b"hvcC":
+                info.profile, info.level = _parse_hvcc(buf, child_start, child_end)
+        return
+
+
+def _is_video_trak(buf, start, end):
+    for kind, box_start, box_end in _boxes(buf, start, end):
+        if kind == b"mdia":
+            for child, child_start, _ in _boxes(buf, box_start, box_end):
+                if child == b"hdlr":
+                    return buf[child_start + 8:child_start + 12] == b"vide"
+    return False
+
+
+def _walk_video(buf, start, end, info):
+    for kind, box_start, box_end in _boxes(buf, start, end):
+        if kind == b"stsd":
+            _parse_stsd(buf, box_start, box_end, info)
+        elif kind in MP4_CONTAINERS:
+            _walk_video(buf, box_start, box_end, info)
+
+
+def _file_boxes(f, file_size):
+    """_boxes() over the top level of an open file, reading only the box headers"""
+    pos = 0
+    while pos + 8 <= file_size:
+        f.seek(pos)
+        header = f.read(16)
+        size, kind = struct.unpack_from(">I4s", header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - pos
+        if size < header_size:
+            raise ProbeError(f"bad box size {size} at {pos}")
+        yield kind, pos + header_size, min(pos + size, file_size)
+        pos += size
+
+
+def _probe_mp4(f, file_size):
+    info = MediaInfo("mp4")
+    buf = None
+    for kind, start, end in _file_boxes(f, file_size):
+        if kind == b"ftyp":
+            f.seek(start)
+            if f.read(2) == b"qt":
+                info.container = "mov"
+        elif kind == b"moov":
+            if end - start > MAX_HEADER_BOX:
+                raise ProbeError("moov box too large")
+            f.seek(start)
+            buf = f.read(end - start)  # Everything needed is in here; mdat is skipped by its size
+            break
+    if buf is None:
+        raise ProbeError("no moov box")
+
+    for kind, start, end in _boxes(buf, 0, len(buf)):
+        if kind == b"mvhd":
+            if buf[start] == 1:
+                timescale, duration = struct.unpack_from(">IQ", buf, start + 20)
+            else:
+                timescale, duration = struct.unpack_from(">II", buf, start + 12)
+            if timescale:
+                info.duration = round(duration / timescale, 3)
+        elif kind == b"trak" and info.codec is None and _is_video_trak(buf, start, end):
+            _walk_video(buf, start, end, info)
+    return info
+
+
+# ---- Matroska / WebM -------------------------------------------------------
+
+def _vint(buf, pos, keep_marker):
+    """(value, length) of an EBML variable-length integer; value None = unknown size"""
+    first = buf[pos]
+    if first == 0:
+        raise ProbeError(f"bad EBML vint at {pos}")
+    length = 8 - first.bit_length() + 1
+    value = first if keep_marker else first & (0xFF >> length)
+    for i in range(1, length):
+        value = (value << 8) | buf[pos + i]
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        return None, length  # All ones: size unknown (live streams)
+    return value, length
+
+
+def _elements(buf, start, end):
+    """(id, data start, data end) for each EBML element in buf[start:end]"""
+    pos = start
+    while pos < end:
+        element_id, id_length = _vint(buf, pos, True)
+        size, size_length = _vint(buf, pos + id_length, False)
+        data_start = pos + id_length + size_length
+        data_end = end if size is None else min(data_start + size, end)
+        yield element_id, data_start, data_end
+        pos = data_end
+
+
+def _uint(buf, start, end):
+    return int.from_bytes(buf[start:end], "big")
+
+
+def _probe_mkv(buf):
+    size = len(buf)
+    info = MediaInfo("mkv")
+    segment = None
+    for element_id, start, end in _elements(buf, 0, size):
+        if element_id == EBML_HEADER:
+            for child, child_start, child_end in _elements(buf, start, end):
+                if child == EBML_DOCTYPE and bytes(buf[child_start:child_end]).rstrip(b"\0") == b"webm":
+                    info.container = "webm"
+        elif element_id == MKV_SEGMENT:
+            segment = (start, end)
+            break
+    if segment is None:
+        raise ProbeError("no Segment element")
+
+    try:
+        _mkv_header(buf, segment, info)
+    except IndexError:
+        if len(buf) < MKV_HEADER_BYTES:
+            raise  # The file itself is cut short
+        # Else an element runs past the bytes read - keep what came before it
+    return info
+
+
+def _mkv_header(buf, segment, info):
+    """Info and Tracks of the Segment into info; fields found stay set if a later element is cut off"""
+    seen_info = seen_tracks = False
+    for element_id, start, end in _elements(buf, *segment):
+        if element_id == MKV_INFO:
+            seen_info = True
+            timecode_scale = 1000000  # Nanoseconds per tick, the default
+            duration = None
+            for child, child_start, child_end in _elements(buf, start, end):
+                if child == MKV_TIMECODE_SCALE:
+                    timecode_scale = _uint(buf, child_start, child_end)
+                elif child == MKV_DURATION:
+                    fmt = ">f" if child_end - child_start == 4 else ">d"
+                    duration = struct.unpack_from(fmt, buf, child_start)[0]
+            if duration is not None:
+                info.duration = round(duration * timecode_scale / 1e9, 3)
+        elif element_id == MKV_TRACKS:
+            seen_tracks = True
+            for entry, entry_start, entry_end in _elements(buf, start, end):
+                if entry == MKV_TRACK_ENTRY and _mkv_video_track(buf, entry_start, entry_end, info):
+                    break
+        elif element_id == MKV_CLUSTER:
+            break  # Media data starts here; the header elements come before it
+        if seen_info and seen_tracks:
+            break
+
+
+def _mkv_video_track(buf, start, end, info):
+    fields = {}
+    for child, child_start, child_end in _elements(buf, start, end):
+        fields[child] = (child_start, child_end)
+    if MKV_TRACK_TYPE not in fields or _uint(buf, *fields[MKV_TRACK_TYPE]) != 1:
+        return False
+    if MKV_CODEC_ID in fields:
+        codec_id = bytes(buf[slice(*fields[MKV_CODEC_ID])]).rstrip(b"\0").decode("ascii", "replace")
+        info.codec = MKV_CODECS.get(codec_id, codec_id)
+    if MKV_VIDEO in fields:
+        for child, child_start, child_end in _elements(buf, *fields[MKV_VIDEO]):
+            if child == MKV_PIXEL_WIDTH:
+                info.width = _uint(buf, child_start, child_end)
+            elif child == MKV_PIXEL_HEIGHT:
+                info.height = _uint(buf, child_start, child_end)
+    if MKV_CODEC_PRIVATE in fields:
+        if info.codec == "h264":
+            info.profile, info.level = _parse_avcc(buf, *fields[MKV_CODEC_PRIVATE])
+        elif info.codec == "hevc":
+            info.profile, info.level = _parse_hvcc(buf, *fields[MKV_CODEC_PRIVATE])
+    return True
+
+
+# ---- entry points ----------------------------------------------------------
+
+def probe(file_path):
+    """MediaInfo for an MP4/MOV/MKV/WebM file; raises ProbeError for anything else"""
+    with open(file_path, "rb") as f:
+        file_size = os.fstat(f.fileno()).st_size
+        if not file_size:
+            raise ProbeError("empty file")
+        head = f.read(8)
+        try:
+            if head[:4] == b"\x1a\x45\xdf\xa3":
+                f.seek(0)
+                return _probe_mkv(f.read(MKV_HEADER_BYTES))
+            if head[4:8] in (b"ftyp", b"moov", b"mdat", b"free", b"wide", b"skip"):
+                return _probe_mp4(f, file_size)
+            raise ProbeError("not an MP4/MOV/MKV file")
+        except (IndexError, struct.error) as e:
+            raise ProbeError(f"truncated header: {e}")
+
+
+class MediaProbe:
+    """probe() with a cache keyed by (path, size, mtime), optionally kept in the state directory"""
+
+    def __init__(self, path=None):
+        self.path = path  # None = memory only
+        self.lock = Lock()
+        self.cache = {}  # file path -> [size, mtime, info dict or None]
+        self.dirty = False
+        self.warned = set()  # Files already reported as not hardware-decodable
+        if path:
+            data = load_json(path)
+            if data and data.get("version") == PROBE_VERSION:
+                self.cache = data.get("files", {})
+
+    def info(self, file_path):
+        """MediaInfo, or None for files that are not video containers (images, damaged clips)"""
+        st = os.stat(file_path)
+        with self.lock:
+            cached = self.cache.get(file_path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime:
+            return MediaInfo.from_dict(cached[2]) if cached[2] else None
+        try:
+            result = probe(file_path)
+        except ProbeError as e:
+            log.debug(f"🔍 No media info for {file_path}: {e}")
+            result = None
+        with self.lock:
+            self.cache[file_path] = [st.st_size, st.st_mtime, result.to_dict() if result else None]
+            self.dirty = True
+        return result
+
+    def describe(self, file_path):
+        """info() for the clip about to play (None if unreadable); warns once per file the Pi cannot hardware-decode"""
+        try:
+            result = self.info(file_path)
+        except OSError:
+            return None
+        if result and result.codec and not result.hw_decode and file_path not in self.warned:
+            self.warned.add(file_path)  # Once per file, not on every pass through the playlist
+            log.warning(f"⚠️ {os.path.basename(file_path)} is {result.codec} {result.profile or ''} "
+                        f"{result.width}x{result.height} - not hardware-decodable")
+        return result
+
+    def duration(self, file_path):
+        """Duration in seconds or None - the LibraryIndex / ManifestStore probe hook"""
+        result = self.info(file_path)
+        return result.duration if result else None
+
+    def save(self):
+        with self.lock:
+            if not self.path or not self.dirty:
+                return
+            data = {"version": PROBE_VERSION, "files": dict(self.cache)}
+            self.dirty = False
+        save_json(self.path, data)
+
+
+def default_probe():
+    """MediaProbe persisted in ~/.mp4museum/media_probe.json"""
+    return MediaProbe(state_path("media_probe.json"))
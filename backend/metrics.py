@@ -0,0 +1,139 @@
+# mp4museum - Prometheus-style metrics for the player backends
+# Plain counters, histograms and gauges rendered in the Prometheus text format on /metrics,
+# so start latency, gaps between clips and process health can be compared across players
+# before and after a change. No client library needed - this is all stdlib.
+
+import os
+import time
+import threading
+from threading import Lock
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; the Pi takes anywhere from a few ms (preloaded VLC media) to seconds (omxplayer spawn)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+GAP_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0)
+
+_registry = []  # Every metric in creation order - rendered in that order
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count; set_function() reads it from an existing counter at scrape time"""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.lock = Lock()
+        self.value = 0
+        self.func = None
+        _registry.append(self)
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def set_function(self, func):
+        self.func = func
+
+    def get(self):
+        return self.func() if self.func else self.value
+
+    def samples(self):
+        yield self.name, self.get()
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def set(self, value):
+        with self.lock:
+            self.value = value
+
+
+class Histogram:
+    """Cumulative buckets plus sum and count, as Prometheus expects"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.lock = Lock()
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+        _registry.append(self)
+
+    def observe(self, value):
+        with self.lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+            self.sum += value
+            self.count += 1
+
+    def samples(self):
+        with self.lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            yield f'{self.name}_bucket{{le="{_format_value(float(bound))}"}}', cumulative
+        yield f'{self.name}_bucket{{le="+Inf"}}', count
+        yield f"{self.name}_sum", total
+        yield f"{self.name}_count", count
+
+
+def _rss_bytes():
+    """Resident set size from /proc (Linux only, 0 elsewhere)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+# Playback - shared names so both backends show up on the same dashboards
+CLIPS_PLAYED = Counter("mp4museum_clips_played_total", "Clips handed to the player")
+SKIPS = Counter("mp4museum_skips_total", "Clips skipped via /next")
+FAILURES = Counter("mp4museum_failures_total", "Clips that failed to play")
+PLAYER_KILLS = Counter("mp4museum_player_kills_total", "Player processes that had to be SIGKILLed")
+CLIP_START = Histogram("mp4museum_clip_start_seconds",
+                       "Time from starting a clip to its first frame / Playing state")
+INTER_CLIP_GAP = Histogram("mp4museum_inter_clip_gap_seconds",
+                           "Time from the end of one clip to the first frame of the next", GAP_BUCKETS)
+COLLECTION_SWITCH = Histogram("mp4museum_collection_switch_seconds",
+                              "Time from /set_collection to the first frame of the new collection")
+
+# Process health
+THREADS = Gauge("mp4museum_threads", "Live Python threads")
+THREADS.set_function(threading.active_count)
+RSS = Gauge("process_resident_memory_bytes", "Resident memory size in bytes")
+RSS.set_function(_rss_bytes)
+CPU = Counter("process_cpu_seconds_total", "User and system CPU time in seconds")
+CPU.set_function(time.process_time)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, value in metric.samples():
+            lines.append(f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
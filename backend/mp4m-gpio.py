@@ -1,7 +1,11 @@
-import time
 import vlc
 import os
 import RPi.GPIO as GPIO
+from clip_controller import ClipController
+from gpio_input import EdgeInput
+from museum_log import setup_logging
+
+log = setup_logging("gpio")
 
 # install notes:
 # connect to mp4museum via ssh user pi password mp4museum 
@@ -14,8 +18,13 @@ import RPi.GPIO as GPIO
 
 # Press GPIO pin 22 to stop playback, GPIO pin 23 to toggle pause/play.
 # Press GPIO pins 13, 14... to play corresponding videos.
-# change pins as needed, both in the event handler and the pin setup
+# change pins as needed in STOP_PIN / PAUSE_PIN and gpio_map
+
 
+# Warm start: parse every mapped clip at startup and keep the first PIN_MB of each file
+# in RAM, so a press does not wait for the SD card (PIN_MB = 0 only pre-parses)
+PREWARM = True
+PIN_MB = 8
 
 # Read audio device config
 audiodevice = "0"
@@ -24,45 +33,8 @@ if os.path.isfile('/boot/alsa.txt'):
     with open('/boot/alsa.txt', 'r') as f:
         audiodevice = f.read(1)
 
-# Play media
-def vlc_play(source):
-    if ".loop." in source:
-        vlc_instance = vlc.Instance('--input-repeat=999999999 -q -A alsa --alsa-audio-device hw:' + audiodevice)
-    else:
-        vlc_instance = vlc.Instance('-q -A alsa --alsa-audio-device hw:' + audiodevice)
-    
-    global player
-    player = vlc_instance.media_player_new()
-    media = vlc_instance.media_new(source)
-    player.set_media(media)
-    player.play()
-    time.sleep(1)
-    
-    # Wait for the media to finish playing
-    while player.get_state() in (vlc.State.Playing, vlc.State.Paused):
-        handle_gpio_event()
-        time.sleep(0.1)
-    
-    media.release()
-    player.release()
-
-# Universal function to handle GPIO events
-def handle_gpio_event():
-    global player
-    if GPIO.input(22):
-        if player.is_playing() or player.is_paused():
-            player.stop()
-    elif GPIO.input(23):
-        if player.is_playing():
-            player.pause()
-        else:
-            player.play()
-            print("Playback resumed.")
-    else:
-        # Check if the GPIO pin is in the gpio_map
-        for pin, video in gpio_map.items():
-            if GPIO.input(pin):
-                vlc_play(video)
+STOP_PIN = 22
+PAUSE_PIN = 23
 
 # Map GPIO pins to video files
 gpio_map = {
@@ -72,21 +44,35 @@ gpio_map = {
     # The files shall be in the same directory as the script: /home/pi
 }
 
+# One player, driven by one controller thread; button callbacks only enqueue commands
+controller = ClipController(vlc.Instance('-q -A alsa --alsa-audio-device hw:' + audiodevice))
+if PREWARM:
+    controller.prewarm(gpio_map.values(), pin_mb=PIN_MB)
+
+# Runs in the RPi.GPIO callback thread - must not block
+def handle_press(pin, pressed_at):
+    if pin == STOP_PIN:
+        controller.stop(pressed_at)
+    elif pin == PAUSE_PIN:
+        controller.toggle_pause(pressed_at)
+    elif pin in gpio_map:
+        controller.play(gpio_map[pin], pressed_at)
+
+buttons = EdgeInput(GPIO, [STOP_PIN, PAUSE_PIN] + list(gpio_map), handle_press)
+
 # Set up GPIO
 GPIO.setmode(GPIO.BOARD)
 try:
-    for pin in gpio_map.keys():
-        GPIO.setup(pin, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
-    GPIO.setup(22, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
-    GPIO.setup(23, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
+    controller.start()
+    buttons.start()
 
-    # Main loop
-    running = True
-    while running:
-        handle_gpio_event()
-        time.sleep(0.1)  # Keep the loop running without consuming too much CPU
+    # Nothing to poll - the main thread just waits
+    controller.wait()
 
 except KeyboardInterrupt:
-    print("Exiting...")
+    log.info("Exiting...")
 finally:
+    buttons.stop()
+    controller.close()
+    log.info(f"⏱️ Press to first frame: {controller.latency_stats()}")
     GPIO.cleanup()  # Clean up GPIO settings
@@ -2,6 +2,11 @@ import time
 import vlc
 import os
 import keyboard
+from threading import Event
+from clip_controller import ClipController
+from museum_log import setup_logging
+
+log = setup_logging("keyboard")
 
 # install notes:
 # connect to mp4museum via ssh user pi password mp4museum 
@@ -24,6 +29,11 @@ import keyboard
 # Press 'Q' to exit the program.
 
 
+# Warm start: parse every mapped clip at startup and keep the first PIN_MB of each file
+# in RAM, so a press does not wait for the SD card (PIN_MB = 0 only pre-parses)
+PREWARM = True
+PIN_MB = 8
+
 # Read audio device config
 audiodevice = "0"
 
@@ -31,49 +41,6 @@ if os.path.isfile('/boot/alsa.txt'):
     with open('/boot/alsa.txt', 'r') as f:
         audiodevice = f.read(1)
 
-# Play media
-def vlc_play(source):
-    if ".loop." in source:
-        vlc_instance = vlc.Instance('--input-repeat=999999999 -q -A alsa --alsa-audio-device hw:' + audiodevice)
-    else:
-        vlc_instance = vlc.Instance('-q -A alsa --alsa-audio-device hw:' + audiodevice)
-    
-    global player
-    player = vlc_instance.media_player_new()
-    media = vlc_instance.media_new(source)
-    player.set_media(media)
-    player.play()
-    time.sleep(1)
-    
-    # Wait for the media to finish playing
-    while player.get_state() in (vlc.State.Playing, vlc.State.Paused):
-        handle_key_event(None)  # Pass None as the event object
-        time.sleep(0.1)
-    
-    media.release()
-    player.release()
-
-# Universal function to handle key presses
-def handle_key_event(event):
-    global player
-    if keyboard.is_pressed('esc'):
-        if player.is_playing() or player.is_paused():
-            player.stop()
-    elif keyboard.is_pressed('space'):
-        if player.is_playing():
-            player.pause()
-        else:
-            player.play()
-            print("Playback resumed.")
-    elif keyboard.is_pressed('q'):  # Use 'q' to exit the program
-        global running
-        running = False
-    else:
-        # Check if the key pressed is in the keys array
-        for key, video in key_map.items():
-            if keyboard.is_pressed(key):
-                vlc_play(video)
-
 # Map keys to video files
 key_map = {
     'a': 'video1.mp4',
@@ -83,15 +50,60 @@ key_map = {
     # The files shall be in the same directory as the script: /home/pi
 }
 
-# Set up keyboard listener
-keyboard.on_press(handle_key_event)
+# One persistent player, driven by one controller thread; key events only enqueue commands
+controller = ClipController(vlc.Instance('-q -A alsa --alsa-audio-device hw:' + audiodevice))
+if PREWARM:
+    controller.prewarm(key_map.values(), pin_mb=PIN_MB)
+exit_requested = Event()
+
+def build_dispatch():
+    """scan code -> action, built once, so a key press is a single dict lookup"""
+    actions = {
+        'esc': controller.stop,
+        'space': controller.toggle_pause,
+        'q': lambda pressed_at: exit_requested.set(),  # Use 'q' to exit the program
+    }
+    for key, video in key_map.items():
+        actions[key] = lambda pressed_at, video=video: controller.play(video, pressed_at)
+
+    dispatch = {}
+    for key, action in actions.items():
+        try:
+            for scan_code in keyboard.key_to_scan_codes(key):
+                dispatch[scan_code] = action
+        except ValueError:
+            log.warning(f"⚠️ Key {key!r} is not on this keyboard layout")
+    return dispatch
+
+dispatch = build_dispatch()
+keys_down = set()  # Ignore auto-repeat while a key is held
+
+# Runs in the keyboard library's listener thread - must not block
+def handle_key_event(event):
+    scan_code = event.scan_code
+    if event.event_type == keyboard.KEY_UP:
+        keys_down.discard(scan_code)
+        return
+    if scan_code in keys_down:
+        return
+    keys_down.add(scan_code)
+    action = dispatch.get(scan_code)
+    if action:
+        action(time.monotonic())
+
+# Set up keyboard listener (down and up events)
+keyboard.hook(handle_key_event)
+controller.start()
+log.info(f"⌨️ {len(dispatch)} scan codes mapped")
 
-# Main loop
-running = True
-while running:
-    time.sleep(0.1)  # Keep the loop running without consuming too much CPU
+# Main thread just waits for 'q' or Ctrl+C
+try:
+    exit_requested.wait()
+except KeyboardInterrupt:
+    pass
 
 # Clean up
-if player.is_playing():
-    player.stop()
-print("Program exited.")
\ No newline at end of file
+keyboard.unhook_all()
+controller.close()
+log.info(f"⏱️ Press to first frame: {controller.latency_stats()}")
+log.info("Program exited.")
@@ -2,10 +2,19 @@
 
 # (c) julius schmiedel - http://mp4museum.org
 
-import time, vlc, os, glob
+import time, vlc, os
 import RPi.GPIO as GPIO
-import subprocess
-import random
+from input_filter import MajorityFilter
+from startup import sync_mode
+from sync_engine import run_standalone
+from player_backend import VLCBackend
+import atexit
+from slideshow import Slideshow, read_dwell
+from shuffle_bag import ShuffleBag
+
+# OPTIMIZATION: Queued, rate-limited logging instead of print+flush (same as the other players)
+from museum_log import setup_logging
+log = setup_logging("randomjpg")
 
 # read audio device config
 audiodevice = "0"
@@ -19,25 +28,23 @@ GPIO.setmode(GPIO.BOARD)
 GPIO.setup(11, GPIO.IN, pull_up_down = GPIO.PUD_DOWN)
 GPIO.setup(13, GPIO.IN, pull_up_down = GPIO.PUD_DOWN)
 
-# functions to be called by event listener
-# with code to filter interference / static discharges
+# functions to be called when the input filter accepts a press
+# interference / static discharges are filtered from edge timestamps in input_filter,
+# without sleeping in the GPIO callback thread
 def buttonPause(channel):
-    inputfilter = 0
-    for x in range(0,200):
-        if GPIO.input(11):
-            inputfilter = inputfilter + 1
-        time.sleep(.001)
-    if (inputfilter > 50):
-        player.pause()
+    slideshow.toggle_pause()
 
 def buttonNext(channel):
-    inputfilter = 0
-    for x in range(0,200):
-        if GPIO.input(13):
-            inputfilter = inputfilter + 1
-        time.sleep(.001)
-    if (inputfilter > 50):
-        player.stop()
+    slideshow.next()
+
+def buttonPressed(channel, pressed_at):
+    if channel == 11:
+        buttonPause(channel)
+    elif channel == 13:
+        buttonNext(channel)
+
+# holdoff replaces the bouncetime the edge detection used to have
+buttons = MajorityFilter(buttonPressed, holdoff_ms={11: 234, 13: 1234})
 
 # play media with vlc
 def vlc_play(source):
@@ -58,52 +65,37 @@ def vlc_play(source):
     media.release()
     player.release()
 
-# find a file, and if found, return its path (for sync)
-def search_file(file_name):
-    # Use glob to find files matching the pattern in both directories
-    file_path_media = f'/media/*/{file_name}'
-    file_path_boot = f'/boot/{file_name}'
-    matching_files = glob.glob(file_path_media) + glob.glob(file_path_boot)
-
-    if matching_files:
-        # Return the first found file name
-        return matching_files[0]
-
-    # Return False if the file is not found
-    return False
-
-
 # *** run player ****
 
 
-# start player twice to make sure it is working
-# seems weird but works
-vlc_play("/home/pi/mp4museum-boot.mp4")
+# boot video once - the second "make sure it is working" run only doubled the boot time
 vlc_play("/home/pi/mp4museum-boot.mp4")
 
 # please do not remove my logo screen
 vlc_play("/home/pi/mp4museum.mp4")
 
+# one player for all images, next image decoded and scaled while the current one is shown
+# seconds per image: /boot/slide-duration.txt (default 10)
+slideshow = Slideshow(vlc.Instance('-q --no-video-title-show -A alsa --alsa-audio-device hw:' + audiodevice),
+                      dwell=read_dwell())
+
 # add event listener which reacts to GPIO signal
-GPIO.add_event_detect(11, GPIO.RISING, callback = buttonPause, bouncetime = 234)
-GPIO.add_event_detect(13, GPIO.RISING, callback = buttonNext, bouncetime = 1234)
-
-# check for sync mode instructions
-enableSync = search_file("sync-leader.txt")
-syncFile = search_file("sync.mp4")
-if syncFile and enableSync:
-    print("Sync Mode LEADER:" + syncFile)
-    subprocess.run(["omxplayer-sync", "-u", "-m", syncFile]) 
-
-enableSync = search_file("sync-player.txt")
-syncFile = search_file("sync.mp4")
-if syncFile and enableSync:
-    print("Sync Mode PLAYER:" + syncFile)
-    subprocess.run(["omxplayer-sync", "-u", "-l",  syncFile]) 
+buttons.watch(GPIO, 11)
+buttons.watch(GPIO, 13)
+
+# check for sync mode instructions (one scan of /media/* and /boot)
+# the wall plays sync.mp4 in step with the leader (sync_engine) - this does not return
+mode = sync_mode()
+if mode:
+    log.info(f"🔗 Sync Mode {mode[0].upper()}: {mode[1]}")
+    run_standalone(mode[0], mode[1], VLCBackend(audiodevice))
+
+# random order without near repeats; new/removed images are picked up as they appear
+# and the position survives a restart
+bag = ShuffleBag('/media/internal').load()
+atexit.register(bag.save)
 
 # the loop
 while(1):
-    jpg_files = glob.glob('/media/internal/*.jpg')
-    random.shuffle(jpg_files)
-    for file in jpg_files:
-        vlc_play(file)
+    if not slideshow.run(bag):
+        time.sleep(5)  # no images - do not spin
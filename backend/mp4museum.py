@@ -2,31 +2,84 @@
 # (c) julius schmiedel - http://mp4museum.org4
 import sys
 import os
-import subprocess
 import time
-import vlc
-import glob
 import signal
 import atexit
+from collections import deque
 from threading import Thread, Event, Lock
 
-player = None  # ensure player is initialized
-vlc_instance = None  # Global VLC instance to reuse
+# OPTIMIZATION: Queued, rate-limited logging instead of print+flush on every hot path
+# (set up in main() - importing this module must not touch handlers, devices or threads)
+import logging
+from museum_log import setup_logging
+log = logging.getLogger("mp4museum.mp4museum")
+
+# Player backend (VLC, or the simulator for headless runs and benchmarks), created in start()
+import player_backend
+from player_backend import FINISHED_STATES, ENDED
+backend = None
 running = True  # Global flag to control loops
 playback_finished = Event()  # Event-driven playback control
 
-# Flask API for collection control
-from flask import Flask, jsonify, request
+# OPTIMIZATION: Gapless playback - the next clip is created and pre-parsed while the current one plays
+PRELOAD_NEXT = True
+LOOP_REPEAT = 65535  # VLC's maximum input-repeat; the wait loop restarts the clip after that
+STATE_CHECK_INTERVAL = 2  # Fallback get_state() check in case an event is ever missed
+preloaded_media = None  # (source, media) prepared for the next vlc_play() call
+clip_end_time = None  # monotonic time the previous clip stopped
+current_source = None  # File currently handed to the player
+gap_samples = deque(maxlen=100)  # Recent inter-clip gaps in seconds (end of clip -> first frame)
+clip_requested_at = None  # monotonic time vlc_play() started the current clip, until its first frame
+switch_requested_at = None  # monotonic time of the last /set_collection, until the new collection shows
+
+# OPTIMIZATION: Fast boot - API first, boot video once (gapless into the first collection clip),
+# sync files found in one scan; boot times are reported on /status from the process start
+from startup import sync_mode, process_start_time
+PROCESS_START = process_start_time() or time.time()
+BOOT_VIDEO = os.environ.get("MP4MUSEUM_BOOT_VIDEO", "/home/pi/mp4museum-boot.mp4")  # "" skips it
+startup_times = {}  # Seconds from process start: "api_ready", "first_frame"
+
+# Multi-screen walls: sync.mp4 kept in step over UDP by sync_engine (imported in sync mode only)
+sync = None  # SyncLeader / SyncFollower while in sync mode
+
+# Flask API for collection control - imported by the API thread in create_app(), so loading
+# Flask (the slowest import here) runs alongside VLC start-up instead of before it
+jsonify = request = Response = None
+app = None
 collection_lock = Lock()
 shutdown_event = Event()  # Event to signal threads to exit
 
-# Cache for collections to avoid repeated file system operations
-collections_cache = {}
-collections_cache_time = 0
-CACHE_DURATION = 30  # Cache collections for 30 seconds
+# Media roots - MP4MUSEUM_MEDIA_ROOT points the backend at another tree (benchmarks, tests)
+MEDIA_ROOT = os.environ.get("MP4MUSEUM_MEDIA_ROOT", "/media")
+INTERNAL_ROOT = os.path.join(MEDIA_ROOT, "internal")
+VIDEOS_ROOT = os.path.join(MEDIA_ROOT, "videos")
+
+# OPTIMIZATION: Durations and codecs from the container headers - no player launched to find out
+from media_probe import default_probe
+probes = None  # MediaProbe with a (path, size, mtime) cache, created in start()
+current_media = None  # MediaInfo of the playing clip, or None (images, unknown containers)
+
+# OPTIMIZATION: Persistent library index (inotify-updated) instead of re-globbing drives
+from library_index import LibraryIndex
+library = None  # LibraryIndex over INTERNAL_ROOT and VIDEOS_ROOT, loaded in start()
+
+# OPTIMIZATION: Playlists from precomputed per-collection manifests (curated order, loop, dwell)
+from collection_manifest import ManifestStore
+manifests = None  # ManifestStore, created in start()
+
+# Time-of-day collection changes from /boot/schedule.json, one timer heap and no polling
+from scheduler import Scheduler, SCHEDULE_FILE
+scheduler = None  # Scheduler, started in start() when the schedule file exists
+
+# Push playback changes to the remotes over Server-Sent Events (/events) instead of polling
+from event_stream import EventBroadcaster
+events = EventBroadcaster()
 
-# GPIO REMOVED - not needed for this setup
-print("🚀 GPIO support disabled - using API/web control only")
+from api_server import serve, EVENT_CLIENT_LIMIT
+
+# Prometheus-style counters and latency histograms on /metrics
+import metrics
+metrics.Gauge("mp4museum_event_clients", "Open /events streams").set_function(lambda: events.client_count)
 
 # read audio device config
 audiodevice = "0"
@@ -44,35 +97,104 @@ collection_changed = False  # New flag for cleaner change detection
 # Global startup mode flag
 startup_mode = True
 
-if os.path.isfile('/boot/alsa.txt'):
-    f = open('/boot/alsa.txt', 'r')
-    audiodevice = f.read(1)
-
-# OPTIMIZATION: Create single VLC instance to reuse
-def initialize_vlc():
-    global vlc_instance, player
-    vlc_instance = vlc.Instance('-q -A alsa --alsa-audio-device hw:' + audiodevice)
-    player = vlc_instance.media_player_new()
-    
-    # Set up event handling for playback completion
-    event_manager = player.event_manager()
-    event_manager.event_attach(vlc.EventType.MediaPlayerEndReached, on_media_end)
-
-def on_media_end(event):
+def read_audio_device():
+    global audiodevice
+    if os.path.isfile('/boot/alsa.txt'):
+        with open('/boot/alsa.txt', 'r') as f:
+            audiodevice = f.read(1)
+
+# OPTIMIZATION: Create a single player backend to reuse
+def initialize_player(new_backend=None):
+    global backend
+    backend = new_backend or player_backend.create_backend(audiodevice=audiodevice)
+    # Playback completion, errors and the first frame arrive as callbacks - no polling
+    backend.on_end = on_media_end
+    backend.on_error = on_media_error
+    backend.on_first_frame = on_first_frame
+
+def on_media_end():
     """Event callback when media playback ends - eliminates polling loop"""
-    global playback_finished
+    global playback_finished, clip_end_time
+    clip_end_time = time.monotonic()
     playback_finished.set()
 
-# OPTIMIZATION: Cached collection retrieval
+def on_media_error():
+    """Event callback when the player cannot play the clip - counted, then handled like an end"""
+    metrics.FAILURES.inc()
+    on_media_end()
+
+def on_first_frame():
+    """Event callback when a video output appears - measures start latency and the gap since the last clip"""
+    global clip_end_time, clip_requested_at, switch_requested_at
+    now = time.monotonic()
+    if "first_frame" not in startup_times:
+        startup_times["first_frame"] = round(time.time() - PROCESS_START, 3)
+        log.info(f"⏱️ First frame {startup_times['first_frame']} s after process start")
+    if clip_requested_at is not None:
+        metrics.CLIP_START.observe(now - clip_requested_at)
+        clip_requested_at = None
+    if switch_requested_at is not None:
+        metrics.COLLECTION_SWITCH.observe(now - switch_requested_at)
+        switch_requested_at = None
+    if clip_end_time is None:
+        return
+    gap = now - clip_end_time
+    gap_samples.append(gap)
+    metrics.INTER_CLIP_GAP.observe(gap)
+    clip_end_time = None
+
+def get_gap_stats():
+    """Inter-clip gap summary in milliseconds"""
+    samples = sorted(gap_samples)
+    if not samples:
+        return {"samples": 0}
+    return {
+        "samples": len(samples),
+        "last_ms": round(gap_samples[-1] * 1000, 1),
+        "median_ms": round(samples[len(samples) // 2] * 1000, 1),
+        "max_ms": round(samples[-1] * 1000, 1),
+    }
+
+def release_preloaded_media():
+    global preloaded_media
+    if preloaded_media:
+        backend.release_media(preloaded_media[1])
+        preloaded_media = None
+
+def preload_media(source):
+    """Create and parse the next clip ahead of time so switching skips demux/probe"""
+    global preloaded_media
+    if not PRELOAD_NEXT or not source:
+        return
+    if preloaded_media and preloaded_media[0] == source:
+        return
+    release_preloaded_media()
+    media = backend.new_media(source)
+    backend.preparse(media)  # Asynchronous, returns immediately
+    preloaded_media = (source, media)
+
+def take_media(source):
+    """Return the preloaded Media for source, or a fresh one"""
+    global preloaded_media
+    if preloaded_media and preloaded_media[0] == source:
+        media = preloaded_media[1]
+        preloaded_media = None
+        return media
+    release_preloaded_media()
+    return backend.new_media(source)
+
+# OPTIMIZATION: Collections come from the library index - no filesystem access here
 def get_collections_cached():
-    global collections_cache, collections_cache_time
-    current_time = time.time()
-    
-    if current_time - collections_cache_time > CACHE_DURATION:
-        collections_cache = sorted([d for d in glob.glob("/media/internal/*") if os.path.isdir(d)])
-        collections_cache_time = current_time
-    
-    return collections_cache
+    return library.collections(INTERNAL_ROOT) if library else []  # API is up before the index
+
+def library_duration(file_path):
+    """Manifest probe: the duration the library index already knows, no second probe"""
+    entry = library.entry(file_path)
+    return entry[2] if entry else None
+
+def get_playlist(collection):
+    """[PlaylistItem] for a collection from its manifest"""
+    return manifests.playlist(collection) if manifests else []
 
 # STEP 2: Add this initialization AFTER the GPIO setup (around line 40, after the GPIO.setup lines):
 # Initialize collection properly after everything else is set up
@@ -81,108 +203,82 @@ def initialize_collection():
     all_collections = get_collections_cached()
     if all_collections:
         current_collection = all_collections[0]  # Start with first available collection
-        print(f"🎯 Initial collection set to: {current_collection}")
+        log.info(f"🎯 Initial collection set to: {current_collection}")
     else:
-        current_collection = "/media/internal"  # Fallback if no collections found
-        print(f"🎯 No collections found, using fallback: {current_collection}")
-    sys.stdout.flush()
-
-# Initialize VLC and collection
-initialize_vlc()
-initialize_collection()
+        current_collection = INTERNAL_ROOT  # Fallback if no collections found
+        log.info(f"🎯 No collections found, using fallback: {current_collection}")
 
 # GPIO functions removed - control via API only
 
 # OPTIMIZATION: Event-driven playback instead of polling
-def vlc_play(source, collection):
-    global player, running, playback_finished, vlc_instance
+def vlc_play(source, collection, next_source=None, loop=None, dwell=None):
+    global running, playback_finished, clip_end_time, current_source, clip_requested_at, current_media
     
-    print(f"🧪 DEBUG: Current collection at playback time: {collection}")
+    log.debug(f"🧪 DEBUG: Current collection at playback time: {collection}")
     if not source.startswith(collection):
-        print(f"⚠️ WARNING: File {source} is outside the expected collection path {collection}")
+        log.warning(f"⚠️ WARNING: File {source} is outside the expected collection path {collection}")
+        events.publish("error", {"message": "File outside collection", "file": os.path.basename(source)})
+        metrics.FAILURES.inc()
         return  # Skip playback if the file is not in the correct collection
     else:
-        print(f"🎬 Now playing from collection: {collection}")
-        print(f"🎬 File: {source}")
-    sys.stdout.flush()
+        log.info(f"🎬 Now playing from collection: {collection}")
+        log.info(f"🎬 File: {source}")
     
-    # OPTIMIZATION: Reuse existing VLC instance, just change media
-    if "loop." in source:
-        # For loop files, we need a new instance with repeat
-        loop_instance = vlc.Instance('--input-repeat=999999999 -q -A alsa --alsa-audio-device hw:' + audiodevice)
-        loop_player = loop_instance.media_player_new()
-        media = loop_instance.media_new(source)
-        loop_player.set_media(media)
-        loop_player.play()
-        
-        # Use simpler blocking wait for loop files
-        time.sleep(1)
-        while loop_player.get_state() in (3, 4) and running:
-            time.sleep(0.5)  # Longer sleep for loop files
-            if shutdown_event.is_set():
-                break
-        
-        media.release()
-        loop_player.release()
-        loop_instance.release()
-    else:
-        # OPTIMIZATION: Reuse global player instance
-        media = vlc_instance.media_new(source)
-        player.set_media(media)
-        playback_finished.clear()  # Reset the event
-        player.play()
-        
-        time.sleep(0.1)  # Brief pause to let playback start
-        
-        # OPTIMIZATION: Event-driven waiting instead of polling
-        while running and not shutdown_event.is_set():
-            # Wait for either playback to finish or shutdown signal
-            if playback_finished.wait(timeout=0.5):  # Check every 500ms instead of 100ms
-                break
-            
-            # Only check player state occasionally as fallback
-            state = player.get_state()
-            if state not in (3, 4):  # Not playing or paused
+    # OPTIMIZATION: Reuse global player instance and the media parsed during the last clip
+    started = clip_requested_at = time.monotonic()
+    media = take_media(source)
+    looping = loop if loop is not None else "loop." in source
+    if looping:
+        # Loop files repeat inside the shared player instead of a dedicated vlc.Instance
+        backend.set_repeat(media, LOOP_REPEAT)
+    playback_finished.clear()  # Reset the event
+    backend.play(media)
+    current_source = source
+    current_media = probes.describe(source) if probes else None  # Warns about clips the Pi cannot decode
+    metrics.CLIPS_PLAYED.inc()
+    events.publish("track", {
+        "file": os.path.basename(source),
+        "collection": os.path.basename(collection),
+        "state": "playing"
+    })
+
+    # Prepare the following clip while this one plays
+    preload_media(next_source)
+    deadline = started + dwell if dwell else None  # Curated dwell time (images, excerpts)
+
+    # OPTIMIZATION: Event-driven waiting - EndReached, errors, API stops and shutdown all set the event
+    while running and not shutdown_event.is_set():
+        timeout = STATE_CHECK_INTERVAL
+        if deadline is not None:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                backend.stop()  # Dwell time is up
                 break
-        
-        media.release()
-
-# find a file, and if found, return its path (for sync)
-def search_file(file_name):
-    # Use glob to find files matching the pattern in both directories
-    file_path_media = f'/media/*/{file_name}'
-    file_path_boot = f'/boot/{file_name}'
-    
-    matching_files = glob.glob(file_path_media) + glob.glob(file_path_boot)
-
-    if matching_files:
-        # Return the first found file name
-        return matching_files[0]
-
-    # Return False if the file is not found
-    return False
-
-# *** run player ****
-
-# Initial startup video (optional; disable if not needed)
-boot_video = "/home/pi/mp4museum-boot.mp4"
-if os.path.exists(boot_video):
-    vlc_play(boot_video, os.path.dirname(boot_video))
-
-# GPIO event detection removed - API control only
-
-# check for sync mode instructions
-enableSync = search_file("sync-leader.txt")
-syncFile = search_file("sync.mp4")
-if syncFile and enableSync:
-    print("Sync Mode LEADER:" + syncFile)
-    subprocess.run(["omxplayer-sync", "-u", "-m", syncFile]) 
-
-enableSync = search_file("sync-player.txt")
-syncFile = search_file("sync.mp4")
-if syncFile and enableSync:
-    print("Sync Mode PLAYER:" + syncFile)
-    subprocess.run(["omxplayer-sync", "-u", "-l",  syncFile]) 
+            timeout = min(timeout, STATE_CHECK_INTERVAL)
+        if playback_finished.wait(timeout=timeout):
+            if looping and not shutdown_event.is_set() and backend.state() == ENDED:
+                # Repeat count exhausted - start over; an API stop leaves the state at Stopped
+                playback_finished.clear()
+                backend.play(media)
+                continue
+            break
+
+        # Only check player state occasionally as fallback (Opening/Buffering still count as busy)
+        if backend.state() in FINISHED_STATES:
+            break
+
+    if clip_end_time is None or clip_end_time < started:
+        clip_end_time = time.monotonic()  # Stopped via API rather than EndReached
+    backend.release_media(media)
+
+def run_sync_loop(role, sync_file):
+    """Loop the sync file while the sync engine steers the player (leader or follower)"""
+    global sync
+    log.info(f"🔗 Sync Mode {role.upper()}: {sync_file}")
+    from sync_engine import create_sync
+    sync = create_sync(role, backend, os.path.basename(sync_file)).start()
+    while running and not shutdown_event.is_set():
+        vlc_play(sync_file, os.path.dirname(sync_file), sync_file)
 
 # OPTIMIZATION: Simplified playback loop
 def start_player_loop():
@@ -191,19 +287,29 @@ def start_player_loop():
     global running
     
     all_collections = get_collections_cached()
-    print(f"🎵 Available collections: {all_collections}")
-    print(f"📡 Starting player loop with collection: {current_collection}")
-    sys.stdout.flush()
+    log.info(f"🎵 Available collections: {all_collections}")
+    log.info(f"📡 Starting player loop with collection: {current_collection}")
+
+    # Sync installations play sync.mp4 in step with the other screens instead of the collections
+    mode = sync_mode(MEDIA_ROOT)
+    if mode:
+        run_sync_loop(*mode)
+        return
+
+    # Initial startup video, played once; the first collection clip is parsed meanwhile
+    if BOOT_VIDEO and os.path.exists(BOOT_VIDEO):
+        first = get_playlist(current_collection)
+        vlc_play(BOOT_VIDEO, os.path.dirname(BOOT_VIDEO), first[0].path if first else None)
 
     if startup_mode:
         startup_mode = False  # Move this up to prevent accidental re-entry
-        print(f"🚀 Startup mode: playing only from {current_collection}")
-        sys.stdout.flush()
-        playlist = sorted(glob.glob(os.path.join(current_collection, "*.*")))
-        for file in playlist:
+        log.info(f"🚀 Startup mode: playing only from {current_collection}")
+        playlist = get_playlist(current_collection)
+        for index, item in enumerate(playlist):
             if not running or shutdown_event.is_set():
                 return
-            vlc_play(file, current_collection)  
+            vlc_play(item.path, current_collection, playlist[(index + 1) % len(playlist)].path,
+                     item.loop, item.dwell)
 
     while running and not shutdown_event.is_set():
         collection_for_playback = None
@@ -218,18 +324,13 @@ def start_player_loop():
                 collection_changed):
                 
                 collection_for_playback = current_collection
-                print(f"📦 DEBUG: Locked-in collection_for_playback: {collection_for_playback}")
-                sys.stdout.flush()
+                log.debug(f"📦 DEBUG: Locked-in collection_for_playback: {collection_for_playback}")
                 
-                # OPTIMIZATION: Cache playlist instead of recalculating
-                playlist = sorted([
-                    file for file in glob.glob(os.path.join(collection_for_playback, "*.*"))
-                    if os.path.isfile(file)
-                ])
+                # OPTIMIZATION: Playlist comes ready-ordered from the collection's manifest
+                playlist = get_playlist(collection_for_playback)
                 
-                print(f"🔄 Collection change detected!")
-                print(f"🧪 Playlist for {collection_for_playback}: {[os.path.basename(f) for f in playlist]}")
-                sys.stdout.flush()
+                log.info(f"🔄 Collection change detected!")
+                log.debug(f"🧪 Playlist for {collection_for_playback}: {[os.path.basename(item.path) for item in playlist]}")
 
                 last_collection = collection_for_playbook = collection_for_playback
                 last_collection_id = collection_id_snapshot
@@ -240,7 +341,7 @@ def start_player_loop():
             time.sleep(2)  # OPTIMIZATION: Longer sleep when idle
             continue
 
-        for file in playlist:
+        for index, item in enumerate(playlist):
             if not running or shutdown_event.is_set():
                 return
                 
@@ -250,162 +351,287 @@ def start_player_loop():
                     if (current_collection != collection_for_playback or
                         current_collection_id != collection_id_snapshot or
                         collection_changed):
-                        print("🔁 Collection changed mid-playback. Breaking loop.")
-                        sys.stdout.flush()
+                        log.info("🔁 Collection changed mid-playback. Breaking loop.")
                         break
 
-            print(f"🎬 Playing: {os.path.basename(file)} from {collection_for_playback}")
-            sys.stdout.flush()
+            log.info(f"🎬 Playing: {os.path.basename(item.path)} from {collection_for_playback}")
 
-            vlc_play(file, collection_for_playback)
+            # The playlist wraps around, so the first file follows the last one
+            vlc_play(item.path, collection_for_playback, playlist[(index + 1) % len(playlist)].path,
+                     item.loop, item.dwell)
 
         if not playlist:
-            print(f"⚠️ No playable files found in collection: {collection_for_playback}")
-            sys.stdout.flush()
+            log.warning(f"⚠️ No playable files found in collection: {collection_for_playback}")
             time.sleep(10)  # OPTIMIZATION: Longer sleep when no files found
             continue
 
 # Define cleanup function
 def cleanup():
-    global running, player, vlc_instance
-    print("🧹 Cleaning up resources...")
+    global running
+    if shutdown_event.is_set():
+        return  # Already cleaned up (signal handler, then atexit)
+    log.info("🧹 Cleaning up resources...")
     running = False
     shutdown_event.set()
+    playback_finished.set()  # Wake vlc_play() immediately
+    if library:
+        library.stop()  # Persist any pending index changes
+    if probes:
+        probes.save()
+    if sync:
+        sync.stop()
+    if scheduler:
+        scheduler.stop()
     
-    # Stop player if it exists
-    if player:
-        try:
-            player.stop()
-            player.release()
-        except Exception as e:
-            print(f"Error stopping player during cleanup: {e}")
-    
-    # Release VLC instance
-    if vlc_instance:
+    # Stop the player and release the backend (VLC instance) if it exists
+    if backend:
         try:
-            vlc_instance.release()
+            backend.close()
         except Exception as e:
-            print(f"Error releasing VLC instance: {e}")
+            log.error(f"Error stopping player during cleanup: {e}")
     
     # GPIO cleanup removed - not using GPIO
-    print("✅ Cleanup completed")
+    log.info("✅ Cleanup completed")
     
-    print("👋 Goodbye!")
-    sys.stdout.flush()
+    log.info("👋 Goodbye!")
 
 # Signal handler for graceful shutdown
 def signal_handler(sig, frame):
-    print("🛑 Received shutdown signal, cleaning up...")
+    log.info("🛑 Received shutdown signal, cleaning up...")
     cleanup()
     sys.exit(0)
 
-# Register signal handlers
-signal.signal(signal.SIGINT, signal_handler)  # Ctrl+C
-signal.signal(signal.SIGTERM, signal_handler)  # Termination signal
-atexit.register(cleanup)  # Register cleanup on normal exit
-
-# start player loop in a separate thread
-player_thread = Thread(target=start_player_loop, daemon=True)
-player_thread.start()
-
-# Flask app and API endpoints
-from flask_cors import CORS
-app = Flask(__name__)
-CORS(app)
-
-@app.route("/collections", methods=["GET"])
+# API endpoints, registered on the Flask app once the API thread has created it
+API_ROUTES = []  # (rule, methods, view function)
+
+def api_route(rule, methods):
+    def register(view):
+        API_ROUTES.append((rule, methods, view))
+        return view
+    return register
+
+def create_app():
+    """Import Flask and build the app with every api_route() endpoint"""
+    global app, jsonify, request, Response
+    from flask import Flask, jsonify, request, Response
+    from flask_cors import CORS
+    app = Flask(__name__)
+    CORS(app)
+    for rule, methods, view in API_ROUTES:
+        app.add_url_rule(rule, view_func=view, methods=methods)
+    return app
+
+@api_route("/collections", ["GET"])
 def list_collections():
     # OPTIMIZATION: Use cached collections
     folders = [os.path.basename(d) for d in get_collections_cached()]
     return jsonify(folders)
 
-@app.route("/set_collection", methods=["POST"])
+@api_route("/set_collection", ["POST"])
 def set_collection():
+    result, code = switch_collection(request.json.get("collection"))
+    return jsonify(result), code
+
+def switch_collection(collection):
+    """Switch playback to a collection (API and scheduler); returns (response dict, HTTP status)"""
     global current_collection
     global current_collection_id
     global startup_mode
-    global player
     global collection_changed
     global collection_ready
+    global switch_requested_at
 
-    collection = request.json.get("collection")
     all_collections = [os.path.basename(d) for d in get_collections_cached()]
     
     if collection not in all_collections:
-        return jsonify({"status": "error", "message": "Invalid collection"}), 400
+        return {"status": "error", "message": "Invalid collection"}, 400
+
+    if sync:
+        return {"status": "error", "message": "Sync mode - the wall plays sync.mp4"}, 409
 
-    path = f"/media/videos/{collection}"
+    path = os.path.join(VIDEOS_ROOT, collection)
     if not os.path.exists(path):
-        return jsonify({"status": "error", "message": "Collection path does not exist"}), 400
+        return {"status": "error", "message": "Collection path does not exist"}, 400
 
-    print(f"🧪 Received collection switch request to: {collection}")
-    print(f"🧪 Full path resolved: {path}")
-    sys.stdout.flush()
+    log.debug(f"🧪 Received collection switch request to: {collection}")
+    log.debug(f"🧪 Full path resolved: {path}")
 
     startup_mode = False
 
     with collection_lock:
         try:
-            if player is not None:
-                player.stop()
+            if backend is not None:
+                backend.stop()
                 playback_finished.set()  # Signal immediate stop
-                print("🛑 Forcefully stopped current player")
+                log.info("🛑 Forcefully stopped current player")
         except Exception as e:
-            print(f"⚠️ Error stopping player: {e}")
+            log.warning(f"⚠️ Error stopping player: {e}")
 
         current_collection_id += 1
         current_collection = path
+        switch_requested_at = time.monotonic()
         collection_ready = True
         collection_changed = True
-        print(f"🧪 Post-update check — current_collection: {current_collection}")
-        sys.stdout.flush()
-
-    return jsonify({"status": "ok", "collection": collection})
-
-@app.route("/next", methods=["POST"])
+        log.debug(f"🧪 Post-update check — current_collection: {current_collection}")
+
+    events.publish("collection", {"collection": collection, "collection_id": current_collection_id})
+    return {"status": "ok", "collection": collection}, 200
+
+def scheduled_switch(collection):
+    result, code = switch_collection(collection)
+    if code != 200:
+        log.warning(f"⚠️ Scheduled switch to {collection} refused: {result['message']}")
+
+def prewarm_collection(collection):
+    """Load the collection's playlist (and rebuild a stale manifest) before the switch needs it"""
+    get_playlist(os.path.join(VIDEOS_ROOT, collection))
+
+@api_route("/schedule", ["GET"])
+def get_schedule():
+    """Upcoming scheduled collection changes"""
+    if not scheduler:
+        return jsonify({"status": "error", "message": "No schedule loaded"}), 404
+    return jsonify(scheduler.status())
+
+@api_route("/schedule/reload", ["POST"])
+def reload_schedule():
+    """Re-read the schedule file after editing it"""
+    if not scheduler:
+        return jsonify({"status": "error", "message": "No schedule loaded"}), 404
+    scheduler.load()
+    return jsonify(scheduler.status())
+
+@api_route("/next", ["POST"])
 def next_track():
     """Skip to next track"""
-    if player:
-        player.stop()
+    if backend:
+        backend.stop()
         playback_finished.set()
+        metrics.SKIPS.inc()
+        events.publish("state", {"state": "skipped"})
         return jsonify({"status": "skipped"})
     return jsonify({"status": "error", "message": "No player available"})
 
-@app.route("/play", methods=["POST"])
+@api_route("/play", ["POST"])
 def play():
-    if player:
-        player.play()
+    if backend:
+        backend.resume()
+        events.publish("state", {"state": "playing"})
         return jsonify({"status": "playing"})
     return jsonify({"status": "error", "message": "No player available"})
 
-@app.route("/pause", methods=["POST"])
+@api_route("/pause", ["POST"])
 def pause():
-    if player:
-        player.pause()
+    if backend:
+        backend.pause()
+        events.publish("state", {"state": "paused"})
         return jsonify({"status": "paused"})
     return jsonify({"status": "error", "message": "No player available"})
 
-@app.route("/restart", methods=["POST"])
+def build_status():
+    """Status snapshot shared by /status and the first /events message"""
+    return {
+        "status": "running",
+        "current_collection": os.path.basename(current_collection),
+        "current_file": os.path.basename(current_source) if current_source else None,
+        "current_media": current_media.to_dict() if current_media else None,
+        "player": backend.name if backend else None,
+        "preload_next": PRELOAD_NEXT,
+        "inter_clip_gap": get_gap_stats(),
+        "event_clients": events.client_count,
+        "startup_s": startup_times,
+        "sync": sync.status() if sync else None,
+    }
+
+@api_route("/status", ["GET"])
+def get_status():
+    """Current file plus the measured gap between clips"""
+    return jsonify(build_status())
+
+@api_route("/metrics", ["GET"])
+def get_metrics():
+    """Prometheus text format: clip counters, start/gap/switch latency histograms, process gauges"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+@api_route("/events", ["GET"])
+def event_stream():
+    """Server-Sent Events: track, state, collection and error messages as they happen"""
+    if events.client_count >= EVENT_CLIENT_LIMIT:
+        # Each stream holds a worker thread - refuse rather than starve the control routes
+        return jsonify({"status": "error", "message": "Too many event clients"}), 503
+    return Response(events.stream(initial=("status", build_status())),
+                    mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@api_route("/restart", ["POST"])
 def restart():
-    print("♻️ Restarting server via subprocess...")
-    sys.stdout.flush()
+    log.info("♻️ Restarting server via subprocess...")
+    import subprocess
     subprocess.Popen(["python3"] + sys.argv)
     os._exit(0)
 
-# OPTIMIZATION: Run Flask with optimized settings
-def run_flask_app():
-    app.run(host="0.0.0.0", port=5000, threaded=True, use_reloader=False, 
-            processes=1, debug=False)  # Disable debug mode for production
+# OPTIMIZATION: Fixed worker pool (or waitress) instead of a thread per request
+def run_flask_app(port=5000):
+    create_app()
+    startup_times["api_ready"] = round(time.time() - PROCESS_START, 3)
+    serve(app, host="0.0.0.0", port=port)
 
-flask_thread = Thread(target=run_flask_app, daemon=True)
-flask_thread.start()
+# *** run player ****
 
-# OPTIMIZATION: Longer sleep in main thread
-try:
-    while running and not shutdown_event.is_set():
-        time.sleep(5)  # Increased from 1 second
-except KeyboardInterrupt:
-    print("🛑 Keyboard interrupt received in main thread")
-    cleanup()
+def start(new_backend=None, port=5000):
+    """Bring up the API, player, library and playback loop threads; returns without blocking.
+    Pass a backend (e.g. player_backend.SimulatedBackend) to run without VLC."""
+    global library, manifests, probes, scheduler
+    # The remotes can connect while VLC and the index are still loading
+    flask_thread = Thread(target=run_flask_app, args=(port,), daemon=True)
+    flask_thread.start()
+
+    read_audio_device()
+    initialize_player(new_backend)
+    probes = default_probe()
+    # Listing only: on a first boot, probing every header here would hold back the first frame
+    library = LibraryIndex([INTERNAL_ROOT, VIDEOS_ROOT])
+    library.load().start_watching()
+    manifests = ManifestStore(probe=library_duration)
+    library.listeners.append(manifests.changed)  # Rebuild a collection's manifest when it changes
+    initialize_collection()
+    if os.path.exists(SCHEDULE_FILE):
+        # Applies the collection due now before the first clip plays
+        scheduler = Scheduler(scheduled_switch, prewarm_collection).start()
+
+    # start player loop in a separate thread (sync mode and boot video run there too)
+    player_thread = Thread(target=start_player_loop, daemon=True)
+    player_thread.start()
+    Thread(target=probe_library, daemon=True, name="LibraryProbe").start()
+    return player_thread, flask_thread
+
+def probe_library():
+    """Durations for files the index has none for, read while the first clips already play"""
+    library.probe = probes.duration  # Files the watcher finds from now on are probed as they come
+    library.fill_durations()
+    probes.save()
+
+def main():
+    setup_logging("mp4museum")  # Same logger as the module-level `log`
+    # GPIO REMOVED - not needed for this setup
+    log.info("🚀 GPIO support disabled - using API/web control only")
+
+    # Register signal handlers
+    signal.signal(signal.SIGINT, signal_handler)  # Ctrl+C
+    signal.signal(signal.SIGTERM, signal_handler)  # Termination signal
+    atexit.register(cleanup)  # Register cleanup on normal exit
+
+    start(port=int(os.environ.get("MP4MUSEUM_PORT", "5000")))
+
+    # OPTIMIZATION: Longer sleep in main thread
+    try:
+        while running and not shutdown_event.is_set():
+            time.sleep(5)  # Increased from 1 second
+    except KeyboardInterrupt:
+        log.info("🛑 Keyboard interrupt received in main thread")
+        cleanup()
+
+    log.info("🏁 Main thread exiting")
 
-print("🏁 Main thread exiting")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
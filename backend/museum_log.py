@@ -0,0 +1,118 @@
+# mp4museum - logging setup shared by all player scripts
+# Log calls only put a record on a bounded in-memory queue; one background thread
+# writes them to a size-bounded rotating file. Chatty call sites are rate limited
+# so a tight loop cannot grind the SD card.
+#
+# Environment variables:
+#   MP4MUSEUM_LOG_LEVEL      DEBUG / INFO (default) / WARNING / ERROR
+#   MP4MUSEUM_LOG_FILE       log file (default /tmp/mp4museum-<script>.log, "" disables)
+#   MP4MUSEUM_LOG_MAX_BYTES  rotate after this many bytes (default 1 MB, 3 backups kept)
+#   MP4MUSEUM_CONSOLE_LEVEL  level that is also echoed to stdout (default WARNING)
+
+import os
+import time
+import queue
+import atexit
+import logging
+import logging.handlers
+from threading import Lock
+
+ROOT_LOGGER = "mp4museum"
+QUEUE_SIZE = 10000  # Records waiting for the writer thread; beyond that they are dropped
+RATE_LIMIT_BURST = 5  # Messages per call site ...
+RATE_LIMIT_INTERVAL = 10.0  # ... per this many seconds
+LOG_FORMAT = "%(asctime)s %(levelname).1s %(threadName)s %(message)s"
+
+_listener = None
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets at most `burst` records per call site (file:line) through per interval.
+    The first record after a quiet period reports how many were suppressed."""
+
+    def __init__(self, burst=RATE_LIMIT_BURST, interval=RATE_LIMIT_INTERVAL):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.lock = Lock()
+        self.sites = {}  # (pathname, lineno) -> [window start, count in window, suppressed]
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True  # Never hide errors
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self.lock:
+            site = self.sites.get(key)
+            if site is None or now - site[0] >= self.interval:
+                suppressed = site[2] if site else 0
+                self.sites[key] = [now, 1, 0]
+                if suppressed:
+                    record.msg = f"{record.msg} (suppressed {suppressed} similar)"
+                return True
+            if site[1] < self.burst:
+                site[1] += 1
+                return True
+            site[2] += 1
+            return False
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks the caller: a full queue drops the record"""
+
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+def setup_logging(script_name, level=None):
+    """Configure the mp4museum logger tree once and return the script's logger"""
+    global _listener
+    root = logging.getLogger(ROOT_LOGGER)
+    if _listener is not None:
+        return logging.getLogger(f"{ROOT_LOGGER}.{script_name}")
+
+    level = level or os.environ.get("MP4MUSEUM_LOG_LEVEL", "INFO").upper()
+    console_level = os.environ.get("MP4MUSEUM_CONSOLE_LEVEL", "WARNING").upper()
+    log_file = os.environ.get("MP4MUSEUM_LOG_FILE", f"/tmp/mp4museum-{script_name}.log")
+    max_bytes = int(os.environ.get("MP4MUSEUM_LOG_MAX_BYTES", str(1024 * 1024)))
+
+    formatter = logging.Formatter(LOG_FORMAT, datefmt="%H:%M:%S")
+    handlers = []
+    if log_file:
+        try:
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=3, encoding="utf-8")
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        except OSError as e:
+            print(f"⚠️ Cannot open log file {log_file}: {e}")
+    console = logging.StreamHandler()
+    console.setFormatter(formatter)
+    console.setLevel(console_level if log_file else level)
+    handlers.append(console)
+
+    log_queue = queue.Queue(maxsize=QUEUE_SIZE)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter())
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    root.propagate = False
+
+    # respect_handler_level so the console only gets what it asked for
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return logging.getLogger(f"{ROOT_LOGGER}.{script_name}")
+
+
+def stop_logging():
+    """Flush the queue and stop the writer thread (also registered with atexit)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
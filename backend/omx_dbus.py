@@ -0,0 +1,152 @@
+# mp4museum - in-process D-Bus (MPRIS) control channel for omxplayer
+# One bus connection is kept open for the lifetime of the backend, so control actions
+# are a single method call instead of a dbus-send fork+exec.
+# Needs python3-dbus (sudo apt install python3-dbus); without it, available is False
+# and omxplayer.py falls back to dbus-send.
+
+import os
+import logging
+import time
+from threading import Event, Lock
+
+try:
+    import dbus
+    import dbus.bus
+except ImportError:
+    dbus = None
+
+log = logging.getLogger("mp4museum.dbus")
+
+OMXPLAYER_NAME = "org.mpris.MediaPlayer2.omxplayer"
+OBJECT_PATH = "/org/mpris/MediaPlayer2"
+PLAYER_INTERFACE = "org.mpris.MediaPlayer2.Player"
+ROOT_INTERFACE = "org.mpris.MediaPlayer2"
+PROPERTIES_INTERFACE = "org.freedesktop.DBus.Properties"
+CALL_TIMEOUT = 0.5  # Seconds - omxplayer answers in a few ms when it is alive
+NAME_CHECK_INTERVAL = 0.01  # How often wait_for_player() asks the bus for the name owner
+
+
+def _bus_address():
+    """omxplayer's launcher writes the address of its session bus to /tmp"""
+    user = os.environ.get("USER") or os.environ.get("LOGNAME") or "root"
+    try:
+        with open(f"/tmp/omxplayerdbus.{user}") as f:
+            return f.read().strip() or None
+    except OSError:
+        return os.environ.get("DBUS_SESSION_BUS_ADDRESS")
+
+
+class OMXPlayerDBus:
+    """Persistent MPRIS client for the running omxplayer instance"""
+
+    def __init__(self):
+        self.available = dbus is not None
+        self.lock = Lock()
+        self.bus = None
+        self.bus_address = None
+        self.player = None  # Interfaces bound to the current omxplayer's unique name
+        self.properties = None
+        self.root = None
+
+    def _connect(self):
+        """(Re)open the bus connection if needed - caller holds the lock"""
+        address = _bus_address()
+        if self.bus is not None and address == self.bus_address:
+            return self.bus
+        self.bus = dbus.bus.BusConnection(address) if address else dbus.SessionBus(private=True)
+        self.bus_address = address
+        return self.bus
+
+    def _reset(self):
+        self.player = self.properties = self.root = None
+
+    def wait_for_player(self, timeout=5.0, process=None, abort=None):
+        """Block until omxplayer has claimed its bus name, instead of a blind sleep.
+        Returns False on timeout, when the process exits, or when abort is set."""
+        if not self.available:
+            return False
+        abort = abort or Event()
+        deadline = time.monotonic() + timeout
+        with self.lock:
+            self._reset()
+        while time.monotonic() < deadline:
+            if process is not None and process.poll() is not None:
+                return False
+            try:
+                with self.lock:
+                    bus = self._connect()
+                    if bus.name_has_owner(OMXPLAYER_NAME):
+                        # Bind to the unique name of this omxplayer instance
+                        obj = bus.get_object(OMXPLAYER_NAME, OBJECT_PATH, introspect=False)
+                        self.player = dbus.Interface(obj, PLAYER_INTERFACE)
+                        self.properties = dbus.Interface(obj, PROPERTIES_INTERFACE)
+                        self.root = dbus.Interface(obj, ROOT_INTERFACE)
+                        return True
+            except dbus.exceptions.DBusException:
+                with self.lock:
+                    self.bus = None  # Bus not up yet (first omxplayer start) - retry
+            if abort.wait(NAME_CHECK_INTERVAL):
+                return False
+        return False
+
+    def _call(self, interface, method, *args):
+        with self.lock:
+            target = getattr(self, interface)
+            if target is None:
+                return None
+            try:
+                result = getattr(target, method)(*args, timeout=CALL_TIMEOUT)
+                return True if result is None else result  # Void methods succeed with None
+            except dbus.exceptions.DBusException as e:
+                log.warning(f"⚠️ D-Bus {method} failed: {e.get_dbus_name()}")
+                self._reset()  # Player gone - rebind on the next wait_for_player()
+                return None
+
+    @property
+    def connected(self):
+        return self.player is not None
+
+    def pause(self):
+        """Pause; does nothing if already paused"""
+        return self._call("player", "Pause") is not None
+
+    def play(self):
+        """Resume from the current position; does nothing if already playing"""
+        return self._call("player", "Play") is not None
+
+    def play_pause(self):
+        return self._call("player", "PlayPause") is not None
+
+    def stop(self):
+        """Stop playback - omxplayer exits on its own"""
+        return self._call("player", "Stop") is not None
+
+    def seek(self, offset_us):
+        """Relative seek in microseconds"""
+        return self._call("player", "Seek", dbus.Int64(offset_us)) is not None
+
+    def set_position(self, position_us):
+        """Absolute seek in microseconds"""
+        return self._call("player", "SetPosition", dbus.ObjectPath("/not/used"),
+                          dbus.Int64(position_us)) is not None
+
+    def position(self):
+        """Current position in microseconds, or None"""
+        value = self._call("properties", "Position")
+        return int(value) if value is not None else None
+
+    def duration(self):
+        value = self._call("properties", "Duration")
+        return int(value) if value is not None else None
+
+    def playback_status(self):
+        """'Playing' or 'Paused', or None when no player is connected"""
+        value = self._call("properties", "PlaybackStatus")
+        return str(value) if value is not None else None
+
+    def quit(self):
+        return self._call("root", "Quit") is not None
+
+    def call(self, command):
+        """Invoke an argument-less Player method by name (send_omxplayer_command compatibility)"""
+        return self._call("player", command) is not None
@@ -7,11 +7,14 @@ import subprocess
 import time
 import signal
 import atexit
+import logging
 import threading
 from threading import Thread, Event, Lock
 
-print("🎬 mp4museum - OMXPlayer Alternative")
-print("🚀 Using omxplayer instead of VLC to avoid threading issues")
+# OPTIMIZATION: Queued, rate-limited logging instead of print+flush on every hot path
+# (set up in main() - importing this module must not touch handlers, processes or threads)
+from museum_log import setup_logging
+log = logging.getLogger("mp4museum.omxplayer")
 
 # Global state
 running = True
@@ -25,10 +28,65 @@ playback_state_lock = Lock()
 force_stop_playback = Event()  # Signal to stop the entire playlist
 force_pause_playback = Event()  # Signal to pause playback
 
+# Pause/resume bookkeeping
+current_video_path = None  # Clip handed to the current omxplayer process
+paused_video_path = None  # Clip that was paused
+paused_position_us = None  # Where it was paused (used with --pos if the process had to die)
+clip_started_at = None  # monotonic time the current omxplayer process started
+clip_start_offset_us = 0  # --pos the current process was started with
+resume_requested_at = None  # monotonic time of the pending /play request
+last_resume_latency_ms = None
+last_resume_mode = None  # "dbus" (decoder kept warm) or "respawn" (restarted with --pos)
+clip_end_time = None  # monotonic time the previous omxplayer process exited
+player_ended_on_purpose = False  # A command (/next, /stop, /set_collection) ended the current process
+switch_requested_at = None  # monotonic time of the last /set_collection, until the new collection plays
+stray_kills = 0  # Leftover omxplayers from earlier runs that needed SIGKILL
+
 # Flask imports
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, Response
 from flask_cors import CORS
 
+# Push state changes to the remotes over Server-Sent Events (/events) instead of polling
+from event_stream import EventBroadcaster
+events = EventBroadcaster()
+
+from api_server import serve, EVENT_CLIENT_LIMIT, SERVER_THREADS
+
+# OPTIMIZATION: One persistent D-Bus connection for player control instead of forking dbus-send
+from omx_dbus import OMXPlayerDBus
+omx_control = OMXPlayerDBus()
+
+# OPTIMIZATION: Supervisor owns the omxplayer process group and reaps it via pidfd - no fixed sleeps
+from process_supervisor import ProcessSupervisor, terminate_pids
+player_supervisor = ProcessSupervisor("omxplayer")
+
+# Prometheus-style counters and latency histograms on /metrics
+import metrics
+metrics.PLAYER_KILLS.set_function(lambda: player_supervisor.kills + stray_kills)
+metrics.Gauge("mp4museum_event_clients", "Open /events streams").set_function(lambda: events.client_count)
+
+# OPTIMIZATION: Player mutations go through one command queue drained by the player thread -
+# API workers return at once instead of waiting for omxplayer to die
+from command_queue import CommandQueue
+commands = CommandQueue()
+player_supervisor.on_exit = commands.wake  # A clip ending wakes the player thread like a command
+COMMAND_WAIT = 5.0  # Seconds a ?wait=1 request waits for its command to finish
+current_command = None  # Command the player thread is running
+
+# Time-of-day collection changes from /boot/schedule.json, queued like /set_collection
+from scheduler import Scheduler, SCHEDULE_FILE
+scheduler = None
+
+# OPTIMIZATION: Playlists from per-collection manifests instead of listing the folder on every switch
+from collection_manifest import ManifestStore
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.m4v')
+manifests = None  # ManifestStore, created on first use
+
+# OPTIMIZATION: Durations and codecs from the container headers instead of running omxplayer
+from media_probe import default_probe
+probes = None  # MediaProbe, created with the manifests
+current_media = None  # MediaInfo of the playing clip
+
 # Collection management - will be set after finding media
 media_base_path = "/media/internal"
 available_collections = []
@@ -39,12 +97,11 @@ last_collection = None
 last_collection_id = -1
 
 def debug_thread_info():
-    """Print current thread information"""
-    thread_count = threading.active_count()
-    print(f"🧵 Active threads: {thread_count}")
-    for thread in threading.enumerate():
-        print(f"   - {thread.name}")
-    sys.stdout.flush()
+    """Log current thread information (DEBUG level only - enumerating threads is not free)"""
+    if not log.isEnabledFor(logging.DEBUG):
+        return
+    names = ", ".join(thread.name for thread in threading.enumerate())
+    log.debug(f"🧵 Active threads: {threading.active_count()} ({names})")
 
 def get_collections():
     """Get available collections - check multiple possible locations"""
@@ -55,9 +112,9 @@ def get_collections():
         "/home/pi/videos"
     ]
     
-    print("🔍 Searching for collections in:")
+    log.info("🔍 Searching for collections in:")
     for base in possible_bases:
-        print(f"   Checking: {base}")
+        log.debug(f"   Checking: {base}")
         if os.path.exists(base):
             try:
                 # Check for subdirectories (collections) - ignore hidden files/dirs
@@ -71,7 +128,7 @@ def get_collections():
                         subdirs.append(item)
                 
                 if subdirs:
-                    print(f"   ✅ Found {len(subdirs)} collections in {base}: {sorted(subdirs)}")
+                    log.info(f"   ✅ Found {len(subdirs)} collections in {base}: {sorted(subdirs)}")
                     return base, sorted(subdirs)
                 
                 # Check for video files directly in this directory (also ignore hidden)
@@ -83,48 +140,44 @@ def get_collections():
                         videos.append(item)
                 
                 if videos:
-                    print(f"   ✅ Found {len(videos)} videos directly in {base}")
+                    log.info(f"   ✅ Found {len(videos)} videos directly in {base}")
                     return base, ['default']  # Create a default collection
                     
-                print(f"   📁 {base} exists but no videos/collections found")
+                log.info(f"   📁 {base} exists but no videos/collections found")
             except Exception as e:
-                print(f"   ❌ Error reading {base}: {e}")
+                log.error(f"   ❌ Error reading {base}: {e}")
         else:
-            print(f"   ❌ {base} doesn't exist")
+            log.error(f"   ❌ {base} doesn't exist")
     
-    print("   ⚠️ No collections found anywhere!")
+    log.warning("   ⚠️ No collections found anywhere!")
     return "/media/internal", []
 
 def get_playlist_files(collection_path):
     """Get video files from collection - handle both direct files and subdirectories"""
     try:
         if not os.path.exists(collection_path):
-            print(f"❌ Collection path doesn't exist: {collection_path}")
+            log.error(f"❌ Collection path doesn't exist: {collection_path}")
             return []
         
-        files = []
+        global manifests, probes
+        if manifests is None:
+            probes = default_probe()
+            manifests = ManifestStore(extensions=VIDEO_EXTENSIONS, probe=probes.duration)
         
         # If this is a 'default' collection, look for files directly in the base directory
         if os.path.basename(collection_path) == 'default':
             collection_path = os.path.dirname(collection_path)
         
-        print(f"📁 Scanning for videos in: {collection_path}")
+        log.info(f"📁 Loading playlist for: {collection_path}")
         
-        for item in os.listdir(collection_path):
-            # Skip hidden files (starting with .) - these are often macOS metadata files
-            if item.startswith('.'):
-                continue
-                
-            full_path = os.path.join(collection_path, item)
-            if os.path.isfile(full_path):
-                if item.lower().endswith(('.mp4', '.avi', '.mkv', '.mov', '.m4v')):
-                    files.append(full_path)
-                    print(f"   🎬 Found: {item}")
+        # Curated order from playlist.json, else by name; hidden files are skipped by the scan
+        files = [item.path for item in manifests.playlist(collection_path)]
+        probes.save()
         
-        print(f"📊 Total videos found: {len(files)}")
-        return sorted(files)
+        log.info(f"📊 Total videos found: {len(files)}")
+        return files
     except Exception as e:
-        print(f"❌ Error getting playlist from {collection_path}: {e}")
+        log.error(f"❌ Error getting playlist from {collection_path}: {e}")
         return []
 
 def clear_screen():
@@ -148,9 +201,9 @@ def clear_screen():
             except:
                 continue  # Try next method
                 
-        print("🖥️ Screen cleared using available methods")
+        log.info("🖥️ Screen cleared using available methods")
     except Exception as e:
-        print(f"⚠️ Could not clear screen: {e}")
+        log.warning(f"⚠️ Could not clear screen: {e}")
 
 def set_playback_state(state):
     """Thread-safe playback state management"""
@@ -158,7 +211,9 @@ def set_playback_state(state):
     with playback_state_lock:
         old_state = playback_state
         playback_state = state
-        print(f"🎮 Playback state: {old_state} → {state}")
+        log.info(f"🎮 Playback state: {old_state} → {state}")
+    if old_state != state:
+        events.publish("state", {"state": state, "previous": old_state})
 
 def get_playback_state():
     """Get current playback state"""
@@ -170,7 +225,15 @@ def send_omxplayer_command(command):
     global current_player_process
     
     if not current_player_process or current_player_process.poll() is not None:
-        print("❌ No active OMXPlayer to send command to")
+        log.error("❌ No active OMXPlayer to send command to")
+        return False
+    
+    # OPTIMIZATION: Direct method call on the open bus connection when available
+    if omx_control.connected:
+        if omx_control.call(command):
+            log.info(f"✅ Sent OMXPlayer command: {command}")
+            return True
+        log.warning(f"⚠️ OMXPlayer command failed: {command}")
         return False
     
     try:
@@ -186,87 +249,177 @@ def send_omxplayer_command(command):
         
         result = subprocess.run(dbus_cmd, capture_output=True, timeout=2)
         if result.returncode == 0:
-            print(f"✅ Sent OMXPlayer command: {command}")
+            log.info(f"✅ Sent OMXPlayer command: {command}")
             return True
         else:
-            print(f"⚠️ OMXPlayer command failed: {command}")
+            log.warning(f"⚠️ OMXPlayer command failed: {command}")
             return False
             
     except Exception as e:
-        print(f"❌ Error sending OMXPlayer command {command}: {e}")
+        log.error(f"❌ Error sending OMXPlayer command {command}: {e}")
         return False
 
+def format_position(position_us):
+    """Microseconds -> hh:mm:ss for omxplayer's --pos"""
+    seconds = max(0, int(position_us // 1_000_000))
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+def current_position_us():
+    """Playback position of the current clip - from D-Bus, else estimated from wall time"""
+    position = omx_control.position() if omx_control.connected else None
+    if position is None and clip_started_at is not None:
+        position = clip_start_offset_us + int((time.monotonic() - clip_started_at) * 1_000_000)
+    return position
+
+def record_resume_latency(mode):
+    """Store the time from the /play request until playback was running again"""
+    global resume_requested_at, last_resume_latency_ms, last_resume_mode
+    if resume_requested_at is None:
+        return
+    last_resume_latency_ms = round((time.monotonic() - resume_requested_at) * 1000, 1)
+    last_resume_mode = mode
+    resume_requested_at = None
+    log.info(f"⏱️ Resume latency ({mode}): {last_resume_latency_ms} ms")
+
+def record_clip_started(requested_at):
+    """Feed the start latency, inter-clip gap and collection switch histograms once a clip plays"""
+    global clip_end_time, switch_requested_at
+    now = time.monotonic()
+    metrics.CLIP_START.observe(now - requested_at)
+    if clip_end_time is not None:
+        metrics.INTER_CLIP_GAP.observe(now - clip_end_time)
+        clip_end_time = None
+    if switch_requested_at is not None:
+        metrics.COLLECTION_SWITCH.observe(now - switch_requested_at)
+        switch_requested_at = None
+
 def omxplayer_play(video_path):
     """Play video using omxplayer with pause/resume support"""
-    global current_player_process, running, shutdown_event
+    global current_player_process, running, shutdown_event, current_video_path
+    global clip_started_at, clip_start_offset_us, paused_video_path, paused_position_us, clip_end_time
+    global current_media, player_ended_on_purpose
     
-    print(f"🎬 Playing with omxplayer: {os.path.basename(video_path)}")
+    requested_at = time.monotonic()
+    log.info(f"🎬 Playing with omxplayer: {os.path.basename(video_path)}")
+    current_video_path = video_path
+    current_media = probes.describe(video_path) if probes else None  # Warns about clips omxplayer cannot decode
     debug_thread_info()
     
-    # CRITICAL: Ensure no other OMXPlayer is running
-    cleanup_existing_omxplayers()
+    # CRITICAL: Ensure no other OMXPlayer is running - only our own previous child can be left
+    # (the supervisor's child: a command may already have cleared current_player_process)
+    if player_supervisor.running():
+        safe_terminate_omxplayer(player_supervisor.process)
     
     # Set state to playing
     set_playback_state("playing")
+    start_position_us = 0
     
     try:
-        # omxplayer command with DBUS support for remote control
-        cmd = [
-            'omxplayer',
-            '--no-osd',  # No on-screen display
-            '--hw',  # Hardware acceleration
-            '--refresh',  # Adjust refresh rate
-            '--blank',  # Blank screen before starting
-            video_path
-        ]
-        
-        # Start omxplayer process
-        current_player_process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            preexec_fn=os.setsid  # Create new process group for easier cleanup
-        )
-        
-        print(f"🎮 OMXPlayer started (PID: {current_player_process.pid})")
-        debug_thread_info()
-        
-        # Wait for OMXPlayer to initialize DBUS interface
-        time.sleep(1)
-        
-        # Playback monitoring loop with pause/resume support
-        while running and not shutdown_event.is_set() and not force_stop_playback.is_set():
-            # Check if process is still running (non-blocking)
-            poll_result = current_player_process.poll()
-            if poll_result is not None:
-                # Process has finished
-                print(f"🏁 Playback finished naturally (exit code: {poll_result})")
-                set_playback_state("stopped")
-                break
+        while True:
+            # omxplayer command with DBUS support for remote control
+            cmd = [
+                'omxplayer',
+                '--no-osd',  # No on-screen display
+                '--hw',  # Hardware acceleration
+                '--refresh',  # Adjust refresh rate
+                '--blank',  # Blank screen before starting
+            ]
+            if start_position_us:
+                cmd += ['--pos', format_position(start_position_us)]  # Resume after a killed pause
+            cmd.append(video_path)
+            
+            # Start omxplayer process in its own process group (supervisor reaps it)
+            # The loop below only uses the local `process`: a pause that kills the player sets
+            # the global to None while this loop is still watching it
+            process = current_player_process = player_supervisor.start(cmd)
+            player_ended_on_purpose = False
+            clip_started_at = time.monotonic()
+            clip_start_offset_us = start_position_us
+            if not start_position_us:
+                metrics.CLIPS_PLAYED.inc()
+            
+            log.info(f"🎮 OMXPlayer started (PID: {process.pid})")
+            events.publish("track", {
+                "file": os.path.basename(video_path),
+                "collection": os.path.basename(current_collection),
+                "position_us": start_position_us
+            })
+            debug_thread_info()
+            
+            # Wait for OMXPlayer to claim its DBUS name (no blind sleep when python3-dbus is there)
+            # A queued /stop or /set_collection ends the wait - it is handled in the loop below
+            if omx_control.available:
+                if omx_control.wait_for_player(timeout=5, process=process,
+                                               abort=commands.interrupted):
+                    if not start_position_us:
+                        record_clip_started(requested_at)  # D-Bus up = Playing
+                elif not commands.interrupted.is_set():
+                    log.warning("⚠️ OMXPlayer D-Bus interface did not appear")
+            else:
+                commands.interrupted.wait(1)
+            if start_position_us:
+                record_resume_latency("respawn")
+            
+            # Playback monitoring loop with pause/resume support
+            killed_for_pause = False
+            while running and not shutdown_event.is_set() and not force_stop_playback.is_set():
+                # Check if process is still running (non-blocking)
+                poll_result = process.poll()
+                if poll_result is not None:
+                    if get_playback_state() == "paused" and paused_video_path == video_path:
+                        # Process was killed to pause - keep our place in the playlist
+                        killed_for_pause = True
+                        break
+                    if player_ended_on_purpose:
+                        # Terminated by a command - not a failure, and the command set the state
+                        log.info(f"⏹️ OMXPlayer ended on request (exit code: {poll_result})")
+                        break
+                    # Process has finished
+                    log.info(f"🏁 Playback finished naturally (exit code: {poll_result})")
+                    if poll_result != 0:
+                        metrics.FAILURES.inc()
+                    set_playback_state("stopped")
+                    break
+                
+                # Handle pause state
+                current_state = get_playback_state()
+                if current_state == "stopped":
+                    # Force stop requested
+                    break
+                
+                # Run queued commands; returns at once when one arrives or the process exits
+                # (while paused in place this keeps the decoder warm until /play)
+                handle_commands(1.0)
             
-            # Handle pause state
-            current_state = get_playback_state()
-            if current_state == "paused":
-                # Stay in pause monitoring loop
-                time.sleep(0.5)
-                continue
-            elif current_state == "stopped":
-                # Force stop requested
+            if not killed_for_pause:
                 break
             
-            # Short sleep to allow interruption
-            time.sleep(0.2)
+            # Wait for /play (resume), /next or /set_collection (paused_video_path cleared) or /stop
+            current_player_process = None
+            log.info(f"💾 Paused at {format_position(paused_position_us or 0)} - waiting for resume")
+            while (running and not shutdown_event.is_set() and not force_stop_playback.is_set()
+                   and get_playback_state() == "paused" and paused_video_path == video_path):
+                handle_commands(1.0)
+            if get_playback_state() != "playing" or paused_video_path != video_path:
+                break
+            start_position_us = paused_position_us or 0
+            paused_video_path = None
+            paused_position_us = None
+            log.info(f"▶️ Restarting {os.path.basename(video_path)} at {format_position(start_position_us)}")
         
         # Clean up process if still running
-        if current_player_process and current_player_process.poll() is None:
+        if process.poll() is None:
             if force_stop_playback.is_set():
-                print("🛑 Force stop requested")
+                log.info("🛑 Force stop requested")
             else:
-                print("⏹️ Stopping omxplayer...")
-            safe_terminate_omxplayer(current_player_process)
+                log.info("⏹️ Stopping omxplayer...")
+            safe_terminate_omxplayer(process)
         
         current_player_process = None
-        print("✅ OMXPlayer cleanup complete")
+        current_video_path = None
+        clip_started_at = None
+        clip_end_time = time.monotonic()
+        log.info("✅ OMXPlayer cleanup complete")
         debug_thread_info()
         
         # Check if we should stay stopped
@@ -275,44 +428,38 @@ def omxplayer_play(video_path):
             return "stopped"  # Signal to stop playlist
         
     except FileNotFoundError:
-        print("❌ omxplayer not found - install with: sudo apt install omxplayer")
+        log.error("❌ omxplayer not found - install with: sudo apt install omxplayer")
+        metrics.FAILURES.inc()
+        events.publish("error", {"message": "omxplayer not found"})
         set_playback_state("stopped")
         return False
     except Exception as e:
-        print(f"❌ OMXPlayer error: {e}")
+        log.error(f"❌ OMXPlayer error: {e}")
+        metrics.FAILURES.inc()
+        events.publish("error", {"message": str(e), "file": os.path.basename(video_path)})
         set_playback_state("stopped")
         return False
     
-    set_playback_state("stopped")
+    if not player_ended_on_purpose:
+        set_playback_state("stopped")  # The command that ended it already set the state
     return True
 
 def cleanup_existing_omxplayers():
-    """Kill any existing omxplayer processes to prevent conflicts"""
+    """Kill any existing omxplayer processes to prevent conflicts (strays not started by us)"""
+    global stray_kills
     try:
         # Find all omxplayer processes
         result = subprocess.run(['pgrep', 'omxplayer'], 
                               capture_output=True, text=True)
         if result.returncode == 0:
-            pids = result.stdout.strip().split('\n')
+            pids = [int(pid) for pid in result.stdout.split() if pid]
             for pid in pids:
-                if pid:
-                    print(f"🔥 Killing existing OMXPlayer PID: {pid}")
-                    try:
-                        os.kill(int(pid), signal.SIGTERM)
-                        time.sleep(0.5)
-                        # Force kill if still running
-                        try:
-                            os.kill(int(pid), signal.SIGKILL)
-                        except:
-                            pass  # Already dead
-                    except:
-                        pass  # Process already gone
-        
-        # Brief pause to let cleanup finish
-        time.sleep(0.5)
+                log.warning(f"🔥 Killing existing OMXPlayer PID: {pid}")
+            # SIGTERM, then SIGKILL only for those still alive after 0.5 s
+            stray_kills += terminate_pids(pids, grace=0.5)
         
     except Exception as e:
-        print(f"⚠️ Error cleaning up existing players: {e}")
+        log.warning(f"⚠️ Error cleaning up existing players: {e}")
 
 def safe_terminate_omxplayer(process):
     """Safely terminate an OMXPlayer process"""
@@ -320,54 +467,39 @@ def safe_terminate_omxplayer(process):
         return  # Already dead
     
     try:
-        # Try graceful termination first
-        print("📤 Sending SIGTERM...")
-        process.terminate()
-        
-        # Wait up to 2 seconds for graceful exit
-        try:
-            process.wait(timeout=2)
-            print("✅ Process terminated gracefully")
+        if process is not player_supervisor.process:
+            terminate_pids([process.pid], grace=2)
             return
-        except subprocess.TimeoutExpired:
-            print("⏰ Graceful termination timed out")
-        
-        # Force kill if graceful didn't work
-        print("💥 Force killing process...")
-        process.kill()
-        
-        # Wait for force kill
-        try:
-            process.wait(timeout=1)
-            print("✅ Process force killed")
-        except subprocess.TimeoutExpired:
-            print("⚠️ Force kill timed out - process may be zombie")
         
-        # Kill entire process group if needed
-        try:
-            os.killpg(os.getpgid(process.pid), signal.SIGKILL)
-        except:
-            pass  # Process group already gone
+        # SIGTERM the whole group; returns as soon as it exits, SIGKILL only after 2 s
+        log.info("📤 Sending SIGTERM...")
+        if player_supervisor.stop(grace=2, kill_timeout=1):
+            log.info("✅ Process terminated")
+        else:
+            log.warning("⚠️ Force kill timed out - process may be zombie")
             
     except Exception as e:
-        print(f"⚠️ Error terminating process: {e}")
-    
-    # Final cleanup pause
-    time.sleep(0.5)
+        log.warning(f"⚠️ Error terminating process: {e}")
 
 def player_loop():
     """Main player loop using omxplayer"""
     global current_collection, current_collection_id, running
     global last_collection, last_collection_id, collection_changed
     
-    print(f"🎵 Starting OMXPlayer loop")
+    log.info(f"🎵 Starting OMXPlayer loop")
     debug_thread_info()
     
     while running and not shutdown_event.is_set():
         playlist = []
         collection_for_playback = None
+        handle_commands(0)  # Anything queued (e.g. the scheduled collection at boot) goes first
+        
+        if force_stop_playback.is_set():
+            # Stopped - only commands (/play, /set_collection) start playback again
+            handle_commands(5)
+            continue
         
-        # Check for collection changes
+        # Check for collection changes (only the snapshot is taken under the lock)
         with collection_lock:
             if (current_collection != last_collection or 
                 current_collection_id != last_collection_id or 
@@ -377,14 +509,20 @@ def player_loop():
                 last_collection = current_collection
                 last_collection_id = current_collection_id
                 collection_changed = False
-                
-                print(f"📦 Collection changed to: {collection_for_playback}")
-                playlist = get_playlist_files(collection_for_playback)
-                print(f"📁 Found {len(playlist)} video files")
+        
+        if collection_for_playback:
+            log.info(f"📦 Collection changed to: {collection_for_playback}")
+            playlist = get_playlist_files(collection_for_playback)
+            log.info(f"📁 Found {len(playlist)} video files")
+            events.publish("collection", {
+                "collection": os.path.basename(collection_for_playback),
+                "collection_id": last_collection_id,
+                "files": len(playlist)
+            })
         
         if not playlist:
-            print("😴 No playlist, sleeping...")
-            time.sleep(5)
+            log.info("😴 No playlist, waiting for commands...")
+            handle_commands(5)
             continue
         
         # Play files in playlist
@@ -392,33 +530,33 @@ def player_loop():
             if not running or shutdown_event.is_set():
                 return
             
-            # Check if collection changed during playback
+            # Check if collection changed (or playback was stopped) during playback
             with collection_lock:
                 if collection_changed or current_collection != collection_for_playback:
-                    print("🔄 Collection changed during playback")
+                    log.info("🔄 Collection changed during playback")
                     break
+            if force_stop_playback.is_set():
+                break
             
             success = omxplayer_play(file_path)
             if not success:
-                time.sleep(2)  # Brief pause on error
-            
-            # Brief pause between videos to prevent rapid starts
-            if running and not shutdown_event.is_set():
-                print("⏸️ Brief pause between videos...")
-                time.sleep(2)  # Increased from 1 to 2 seconds
+                handle_commands(2)  # Brief pause on error, so a broken file cannot respawn in a tight loop
 
 def cleanup():
     global running, current_player_process
-    print("🧹 Cleaning up OMXPlayer resources...")
+    log.info("🧹 Cleaning up OMXPlayer resources...")
     running = False
     shutdown_event.set()
     force_stop_playback.set()  # Stop any ongoing playback
+    commands.interrupt()  # The player thread may be waiting for commands or for omxplayer to start
+    if scheduler:
+        scheduler.stop()
     
     debug_thread_info()
     
     # Stop current player if running
     if current_player_process and current_player_process.poll() is None:
-        print("⏹️ Terminating current omxplayer...")
+        log.info("⏹️ Terminating current omxplayer...")
         safe_terminate_omxplayer(current_player_process)
         current_player_process = None
     
@@ -429,59 +567,13 @@ def cleanup():
     clear_screen()
     
     debug_thread_info()
-    print("👋 Cleanup complete!")
+    log.info("👋 Cleanup complete!")
 
 def signal_handler(sig, frame):
-    print(f"🛑 Received signal {sig}, cleaning up...")
+    log.info(f"🛑 Received signal {sig}, cleaning up...")
     cleanup()
     sys.exit(0)
 
-# Register signal handlers
-signal.signal(signal.SIGINT, signal_handler)
-signal.signal(signal.SIGTERM, signal_handler)
-atexit.register(cleanup)
-
-# Initialize collection - find where videos actually are
-print("🔍 Initializing media collections...")
-media_base_path, available_collections = get_collections()
-
-if available_collections:
-    if 'default' in available_collections:
-        # Videos are directly in base directory
-        current_collection = media_base_path
-    else:
-        # Videos are in subdirectories
-        current_collection = os.path.join(media_base_path, available_collections[0])
-    print(f"🎯 Initial collection: {current_collection}")
-    print(f"📁 Available collections: {available_collections}")
-    
-    # Trigger initial collection change to start playing
-    collection_changed = True
-    current_collection_id = 1
-    print("🚀 Marked initial collection for auto-start")
-else:
-    current_collection = "/media/internal"
-    print(f"⚠️ No collections found, using fallback: {current_collection}")
-    print("💡 Create test videos with:")
-    print("   sudo mkdir -p /media/internal/test")
-    print("   # Copy some .mp4 files to /media/internal/test/")
-
-# Initialize playback state and events
-paused_video_path = None
-# Note: force_pause_playback and force_stop_playback are defined above as Event objects
-# So we can safely clear them here
-force_pause_playback.clear()  # Make sure pause flag starts clear
-force_stop_playback.clear()   # Make sure stop flag starts clear
-set_playback_state("playing")  # Start in playing state, not stopped
-print(f"🎮 Initial playback state: {get_playback_state()}")
-print(f"🚨 Events initialized - force_stop: {force_stop_playback.is_set()}, force_pause: {force_pause_playback.is_set()}")
-
-# Start player thread
-player_thread = Thread(target=player_loop, daemon=True, name="PlayerThread")
-player_thread.start()
-print("🎬 Player thread started")
-debug_thread_info()
-
 # Flask app
 app = Flask(__name__)
 CORS(app)
@@ -490,49 +582,68 @@ CORS(app)
 def list_collections():
     return jsonify(available_collections)
 
-@app.route("/set_collection", methods=["POST"])
-def set_collection():
-    global current_collection, current_collection_id, collection_changed, current_player_process
-    global force_stop_playback, force_pause_playback  # Add explicit global declarations
-
-    collection = request.json.get("collection")
-    if not collection:
-        return jsonify({"status": "error", "message": "No collection specified"}), 400
+# ---- player commands (run on the player thread only) ----
 
-    if collection not in available_collections:
-        return jsonify({"status": "error", "message": "Invalid collection"}), 400
+def handle_commands(timeout):
+    """Player thread: wait up to timeout for commands (or the player exiting), then run them"""
+    global current_command
+    commands.wait(timeout)
+    while True:
+        command = commands.take()
+        if command is None:
+            return
+        current_command = command
+        try:
+            result = COMMAND_HANDLERS[command.kind](**command.args)
+            commands.finish(command, result)
+        except Exception as e:
+            log.error(f"❌ Command {command.kind} failed: {e}")
+            commands.finish(command, {"status": "error", "message": str(e)}, failed=True)
 
+def collection_path(collection):
+    """Directory of a collection name ('default' = videos directly in the base directory)"""
     if collection == 'default':
-        new_path = media_base_path
-    else:
-        new_path = os.path.join(media_base_path, collection)
+        return media_base_path
+    return os.path.join(media_base_path, collection)
+
+def do_switch(collection):
+    global current_collection, current_collection_id, collection_changed, current_player_process
+    global player_ended_on_purpose
+    global paused_video_path, paused_position_us
+
+    new_path = collection_path(collection)
+    
+    log.info(f"🔄 Collection change: {collection} -> {new_path}")
+    
+    # Whatever the play loop is on ends because of this switch - also a clip killed for pause
+    player_ended_on_purpose = True
     
-    print(f"🔄 Collection change request: {collection} -> {new_path}")
+    # Stop current playback with proper cleanup - no lock held while omxplayer exits
+    if current_player_process and current_player_process.poll() is None:
+        log.info("⏹️ Stopping current playback for collection change")
+        safe_terminate_omxplayer(current_player_process)
+        current_player_process = None
     
     with collection_lock:
-        # Stop current playback with proper cleanup
-        if current_player_process and current_player_process.poll() is None:
-            print("⏹️ Stopping current playback for collection change")
-            safe_terminate_omxplayer(current_player_process)
-            current_player_process = None
-        
-        # Extra cleanup to prevent conflicts
-        cleanup_existing_omxplayers()
-        
         current_collection_id += 1
         current_collection = new_path
         collection_changed = True
-        
-        # Start playing new collection automatically
-        force_stop_playback.clear()
-        set_playback_state("playing")
-        
+    
+    # A paused clip from the old collection must not be resumed
+    paused_video_path = None
+    paused_position_us = None
+    
+    # Start playing new collection automatically
+    force_stop_playback.clear()
+    force_pause_playback.clear()
+    set_playback_state("playing")
+    
     debug_thread_info()
-    return jsonify({
+    return {
         "status": "ok", 
         "collection": collection,
         "playback_state": get_playback_state()
-    })
+    }
 
 def clear_screen():
     """Clear the screen and make it black"""
@@ -555,96 +666,119 @@ def clear_screen():
             except:
                 continue  # Try next method
                 
-        print("🖥️ Screen cleared using available methods")
+        log.info("🖥️ Screen cleared using available methods")
     except Exception as e:
-        print(f"⚠️ Could not clear screen: {e}")
+        log.warning(f"⚠️ Could not clear screen: {e}")
 
-@app.route("/play", methods=["POST"])
-def play():
+def do_play():
     """Start playing or resume paused playback"""
-    global current_player_process, paused_video_path
-    global force_pause_playback, force_stop_playback  # Add explicit global declarations
+    global paused_video_path, paused_position_us, resume_requested_at, collection_changed
     current_state = get_playback_state()
     
-    print(f"▶️ Play requested (current state: {current_state})")
+    log.info(f"▶️ Play requested (current state: {current_state})")
     
     if current_state == "paused":
         # Clear pause flags and resume
         force_pause_playback.clear()
+        resume_requested_at = current_command.submitted  # Latency counts from the request, queueing included
+        
+        # Primary path: the process is still alive and paused - D-Bus Play continues in place
+        process_alive = current_player_process is not None and current_player_process.poll() is None
+        if process_alive and omx_control.connected and omx_control.play():
+            log.info(f"🔄 Resumed in place: {os.path.basename(paused_video_path or '')}")
+            record_resume_latency("dbus")
+            paused_video_path = None
+            paused_position_us = None
+            set_playback_state("playing")
+            return {"status": "resumed", "state": "playing", "mode": "dbus",
+                    "resume_latency_ms": last_resume_latency_ms}
         
         if paused_video_path and os.path.exists(paused_video_path):
-            print(f"🔄 Resuming video: {os.path.basename(paused_video_path)}")
+            # Process was killed - the player loop restarts it with --pos and records the latency
+            log.info(f"🔄 Resuming video: {os.path.basename(paused_video_path)} at {format_position(paused_position_us or 0)}")
             set_playback_state("playing")
-            paused_video_path = None  # Clear paused state
-            return jsonify({"status": "resumed", "state": "playing", "message": "Resuming paused video"})
+            return {"status": "resumed", "state": "playing", "mode": "respawn",
+                    "message": "Resuming paused video"}
         else:
             # No paused video, just start normal playback
             force_stop_playback.clear()
             set_playback_state("playing")
-            return jsonify({"status": "started", "state": "playing"})
+            return {"status": "started", "state": "playing"}
     
     elif current_state == "stopped":
-        # Start playing from stopped state
+        # Start playing from stopped state - the current collection from its first clip
         force_stop_playback.clear()
         force_pause_playback.clear()
+        with collection_lock:
+            collection_changed = True
         set_playback_state("playing") 
-        return jsonify({"status": "started", "state": "playing"})
+        return {"status": "started", "state": "playing"}
     
     elif current_state == "playing":
-        return jsonify({"status": "already_playing", "state": "playing"})
+        return {"status": "already_playing", "state": "playing"}
     
-    return jsonify({"status": "error", "message": "Unknown playback state"})
+    return {"status": "error", "message": "Unknown playback state"}
 
-@app.route("/pause", methods=["POST"])
-def pause():
+def do_pause():
     """Pause current video playback immediately"""
-    global current_player_process, paused_video_path
-    global force_pause_playback  # Add explicit global declaration
+    global current_player_process, paused_video_path, paused_position_us
     current_state = get_playback_state()
     
-    print(f"⏸️ IMMEDIATE Pause requested (current state: {current_state})")
+    log.info(f"⏸️ Pause (current state: {current_state})")
     
     if current_state == "playing":
         if current_player_process and current_player_process.poll() is None:
             # Set immediate pause flag for fastest response
             force_pause_playback.set()
+            paused_video_path = current_video_path
+            paused_position_us = current_position_us()
+            
+            # Primary path: D-Bus Pause keeps the process and the hardware decoder warm
+            if omx_control.connected and omx_control.pause():
+                set_playback_state("paused")
+                log.info(f"💾 Paused in place at {format_position(paused_position_us or 0)}")
+                return {
+                    "status": "paused",
+                    "state": "paused",
+                    "mode": "dbus",
+                    "position_us": paused_position_us
+                }
             
-            # Set state to paused FIRST
+            # Set state to paused FIRST so the player thread keeps our place in the playlist
             set_playback_state("paused")
             
-            print("💾 Pausing playback (stopping process immediately)")
+            log.info("💾 Pausing playback (stopping process, will resume with --pos)")
             
             # Force kill the process immediately - no graceful termination
             try:
-                print(f"🔥 Force killing OMXPlayer PID: {current_player_process.pid}")
-                current_player_process.kill()  # Immediate SIGKILL
-                current_player_process.wait(timeout=1)  # Wait briefly for cleanup
+                log.info(f"🔥 Force killing OMXPlayer PID: {current_player_process.pid}")
+                player_supervisor.kill(timeout=1)  # Immediate SIGKILL of the process group
             except Exception as e:
-                print(f"⚠️ Error force killing: {e}")
+                log.warning(f"⚠️ Error force killing: {e}")
             
             current_player_process = None
             
-            return jsonify({
+            return {
                 "status": "paused", 
                 "state": "paused", 
+                "mode": "respawn",
+                "position_us": paused_position_us,
                 "message": "Video paused immediately"
-            })
+            }
         else:
-            return jsonify({"status": "error", "message": "No video currently playing"})
+            return {"status": "error", "message": "No video currently playing"}
     
     elif current_state == "paused":
-        return jsonify({"status": "already_paused", "state": "paused"})
+        return {"status": "already_paused", "state": "paused"}
     
     else:
-        return jsonify({"status": "error", "message": "Nothing to pause", "state": current_state})
+        return {"status": "error", "message": "Nothing to pause", "state": current_state}
 
-@app.route("/stop", methods=["POST"])
-def stop():
+def do_stop():
     """Stop playback completely and clear screen"""
-    global current_player_process, paused_video_path
-    global force_pause_playback, force_stop_playback  # Add explicit global declarations
+    global current_player_process, paused_video_path, paused_position_us, player_ended_on_purpose
     
-    print("⏹️ Stop requested - will stop playlist and clear screen")
+    log.info("⏹️ Stop - will stop playlist and clear screen")
     
     # Set force stop flag to prevent new videos from starting
     force_stop_playback.set()
@@ -653,58 +787,178 @@ def stop():
     
     # Clear paused video tracking
     paused_video_path = None
+    paused_position_us = None
     
     # Stop current player if running
     if current_player_process and current_player_process.poll() is None:
-        print("🛑 Stopping current playback")
+        log.info("🛑 Stopping current playback")
+        player_ended_on_purpose = True
         safe_terminate_omxplayer(current_player_process)
         current_player_process = None
     
-    # Extra cleanup to prevent conflicts
-    cleanup_existing_omxplayers()
-    
     # Clear the screen 
     clear_screen()
     
-    return jsonify({
+    return {
         "status": "stopped", 
         "state": "stopped", 
         "message": "Playback stopped and screen cleared"
-    })
+    }
 
-@app.route("/next", methods=["POST"])
-def next_track():
+def do_next():
     """Skip to next track (only works if currently playing)"""
-    global current_player_process
+    global current_player_process, paused_video_path, paused_position_us, player_ended_on_purpose
     current_state = get_playback_state()
     
-    print(f"⏭️ Next track requested (current state: {current_state})")
+    log.info(f"⏭️ Next track (current state: {current_state})")
+    
+    if current_state == "paused" and (current_player_process is None or current_player_process.poll() is not None):
+        if paused_video_path:
+            # Killed for pause - drop the saved position, the player thread moves on
+            player_ended_on_purpose = True
+            paused_video_path = None
+            paused_position_us = None
+            force_pause_playback.clear()
+            set_playback_state("playing")
+            metrics.SKIPS.inc()
+            return {"status": "skipped", "state": "playing"}
     
     if current_state in ["playing", "paused"]:
         if current_player_process and current_player_process.poll() is None:
-            print("🛑 Stopping current track for next")
-            safe_terminate_omxplayer(current_player_process)
-            current_player_process = None
+            log.info("🛑 Stopping current track for next")
+            player_ended_on_purpose = True
+            # OPTIMIZATION: MPRIS Stop makes omxplayer exit by itself; the player loop moves on
+            if not omx_control.stop():
+                safe_terminate_omxplayer(current_player_process)
+                current_player_process = None
             
             # Don't set force_stop - let it continue to next video
+            paused_video_path = None
+            paused_position_us = None
+            force_pause_playback.clear()
             set_playback_state("playing")
+            metrics.SKIPS.inc()
             
-            return jsonify({"status": "skipped", "state": "playing"})
+            return {"status": "skipped", "state": "playing"}
         else:
-            return jsonify({"status": "error", "message": "No track currently playing"})
+            return {"status": "error", "message": "No track currently playing"}
     
     elif current_state == "stopped":
-        return jsonify({"status": "error", "message": "Cannot skip when stopped. Use /play to start.", "state": "stopped"})
+        return {"status": "error", "message": "Cannot skip when stopped. Use /play to start.", "state": "stopped"}
     
-    return jsonify({"status": "error", "message": "Unknown state"})
+    return {"status": "error", "message": "Unknown state"}
 
-@app.route("/status", methods=["GET"])
-def get_status():
-    """Get current system and playback status"""
-    global paused_video_path  # Add global declaration
-    
+def do_cleanup():
+    """Kill every omxplayer process - our own child and any strays"""
+    global current_player_process
+    log.info("🚨 Emergency cleanup")
+    if player_supervisor.running():
+        player_supervisor.kill(timeout=1)  # The play loop sees the exit and moves on
+    current_player_process = None
+    cleanup_existing_omxplayers()
+    return {"status": "cleaned_up", "message": "All OMXPlayer processes terminated"}
+
+COMMAND_HANDLERS = {
+    "switch": do_switch,
+    "play": do_play,
+    "pause": do_pause,
+    "stop": do_stop,
+    "next": do_next,
+    "cleanup": do_cleanup,
+}
+
+# ---- API: routes only queue commands ----
+
+def queue_command(kind, **args):
+    """Submit a command; 202 with its id at once, or its result with ?wait=1"""
+    command = commands.submit(kind, **args)
+    if request.args.get("wait") and command.done.wait(COMMAND_WAIT):
+        return jsonify(command.to_dict())
+    return jsonify(command.to_dict()), 202
+
+@app.route("/set_collection", methods=["POST"])
+def set_collection():
+    global switch_requested_at
+    collection = request.json.get("collection")
+    if not collection:
+        return jsonify({"status": "error", "message": "No collection specified"}), 400
+
+    if collection not in available_collections:
+        return jsonify({"status": "error", "message": "Invalid collection"}), 400
+
+    log.info(f"🔄 Collection change request: {collection}")
+    switch_requested_at = time.monotonic()
+    return queue_command("switch", collection=collection)
+
+@app.route("/play", methods=["POST"])
+def play():
+    """Start playing or resume paused playback"""
+    log.info(f"▶️ Play requested (current state: {get_playback_state()})")
+    return queue_command("play")
+
+@app.route("/pause", methods=["POST"])
+def pause():
+    """Pause current video playback"""
+    log.info(f"⏸️ Pause requested (current state: {get_playback_state()})")
+    return queue_command("pause")
+
+@app.route("/stop", methods=["POST"])
+def stop():
+    """Stop playback completely and clear screen"""
+    log.info("⏹️ Stop requested")
+    return queue_command("stop")
+
+@app.route("/next", methods=["POST"])
+def next_track():
+    """Skip to next track"""
+    log.info(f"⏭️ Next track requested (current state: {get_playback_state()})")
+    return queue_command("next")
+
+def scheduled_switch(collection):
+    global switch_requested_at
+    if collection not in available_collections:
+        log.warning(f"⚠️ Scheduled collection {collection} not found")
+        return
+    switch_requested_at = time.monotonic()
+    commands.submit("switch", collection=collection)
+
+def prewarm_collection(collection):
+    """Load the collection's playlist before the scheduled switch needs it"""
+    get_playlist_files(collection_path(collection))
+
+@app.route("/schedule", methods=["GET"])
+def get_schedule():
+    """Upcoming scheduled collection changes"""
+    if not scheduler:
+        return jsonify({"status": "error", "message": "No schedule loaded"}), 404
+    return jsonify(scheduler.status())
+
+@app.route("/schedule/reload", methods=["POST"])
+def reload_schedule():
+    """Re-read the schedule file after editing it"""
+    if not scheduler:
+        return jsonify({"status": "error", "message": "No schedule loaded"}), 404
+    scheduler.load()
+    return jsonify(scheduler.status())
+
+@app.route("/commands/<int:command_id>", methods=["GET"])
+def command_status(command_id):
+    """State of a queued command: queued, running, done, failed or superseded, with timings"""
+    command = commands.get(command_id)
+    if command is None:
+        return jsonify({"status": "error", "message": "Unknown command id"}), 404
+    return jsonify(command.to_dict())
+
+@app.route("/commands", methods=["GET"])
+def list_commands():
+    """The most recent commands, oldest first"""
+    return jsonify({"pending": commands.pending, "commands": commands.recent()})
+
+def build_status():
+    """Status snapshot shared by /status and the first /events message"""
     thread_count = threading.active_count()
-    is_omx_running = current_player_process is not None and current_player_process.poll() is None
+    process = current_player_process  # The player thread may clear the global meanwhile
+    is_omx_running = process is not None and process.poll() is None
     current_state = get_playback_state()
     
     status_info = {
@@ -713,16 +967,45 @@ def get_status():
         "current_collection": os.path.basename(current_collection),
         "collection_id": current_collection_id,
         "playback_state": current_state,
+        "current_file": os.path.basename(current_video_path) if current_video_path else None,
+        "current_media": current_media.to_dict() if current_media else None,
         "omxplayer_running": is_omx_running,
-        "force_stop_set": force_stop_playback.is_set()
+        "force_stop_set": force_stop_playback.is_set(),
+        "commands_pending": commands.pending,
+        "event_clients": events.client_count
     }
     
     # Add paused video info if relevant
     if current_state == "paused" and paused_video_path:
         status_info["paused_video"] = os.path.basename(paused_video_path)
         status_info["paused_video_exists"] = os.path.exists(paused_video_path)
+        status_info["paused_position"] = format_position(paused_position_us or 0)
+    
+    # Time from the last /play request until video was running again
+    status_info["resume_latency_ms"] = last_resume_latency_ms
+    status_info["resume_mode"] = last_resume_mode
     
-    return jsonify(status_info)
+    return status_info
+
+@app.route("/status", methods=["GET"])
+def get_status():
+    """Get current system and playback status"""
+    return jsonify(build_status())
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    """Prometheus text format: clip counters, start/gap/switch latency histograms, process gauges"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route("/events", methods=["GET"])
+def event_stream():
+    """Server-Sent Events: state, track, collection and error messages as they happen"""
+    if events.client_count >= EVENT_CLIENT_LIMIT:
+        # Each stream holds a worker thread - refuse rather than starve the control routes
+        return jsonify({"status": "error", "message": "Too many event clients"}), 503
+    return Response(events.stream(initial=("status", build_status())),
+                    mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.route("/debug", methods=["GET"])
 def debug_status():
@@ -741,7 +1024,7 @@ def debug_status():
         "current_collection": current_collection,
         "available_collections": available_collections,
         "thread_count": thread_count,
-        "omxplayer_running": current_player_process is not None and current_player_process.poll() is None
+        "omxplayer_running": player_supervisor.running()
     }
     
     if paused_video_path:
@@ -753,36 +1036,100 @@ def debug_status():
 @app.route("/emergency_cleanup", methods=["POST"])
 def emergency_cleanup():
     """Emergency endpoint to kill all OMXPlayer processes"""
-    global current_player_process  # Add global declaration
-    
-    print("🚨 Emergency cleanup requested")
-    current_player_process = None
-    cleanup_existing_omxplayers()
-    
-    return jsonify({"status": "cleaned_up", "message": "All OMXPlayer processes terminated"})
+    log.info("🚨 Emergency cleanup requested")
+    return queue_command("cleanup")
 
 def run_flask_app():
-    app.run(host="0.0.0.0", port=5000, threaded=True, use_reloader=False, debug=False)
+    # OPTIMIZATION: Fixed worker pool (or waitress) instead of a thread per request
+    serve(app, host="0.0.0.0", port=5000)
 
-# Start Flask
-flask_thread = Thread(target=run_flask_app, daemon=True, name="FlaskThread")
-flask_thread.start()
-print("🌐 Flask started")
-debug_thread_info()
+def initialize_collections():
+    """Find where the videos actually are and pick the first collection"""
+    global media_base_path, available_collections, current_collection, collection_changed, current_collection_id
+    log.info("🔍 Initializing media collections...")
+    media_base_path, available_collections = get_collections()
 
-# Main thread monitoring
-print("💓 Main thread running with OMXPlayer backend...")
-try:
-    while running and not shutdown_event.is_set():
-        time.sleep(0.5)
-        thread_count = threading.active_count()
-        print(f"💓 Heartbeat - Threads: {thread_count}")
-        if thread_count > 5:
-            print("⚠️ High thread count detected:")
-            debug_thread_info()
-except KeyboardInterrupt:
-    print("🛑 Keyboard interrupt")
-    cleanup()
+    if available_collections:
+        if 'default' in available_collections:
+            # Videos are directly in base directory
+            current_collection = media_base_path
+        else:
+            # Videos are in subdirectories
+            current_collection = os.path.join(media_base_path, available_collections[0])
+        log.info(f"🎯 Initial collection: {current_collection}")
+        log.info(f"📁 Available collections: {available_collections}")
+
+        # Trigger initial collection change to start playing
+        collection_changed = True
+        current_collection_id = 1
+        log.info("🚀 Marked initial collection for auto-start")
+    else:
+        current_collection = "/media/internal"
+        log.warning(f"⚠️ No collections found, using fallback: {current_collection}")
+        log.info("💡 Create test videos with:")
+        log.info("   sudo mkdir -p /media/internal/test")
+        log.info("   # Copy some .mp4 files to /media/internal/test/")
+
+def main():
+    global scheduler
+    setup_logging("omxplayer")  # Same logger as the module-level `log`
+    log.info("🎬 mp4museum - OMXPlayer Alternative")
+    log.info("🚀 Using omxplayer instead of VLC to avoid threading issues")
+    log.info(f"🔌 In-process D-Bus control: {'enabled' if omx_control.available else 'unavailable (python3-dbus missing), using dbus-send'}")
+
+    # Register signal handlers
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    atexit.register(cleanup)
+
+    # Initialize collection - find where videos actually are
+    initialize_collections()
+    if os.path.exists(SCHEDULE_FILE):
+        # Queues the collection due now; the player thread runs it before the first clip
+        scheduler = Scheduler(scheduled_switch, prewarm_collection).start()
+
+    # Initialize playback state and events
+    # Note: force_pause_playback and force_stop_playback are defined above as Event objects
+    # So we can safely clear them here
+    force_pause_playback.clear()  # Make sure pause flag starts clear
+    force_stop_playback.clear()   # Make sure stop flag starts clear
+    set_playback_state("playing")  # Start in playing state, not stopped
+    log.info(f"🎮 Initial playback state: {get_playback_state()}")
+    log.debug(f"🚨 Events initialized - force_stop: {force_stop_playback.is_set()}, force_pause: {force_pause_playback.is_set()}")
+
+    # Strays from a previous run would fight over the display - clear them once at startup
+    cleanup_existing_omxplayers()
+
+    # Start player thread
+    player_thread = Thread(target=player_loop, daemon=True, name="PlayerThread")
+    player_thread.start()
+    log.info("🎬 Player thread started")
+    debug_thread_info()
+
+    # Start Flask
+    flask_thread = Thread(target=run_flask_app, daemon=True, name="FlaskThread")
+    flask_thread.start()
+    log.info("🌐 Flask started")
+    debug_thread_info()
+
+    # Main thread monitoring
+    log.info("💓 Main thread running with OMXPlayer backend...")
+    try:
+        while running and not shutdown_event.is_set():
+            # OPTIMIZATION: Wake every 5 s instead of 0.5 s; heartbeat only at DEBUG level
+            shutdown_event.wait(5)
+            thread_count = threading.active_count()
+            log.debug(f"💓 Heartbeat - Threads: {thread_count}")
+            # Expected: main, player, API acceptor + its worker pool, reaper, D-Bus/event helpers
+            if thread_count > SERVER_THREADS + 5:
+                names = ", ".join(thread.name for thread in threading.enumerate())
+                log.warning(f"⚠️ High thread count detected: {thread_count} ({names})")
+    except KeyboardInterrupt:
+        log.info("🛑 Keyboard interrupt")
+        cleanup()
+
+    log.info("🏁 Main thread exiting")
+    debug_thread_info()
 
-print("🏁 Main thread exiting")
-debug_thread_info()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# mp4museum - keep the start of clip files in RAM
+# A cold open from the SD card costs tens of ms before VLC even sees the first packet.
+# pin_file() maps the first N MB of a file, asks the kernel to read it in
+# (posix_fadvise/madvise WILLNEED) and, where RLIMIT_MEMLOCK allows, mlock()s the range
+# so it stays resident. Without mlock the pages are merely warm.
+
+import os
+import ctypes
+import ctypes.util
+import logging
+
+log = logging.getLogger("mp4museum.pagecache")
+
+# <sys/mman.h>
+PROT_READ = 0x1
+MAP_SHARED = 0x01
+MADV_WILLNEED = 3
+MAP_FAILED = ctypes.c_void_p(-1).value
+
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    _libc.mmap.restype = ctypes.c_void_p
+    _libc.mmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_int,
+                           ctypes.c_int, ctypes.c_long]
+    _libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+    _libc.madvise.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int]
+    _libc.mlock.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+    _libc.munlock.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+except (OSError, AttributeError):
+    _libc = None  # Not Linux/glibc - readahead hint only
+
+
+class PinnedRegion:
+    """The mapped (and possibly locked) head of one file"""
+
+    def __init__(self, path, address, length, locked):
+        self.path = path
+        self.address = address
+        self.length = length
+        self.locked = locked
+
+    def close(self):
+        if self.address is None:
+            return
+        if self.locked:
+            _libc.munlock(self.address, self.length)
+        _libc.munmap(self.address, self.length)
+        self.address = None
+
+
+def pin_file(path, megabytes):
+    """Read the first megabytes of path into the page cache and try to keep them there.
+    Returns a PinnedRegion (close() releases it), or None if only a readahead hint was given."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError as e:
+        log.warning(f"⚠️ Cannot open {path} for pre-warming: {e}")
+        return None
+    try:
+        length = min(os.fstat(fd).st_size, int(megabytes * 1024 * 1024))
+        if length <= 0:
+            return None
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, length, os.POSIX_FADV_WILLNEED)  # Start readahead now
+        if _libc is None:
+            return None
+        address = _libc.mmap(None, length, PROT_READ, MAP_SHARED, fd, 0)
+        if address in (None, MAP_FAILED):
+            return None
+    except OSError as e:
+        log.warning(f"⚠️ Cannot pre-warm {path}: {e}")
+        return None
+    finally:
+        os.close(fd)  # The mapping keeps its own reference
+
+    _libc.madvise(address, length, MADV_WILLNEED)
+    # mlock() also faults every page in; it fails with EPERM/ENOMEM above RLIMIT_MEMLOCK
+    locked = _libc.mlock(address, length) == 0
+    return PinnedRegion(path, address, length, locked)
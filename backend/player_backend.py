@@ -0,0 +1,300 @@
+# mp4museum - player backends for mp4museum.py
+# The playback loop talks to a small backend interface instead of python-vlc directly:
+#
+#   new_media(source) / preparse(media) / release_media(media) / set_repeat(media, count)
+#   play(media), pause(), resume(), stop(), state(), close()
+#   position() / duration() in seconds, seek(seconds), set_rate(rate) - used by sync_engine
+#   on_end, on_error, on_first_frame - callables the backend invokes (from its own thread)
+#
+# VLCBackend is the real thing. SimulatedBackend plays nothing: it reports the first frame
+# after a configurable startup delay and the end after a configurable clip duration, so
+# the whole backend can run and be benchmarked headless (CI, a laptop) without vlc. Its clock
+# can run fast or slow (clock_error) to exercise the multi-screen sync.
+#
+# Selected with MP4MUSEUM_PLAYER=vlc (default) | simulated; the simulator reads
+# MP4MUSEUM_SIM_CLIP_SECONDS (default 5) and MP4MUSEUM_SIM_STARTUP_MS (default 50).
+#
+# OPTIMIZATION: python-vlc (and with it libvlc) is imported when a VLCBackend is created,
+# not when this module is imported, so the API can come up before libvlc loads.
+
+import os
+import time
+import heapq
+import logging
+from threading import Thread, Condition
+
+vlc = None  # python-vlc, imported by VLCBackend
+
+log = logging.getLogger("mp4museum.backend")
+
+# Backend-neutral player states
+IDLE, OPENING, PLAYING, PAUSED, ENDED, STOPPED, ERROR = (
+    "idle", "opening", "playing", "paused", "ended", "stopped", "error")
+FINISHED_STATES = (ENDED, STOPPED, ERROR)
+
+
+def _noop():
+    pass
+
+
+class VLCBackend:
+    """One shared vlc.Instance and MediaPlayer"""
+
+    name = "vlc"
+
+    def __init__(self, audiodevice="0"):
+        global vlc
+        if vlc is None:
+            try:
+                import vlc
+            except ImportError:
+                raise RuntimeError("python-vlc is not installed (pip3 install python-vlc)")
+        self.instance = vlc.Instance('-q -A alsa --alsa-audio-device hw:' + audiodevice)
+        self.player = self.instance.media_player_new()
+        self.on_end = self.on_error = self.on_first_frame = _noop
+        self.states = {
+            vlc.State.NothingSpecial: IDLE, vlc.State.Opening: OPENING, vlc.State.Buffering: OPENING,
+            vlc.State.Playing: PLAYING, vlc.State.Paused: PAUSED, vlc.State.Stopped: STOPPED,
+            vlc.State.Ended: ENDED, vlc.State.Error: ERROR,
+        }
+
+        # Set up event handling for playback completion
+        event_manager = self.player.event_manager()
+        event_manager.event_attach(vlc.EventType.MediaPlayerEndReached, lambda event: self.on_end())
+        event_manager.event_attach(vlc.EventType.MediaPlayerEncounteredError, lambda event: self.on_error())
+        event_manager.event_attach(vlc.EventType.MediaPlayerVout, self._on_vout)
+
+    def _on_vout(self, event):
+        if getattr(event.u, "new_count", 1) >= 1:
+            self.on_first_frame()
+
+    def new_media(self, source):
+        return self.instance.media_new(source)
+
+    def preparse(self, media):
+        media.parse_with_options(vlc.MediaParseFlag.local, -1)  # Asynchronous, returns immediately
+
+    def release_media(self, media):
+        media.release()
+
+    def set_repeat(self, media, count):
+        media.add_option(f"input-repeat={count}")
+
+    def play(self, media):
+        self.player.set_media(media)
+        self.player.play()
+
+    def pause(self):
+        self.player.pause()
+
+    def resume(self):
+        self.player.play()
+
+    def stop(self):
+        self.player.stop()
+
+    def state(self):
+        return self.states.get(self.player.get_state(), IDLE)
+
+    def position(self):
+        return max(0, self.player.get_time()) / 1000.0
+
+    def duration(self):
+        length = self.player.get_length()
+        return length / 1000.0 if length > 0 else None
+
+    def seek(self, seconds):
+        self.player.set_time(int(seconds * 1000))
+
+    def set_rate(self, rate):
+        self.player.set_rate(rate)
+
+    def close(self):
+        self.player.stop()
+        self.player.release()
+        self.instance.release()
+
+
+class SimulatedMedia:
+    __slots__ = ("source", "repeat", "parsed")
+
+    def __init__(self, source):
+        self.source = source
+        self.repeat = 0
+        self.parsed = False
+
+
+class SimulatedBackend:
+    """Headless stand-in: timed first-frame and end events and a playback clock, no decoding"""
+
+    name = "simulated"
+
+    def __init__(self, clip_seconds=5.0, startup_ms=50.0, preparsed_startup_ms=None, durations=None,
+                 clock_error=0.0):
+        self.clip_seconds = clip_seconds
+        self.startup = startup_ms / 1000.0
+        # A pre-parsed clip skips probing, like VLC - default: a quarter of the cold startup
+        self.preparsed_startup = (startup_ms / 4 if preparsed_startup_ms is None else preparsed_startup_ms) / 1000.0
+        self.durations = durations  # Optional callable(source) -> seconds
+        self.clock_error = clock_error  # e.g. 0.001 plays 0.1 % fast, like a drifting crystal
+        self.on_end = self.on_error = self.on_first_frame = _noop
+        self.cond = Condition()
+        self.timers = []  # heap of (due, generation, kind)
+        self.generation = 0  # Bumped on every play/stop so stale timers are ignored
+        self.current = None
+        self._state = IDLE
+        self.rate = 1.0  # Like VLC, the rate belongs to the player and survives play()
+        self.pos_at = 0.0  # Position in seconds at `anchor`
+        self.anchor = None
+        self.closed = False
+        Thread(target=self._timer_loop, daemon=True, name="SimulatedPlayer").start()
+
+    def _clip_length(self, media):
+        return self.durations(media.source) if self.durations else self.clip_seconds
+
+    def _speed(self):
+        return self.rate * (1.0 + self.clock_error)
+
+    def _position(self, now):
+        if self._state == PLAYING:
+            return self.pos_at + (now - self.anchor) * self._speed()
+        return self.pos_at
+
+    def _schedule(self, delay, kind):
+        heapq.heappush(self.timers, (time.monotonic() + delay, self.generation, kind))
+        self.cond.notify()
+
+    def _rearm(self, now):
+        """Re-anchor the clock at now and reschedule the end - caller holds the lock"""
+        self.pos_at = self._position(now)
+        self.anchor = now
+        if self._state == PLAYING:
+            self.generation += 1
+            total = self._clip_length(self.current) * (self.current.repeat + 1)
+            self._schedule(max(0.0, total - self.pos_at) / self._speed(), "end")
+
+    def new_media(self, source):
+        return SimulatedMedia(source)
+
+    def preparse(self, media):
+        media.parsed = True
+
+    def release_media(self, media):
+        pass
+
+    def set_repeat(self, media, count):
+        media.repeat = count
+
+    def play(self, media):
+        with self.cond:
+            self.generation += 1
+            self.current = media
+            self._state = OPENING
+            self.pos_at = 0.0
+            self._schedule(self.preparsed_startup if media.parsed else self.startup, "first_frame")
+
+    def pause(self):
+        with self.cond:
+            if self._state != PLAYING:
+                return
+            self._rearm(time.monotonic())
+            self.generation += 1  # Cancels the pending end
+            self._state = PAUSED
+
+    def resume(self):
+        with self.cond:
+            if self._state == PAUSED:
+                now = time.monotonic()
+                self.anchor = now  # The clock stood still while paused
+                self._state = PLAYING
+                self._rearm(now)
+                return
+            media = self.current if self._state in (STOPPED, ENDED) else None
+        if media is not None:
+            self.play(media)  # VLC's play() after stop starts the media over
+
+    def stop(self):
+        with self.cond:
+            self.generation += 1
+            if self._state != IDLE:
+                self._state = STOPPED
+
+    def state(self):
+        return self._state
+
+    def position(self):
+        with self.cond:
+            if self.current is None:
+                return 0.0
+            # Loop clips restart their clock on every repeat, like VLC's input-repeat
+            return self._position(time.monotonic()) % self._clip_length(self.current)
+
+    def duration(self):
+        return self._clip_length(self.current) if self.current is not None else None
+
+    def seek(self, seconds):
+        with self.cond:
+            if self.current is None:
+                return
+            now = time.monotonic()
+            self._rearm(now)
+            repeat_start = self.pos_at - self.pos_at % self._clip_length(self.current)
+            self.pos_at = repeat_start + max(0.0, seconds)
+            self._rearm(now)
+
+    def set_rate(self, rate):
+        with self.cond:
+            self._rearm(time.monotonic())
+            self.rate = rate
+            if self.current is not None:
+                self._rearm(time.monotonic())
+
+    def close(self):
+        with self.cond:
+            self.generation += 1
+            self.closed = True
+            self._state = STOPPED
+            self.cond.notify()
+
+    def _timer_loop(self):
+        while True:
+            with self.cond:
+                while not self.closed and not self.timers:
+                    self.cond.wait()
+                if self.closed:
+                    return
+                due, generation, kind = self.timers[0]
+                now = time.monotonic()
+                if due > now:
+                    self.cond.wait(due - now)
+                    continue
+                heapq.heappop(self.timers)
+                if generation != self.generation:
+                    continue  # Cancelled by play/pause/seek/stop
+                if kind == "first_frame":
+                    self._state = PLAYING
+                    self.anchor = now
+                    self._rearm(now)
+                else:
+                    self._state = ENDED
+                    self.pos_at = self._clip_length(self.current) * (self.current.repeat + 1)
+            # Callbacks outside the lock, like VLC's event thread
+            if kind == "first_frame":
+                self.on_first_frame()
+            else:
+                self.on_end()
+
+
+def create_backend(name=None, audiodevice="0"):
+    """Backend selected by name or MP4MUSEUM_PLAYER"""
+    name = name or os.environ.get("MP4MUSEUM_PLAYER", "vlc")
+    if name == "simulated":
+        backend = SimulatedBackend(
+            clip_seconds=float(os.environ.get("MP4MUSEUM_SIM_CLIP_SECONDS", "5")),
+            startup_ms=float(os.environ.get("MP4MUSEUM_SIM_STARTUP_MS", "50")))
+    elif name == "vlc":
+        backend = VLCBackend(audiodevice)
+    else:
+        raise ValueError(f"Unknown player backend: {name}")
+    log.info(f"🎛️ Player backend: {backend.name}")
+    return backend
@@ -0,0 +1,162 @@
+# mp4museum - child process supervisor for the player backends
+# Owns the child's process group, learns about its exit from a pidfd (or a blocking
+# wait() on kernels without pidfd) and only escalates to SIGKILL when SIGTERM was ignored.
+# Nothing in here sleeps for a fixed time.
+
+import os
+import logging
+import time
+import select
+import signal
+import subprocess
+from threading import Thread, Event, Lock
+
+log = logging.getLogger("mp4museum.supervisor")
+
+
+def _pidfd_open(pid):
+    """pidfd for pid, or None (Python < 3.9, kernel < 5.3, or pid already gone)"""
+    if not hasattr(os, "pidfd_open"):
+        return None
+    try:
+        return os.pidfd_open(pid)
+    except OSError:
+        return None
+
+
+def _signal_group(pgid, sig):
+    try:
+        os.killpg(pgid, sig)
+        return True
+    except (ProcessLookupError, PermissionError):
+        return False
+
+
+class ProcessSupervisor:
+    """Runs one child at a time in its own process group"""
+
+    def __init__(self, name="child"):
+        self.name = name
+        self.lock = Lock()
+        self.process = None
+        self.pgid = None
+        self.exited = Event()
+        self.exited.set()  # Nothing running yet
+        self.started_at = None
+        self.exit_code = None
+        self.kills = 0  # How often SIGKILL was needed
+        self.on_exit = None  # Optional callable, run on the reaper thread once a child exited
+
+    def start(self, cmd, **popen_kwargs):
+        """Start cmd in a new session/process group and begin watching it"""
+        with self.lock:
+            if self.process is not None and not self.exited.is_set():
+                raise RuntimeError(f"{self.name} is already running (PID {self.process.pid})")
+            popen_kwargs.setdefault("stdout", subprocess.DEVNULL)
+            popen_kwargs.setdefault("stderr", subprocess.DEVNULL)
+            process = subprocess.Popen(cmd, start_new_session=True, **popen_kwargs)
+            self.process = process
+            self.pgid = process.pid  # New session: the child leads its own group
+            self.exit_code = None
+            self.started_at = time.monotonic()
+            self.exited.clear()
+        Thread(target=self._reap, args=(process,), daemon=True,
+               name=f"Reaper-{self.name}-{process.pid}").start()
+        return process
+
+    def _reap(self, process):
+        """Block until the child exits, then reap it and wake every waiter"""
+        pidfd = _pidfd_open(process.pid)
+        try:
+            if pidfd is not None:
+                select.select([pidfd], [], [])  # Readable once the child has exited
+            process.wait()
+        finally:
+            if pidfd is not None:
+                os.close(pidfd)
+        with self.lock:
+            if process is self.process:
+                self.exit_code = process.returncode
+                self.exited.set()
+        if self.on_exit is not None:
+            self.on_exit()
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process is not None else None
+
+    def running(self):
+        return self.process is not None and not self.exited.is_set()
+
+    def wait(self, timeout=None):
+        """Wait for the current child to exit; True if it has"""
+        return self.exited.wait(timeout)
+
+    def stop(self, grace=2.0, kill_timeout=1.0):
+        """SIGTERM the process group, SIGKILL only if it is still there after grace seconds"""
+        if not self.running():
+            return True
+        pgid = self.pgid
+        _signal_group(pgid, signal.SIGTERM)
+        if self.exited.wait(grace):
+            _signal_group(pgid, signal.SIGKILL)  # Stray grandchildren (omxplayer.bin) if any
+            return True
+        log.warning(f"💥 {self.name} ignored SIGTERM for {grace}s - killing process group {pgid}")
+        self.kills += 1
+        _signal_group(pgid, signal.SIGKILL)
+        return self.exited.wait(kill_timeout)
+
+    def kill(self, timeout=1.0):
+        """Immediate SIGKILL of the whole group"""
+        if not self.running():
+            return True
+        self.kills += 1
+        _signal_group(self.pgid, signal.SIGKILL)
+        return self.exited.wait(timeout)
+
+
+def terminate_pids(pids, grace=0.5):
+    """SIGTERM processes we do not own (strays from an earlier run), SIGKILL whatever is left.
+    Waits on pidfds, so it returns as soon as they are gone rather than after a fixed sleep."""
+    pidfds = {}
+    for pid in pids:
+        fd = _pidfd_open(pid)
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except (ProcessLookupError, PermissionError):
+            if fd is not None:
+                os.close(fd)
+            continue
+        pidfds[pid] = fd
+
+    deadline = time.monotonic() + grace
+    remaining = dict(pidfds)
+    while remaining:
+        fds = [fd for fd in remaining.values() if fd is not None]
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            break
+        if fds:
+            readable, _, _ = select.select(fds, [], [], timeout)
+            for pid, fd in list(remaining.items()):
+                if fd in readable:
+                    del remaining[pid]
+        else:
+            # No pidfd support - check liveness with signal 0 until the deadline
+            for pid in list(remaining):
+                try:
+                    os.kill(pid, 0)
+                except ProcessLookupError:
+                    del remaining[pid]
+            if remaining:
+                time.sleep(min(0.05, timeout))
+
+    for pid in remaining:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    for fd in pidfds.values():
+        if fd is not None:
+            os.close(fd)
+    return len(remaining)
@@ -0,0 +1,206 @@
+# mp4museum - time-of-day collection schedule
+# Reads a schedule file (MP4MUSEUM_SCHEDULE, default /boot/schedule.json):
+#
+#   {"entries": [{"at": "09:00", "collection": "morning"},
+#                {"at": "13:30", "collection": "afternoon", "days": ["mon", "tue", "wed"]},
+#                {"at": "18:00", "collection": "evening"}]}
+#
+# The next occurrence of every entry, and a pre-warm a few seconds before it, sit in a heap
+# ordered by wall-clock time. One thread waits on a condition until the earliest one is due.
+# Nothing polls. A pre-warm loads the collection's file list, so the switch itself costs no
+# directory work. On start (and after a clock step, e.g. NTP on a Pi without a real-time
+# clock) the entry that should be playing now is applied once. Missed transitions are not
+# replayed one by one.
+
+import os
+import time
+import heapq
+import logging
+import itertools
+from datetime import datetime, timedelta
+from threading import Thread, Condition
+
+from state_store import load_json
+
+log = logging.getLogger("mp4museum.scheduler")
+
+SCHEDULE_FILE = os.environ.get("MP4MUSEUM_SCHEDULE", "/boot/schedule.json")
+PREWARM_SECONDS = 5.0  # Load the next collection's file list this long before it starts
+CLOCK_STEP = 60.0  # A wall-clock change this big (vs. the monotonic clock) is a clock step
+MAX_WAIT = 600.0  # Re-check the wall clock at least this often (the wait itself is monotonic)
+DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+class ScheduleEntry:
+    __slots__ = ("hour", "minute", "collection", "days")
+
+    def __init__(self, hour, minute, collection, days=None):
+        self.hour = hour
+        self.minute = minute
+        self.collection = collection
+        self.days = days  # Set of weekday numbers (0 = Monday), None = every day
+
+    @property
+    def at(self):
+        return f"{self.hour:02d}:{self.minute:02d}"
+
+    def occurrence(self, after, step):
+        """Timestamp of the first occurrence after (step=1) or at/before (step=-1) a timestamp"""
+        day = datetime.fromtimestamp(after).replace(hour=self.hour, minute=self.minute,
+                                                    second=0, microsecond=0)
+        for _ in range(9):
+            when = day.timestamp()
+            if (self.days is None or day.weekday() in self.days) and \
+                    (when > after if step > 0 else when <= after):
+                return when
+            day += timedelta(days=step)
+        return None  # No allowed day (empty "days")
+
+
+def parse_entries(data):
+    """[ScheduleEntry] from the schedule file's JSON; bad entries are logged and skipped"""
+    entries = []
+    for raw in (data or {}).get("entries", []):
+        try:
+            hour, minute = (int(part) for part in raw["at"].split(":"))
+            if not (0 <= hour < 24 and 0 <= minute < 60):
+                raise ValueError(raw["at"])
+            days = raw.get("days")
+            if days is not None:
+                days = {DAYS.index(day.lower()[:3]) for day in days}
+            entries.append(ScheduleEntry(hour, minute, str(raw["collection"]), days))
+        except (KeyError, ValueError, TypeError, AttributeError) as e:
+            log.warning(f"⚠️ Ignoring schedule entry {raw}: {e}")
+    return entries
+
+
+class Scheduler:
+    """Fires switch(collection) at each entry's time, prewarm(collection) PREWARM_SECONDS before"""
+
+    def __init__(self, switch, prewarm=None, path=SCHEDULE_FILE, prewarm_seconds=PREWARM_SECONDS):
+        self.switch = switch
+        self.prewarm = prewarm
+        self.path = path
+        self.prewarm_seconds = prewarm_seconds
+        self.entries = []
+        self.heap = []  # (due timestamp, seq, kind, entry, transition timestamp)
+        self.seq = itertools.count()
+        self.condition = Condition()
+        self.stopped = False
+        self.thread = None
+        self.active = None  # Entry applied last
+
+    # ---- setup -------------------------------------------------------------
+
+    def load(self):
+        """(Re)read the schedule file and rebuild the heap; returns the number of entries"""
+        entries = parse_entries(load_json(self.path, {}))
+        with self.condition:
+            self.entries = entries
+            self._rebuild(time.time())
+            self.condition.notify()
+        log.info(f"🗓️ Schedule: {len(entries)} transitions from {self.path}")
+        return len(entries)
+
+    def start(self):
+        """Apply the entry that should be playing now, then wait for the next transitions"""
+        self.load()
+        self._apply_current(time.time())
+        self.thread = Thread(target=self._run, daemon=True, name="Scheduler")
+        self.thread.start()
+        return self
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+
+    def _rebuild(self, now):
+        self.heap = []
+        for entry in self.entries:
+            self._push(entry, now)
+
+    def _push(self, entry, after):
+        when = entry.occurrence(after, 1)
+        if when is None:
+            return
+        heapq.heappush(self.heap, (when, next(self.seq), "switch", entry, when))
+        if self.prewarm and when - self.prewarm_seconds > after:
+            heapq.heappush(self.heap, (when - self.prewarm_seconds, next(self.seq), "prewarm", entry, when))
+
+    def _current(self, now):
+        """The entry whose latest occurrence is the most recent one, or None"""
+        latest = None
+        for entry in self.entries:
+            when = entry.occurrence(now, -1)
+            if when is not None and (latest is None or when > latest[0]):
+                latest = (when, entry)
+        return latest[1] if latest else None
+
+    def _apply_current(self, now):
+        with self.condition:
+            entry = self._current(now)
+        if entry is not None:
+            self._fire("switch", entry)
+
+    # ---- timer thread ------------------------------------------------------
+
+    def _run(self):
+        clock_offset = time.time() - time.monotonic()
+        while True:
+            with self.condition:
+                if self.stopped:
+                    return
+                now = time.time()
+                if abs(now - time.monotonic() - clock_offset) > CLOCK_STEP:
+                    # The wall clock was set (NTP after boot, DST is not a step) - start over from now
+                    log.info(f"🕰️ Clock stepped by {round(now - time.monotonic() - clock_offset)} s - re-reading the schedule")
+                    clock_offset = now - time.monotonic()
+                    self._rebuild(now)
+                    kind, entry = "switch", self._current(now)
+                elif not self.heap:
+                    self.condition.wait()
+                    continue
+                else:
+                    due, _, kind, entry, when = self.heap[0]
+                    if due > now:
+                        # One wait until the earliest item; load() and stop() notify to cut it short
+                        self.condition.wait(min(due - now, MAX_WAIT))
+                        continue
+                    heapq.heappop(self.heap)
+                    if kind == "switch":
+                        self._push(entry, when)
+            if entry is not None:
+                self._fire(kind, entry)
+
+    def _fire(self, kind, entry):
+        try:
+            if kind == "prewarm":
+                log.info(f"🔥 Pre-warming {entry.collection} for {entry.at}")
+                self.prewarm(entry.collection)
+            else:
+                log.info(f"🗓️ Scheduled switch to {entry.collection} ({entry.at})")
+                self.active = entry
+                self.switch(entry.collection)
+        except Exception as e:
+            log.warning(f"⚠️ Scheduled {kind} of {entry.collection} failed: {e}")
+
+    # ---- queries -----------------------------------------------------------
+
+    def upcoming(self, count=10):
+        """The next transitions in order: [{"at", "collection", "in_s"}]"""
+        now = time.time()
+        with self.condition:
+            switches = sorted((item for item in self.heap if item[2] == "switch"), key=lambda item: item[0])
+        return [{"at": datetime.fromtimestamp(when).isoformat(timespec="minutes"),
+                 "collection": entry.collection,
+                 "in_s": round(when - now)}
+                for when, _, _, entry, _ in switches[:count]]
+
+    def status(self):
+        return {
+            "file": self.path,
+            "entries": len(self.entries),
+            "active": self.active.collection if self.active else None,
+            "upcoming": self.upcoming(),
+        }
@@ -0,0 +1,150 @@
+# mp4museum - shuffle bag for random playback
+# Files are drawn with an incremental Fisher-Yates shuffle: every pick swaps a random
+# not-yet-played file into place, so there is no reshuffle of the whole list at the end of
+# a pass. A window of recently shown files is never picked again straight away, which also
+# covers the seam between two passes. New and removed files are merged in place when the
+# directory's mtime changes. Only file names are stored (one directory, no full paths), and
+# the order and position are saved so a restart continues the same pass.
+
+import os
+import random
+import logging
+from collections import deque
+
+from state_store import state_path, load_json, save_json
+
+log = logging.getLogger("mp4museum.shuffle")
+
+STATE_VERSION = 1
+NO_REPEAT_WINDOW = 10  # Files that must be shown before one can come up again
+SAVE_EVERY = 20  # Picks between state saves (a restart repeats at most this many)
+
+
+class ShuffleBag:
+    """Random order over the files of one directory, without near repeats"""
+
+    def __init__(self, directory, extensions=(".jpg",), window=NO_REPEAT_WINDOW, path=None, rng=None):
+        self.directory = directory
+        self.extensions = tuple(extensions)
+        self.window = window
+        self.path = path or state_path("shuffle_" + directory.strip("/").replace("/", "_") + ".json")
+        self.rng = rng or random.Random()
+        self.names = []  # names[:position] played this pass, names[position:] still to come
+        self.slots = {}  # name -> index in names
+        self.position = 0
+        self.recent = deque(maxlen=window)
+        self.dir_mtime = None
+        self.picks_since_save = 0
+
+    def __len__(self):
+        return len(self.names)
+
+    def load(self):
+        data = load_json(self.path)
+        if data and data.get("version") == STATE_VERSION and data.get("directory") == self.directory:
+            self.names = data.get("names", [])
+            self.slots = {name: i for i, name in enumerate(self.names)}
+            self.position = min(data.get("position", 0), len(self.names))
+            self.recent.extend(data.get("recent", [])[-self.window:])
+        self.refresh(force=True)
+        return self
+
+    def save(self):
+        save_json(self.path, {"version": STATE_VERSION, "directory": self.directory,
+                              "names": self.names, "position": self.position,
+                              "recent": list(self.recent)})
+        self.picks_since_save = 0
+
+    def _swap(self, i, j):
+        names = self.names
+        names[i], names[j] = names[j], names[i]
+        self.slots[names[i]] = i
+        self.slots[names[j]] = j
+
+    def add(self, name):
+        """New file: appended to the unplayed part, so it can come up in this pass"""
+        if name in self.slots:
+            return
+        self.slots[name] = len(self.names)
+        self.names.append(name)
+
+    def remove(self, name):
+        """Deleted file: swapped out of the list in O(1), keeping played/unplayed apart"""
+        i = self.slots.pop(name, None)
+        if i is None:
+            return
+        last = len(self.names) - 1
+        if i < self.position:
+            # Played region: fill the hole with the last played file, then that hole with the last file
+            self.position -= 1
+            if i != self.position:
+                self.names[i] = self.names[self.position]
+                self.slots[self.names[i]] = i
+            i = self.position
+        if i != last:
+            self.names[i] = self.names[last]
+            self.slots[self.names[i]] = i
+        self.names.pop()
+
+    def refresh(self, force=False):
+        """Merge added/removed files when the directory changed (one stat() otherwise)"""
+        try:
+            mtime = os.stat(self.directory).st_mtime
+        except OSError:
+            mtime = None
+        if not force and mtime == self.dir_mtime:
+            return False
+        self.dir_mtime = mtime
+        try:
+            with os.scandir(self.directory) as entries:
+                current = {e.name for e in entries
+                           if e.name.endswith(self.extensions) and not e.name.startswith('.')}
+        except OSError:
+            current = set()
+        removed = [name for name in self.slots if name not in current]
+        for name in removed:
+            self.remove(name)
+        added = sorted(current - self.slots.keys())
+        for name in added:
+            self.add(name)
+        if added or removed:
+            log.info(f"🔀 Shuffle bag: +{len(added)} -{len(removed)} files ({len(self.names)} total)")
+        return True
+
+    def _pick(self, count):
+        """Random index in names[position:] outside the no-repeat window"""
+        j = self.rng.randrange(self.position, count)
+        # A folder with fewer files than the window still avoids all but the oldest one
+        window = min(len(self.recent), count - 1)
+        recent = set(list(self.recent)[len(self.recent) - window:]) if window > 0 else ()
+        if self.names[j] not in recent:
+            return j  # Usual case: one draw
+        # Drew a recent file: choose among the others instead (still uniform over them)
+        candidates = [i for i in range(self.position, count) if self.names[i] not in recent]
+        return self.rng.choice(candidates) if candidates else j
+
+    def next(self):
+        """Full path of the next file, or None if the directory is empty"""
+        self.refresh()
+        count = len(self.names)
+        if not count:
+            return None
+        if self.position >= count:
+            self.position = 0  # New pass - nothing to reshuffle, picks stay random
+        j = self._pick(count)
+        self._swap(self.position, j)
+        name = self.names[self.position]
+        self.position += 1
+        self.recent.append(name)
+        self.picks_since_save += 1
+        if self.picks_since_save >= SAVE_EVERY:
+            self.save()
+        return os.path.join(self.directory, name)
+
+    def __iter__(self):
+        """Endless stream of files (stops only when the directory is empty)"""
+        while True:
+            path = self.next()
+            if path is None:
+                return
+            yield path
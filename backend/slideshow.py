@@ -0,0 +1,204 @@
+# mp4museum - image slideshow engine
+# One VLC player shows every image. While an image is on screen a background thread
+# decodes the next one, scales it to the display once and writes it to a small LRU of
+# ready frames in /dev/shm, so a transition is just set_media() on a display-sized file.
+# The dwell time is our own timer (an Event wait), not VLC's fixed image duration and
+# not a get_state() poll. Buttons only set flags; all VLC calls stay on the show thread.
+# Scaling needs Pillow (sudo apt install python3-pil); without it the original files are
+# only pre-read into the page cache and VLC scales them.
+
+import os
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from threading import Event, Lock
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+log = logging.getLogger("mp4museum.slideshow")
+
+DEFAULT_DWELL = 10.0  # Seconds per image (VLC's own image-duration default)
+DEFAULT_SIZE = (1920, 1080)
+CACHE_DIR = "/dev/shm/mp4museum-slides" if os.path.isdir("/dev/shm") else "/tmp/mp4museum-slides"
+CACHE_SIZE = 4  # Ready frames kept (current, next and a couple to step back to)
+READ_CHUNK = 1024 * 1024
+
+
+def display_size():
+    """Framebuffer resolution, e.g. from /sys/class/graphics/fb0/virtual_size = '1920,1080'"""
+    try:
+        with open("/sys/class/graphics/fb0/virtual_size") as f:
+            width, height = (int(v) for v in f.read().strip().split(","))
+            if width and height:
+                return width, height
+    except (OSError, ValueError):
+        pass
+    return DEFAULT_SIZE
+
+
+def read_dwell(path="/boot/slide-duration.txt", default=DEFAULT_DWELL):
+    """Seconds per image from a config file on the boot partition (like /boot/alsa.txt)"""
+    try:
+        with open(path) as f:
+            return max(0.1, float(f.read().strip()))
+    except (OSError, ValueError):
+        return default
+
+
+class FrameCache:
+    """LRU of display-ready frames: source path -> file in CACHE_DIR"""
+
+    def __init__(self, size=None, capacity=CACHE_SIZE, cache_dir=CACHE_DIR):
+        self.size = size or display_size()
+        self.capacity = capacity
+        self.cache_dir = cache_dir
+        self.lock = Lock()
+        self.frames = OrderedDict()  # (path, size, mtime) -> ready file
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _key(self, path):
+        st = os.stat(path)
+        return path, st.st_size, st.st_mtime
+
+    def get(self, path):
+        """Ready frame for path, decoding it now if it is not cached"""
+        key = self._key(path)
+        with self.lock:
+            if key in self.frames:
+                self.frames.move_to_end(key)
+                return self.frames[key]
+        frame = self._decode(key)
+        with self.lock:
+            # An older version of the same file (edited in place) is never shown again
+            stale = [old_key for old_key in self.frames if old_key[0] == path and old_key != key]
+            for old_key in stale:
+                self._drop(old_key, self.frames.pop(old_key))
+            self.frames[key] = frame
+            self.frames.move_to_end(key)
+            while len(self.frames) > self.capacity:
+                self._drop(*self.frames.popitem(last=False))
+        return frame
+
+    def _drop(self, key, frame):
+        if frame != key[0]:
+            try:
+                os.remove(frame)
+            except OSError:
+                pass
+
+    def _decode(self, key):
+        """Decode and scale once; without Pillow just pull the file into the page cache"""
+        path = key[0]
+        if Image is None:
+            with open(path, "rb") as f:
+                while f.read(READ_CHUNK):
+                    pass
+            return path
+        # One file per version: a frame still in the LRU must not be overwritten or removed
+        # together with an evicted older version of the same image
+        target = os.path.join(self.cache_dir, hashlib.sha1(repr(key).encode()).hexdigest() + ".png")
+        try:
+            with Image.open(path) as image:
+                image.draft("RGB", self.size)  # JPEG: let libjpeg decode at a reduced scale
+                image = ImageOps.exif_transpose(image).convert("RGB")
+                image.thumbnail(self.size, Image.BILINEAR)
+                image.save(target, compress_level=1)  # Cheap to write, cheap for VLC to decode
+            return target
+        except (OSError, ValueError) as e:
+            log.warning(f"⚠️ Could not pre-scale {path}: {e}")
+            return path
+
+    def clear(self):
+        with self.lock:
+            for key, frame in self.frames.items():
+                self._drop(key, frame)
+            self.frames.clear()
+
+
+class Slideshow:
+    """Shows images on one reused VLC player with background pre-decoding"""
+
+    def __init__(self, vlc_instance, dwell=DEFAULT_DWELL, cache=None):
+        self.vlc_instance = vlc_instance
+        self.player = vlc_instance.media_player_new()
+        self.dwell = dwell
+        self.cache = cache or FrameCache()
+        self.decoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="SlideDecode")
+        self.wake = Event()  # Set by next()/toggle_pause() to interrupt the dwell wait
+        self.skip = False
+        self.paused = False
+        self.last_transition_ms = None
+
+    def next(self):
+        """Skip to the next image (safe to call from GPIO callback threads)"""
+        self.skip = True
+        self.wake.set()
+
+    def toggle_pause(self):
+        """Freeze / continue the dwell timer (the image stays on screen)"""
+        self.paused = not self.paused
+        self.wake.set()
+
+    def _wait_dwell(self):
+        """Hold the current image for dwell seconds of un-paused time, or until next()"""
+        remaining = self.dwell
+        while remaining > 0:
+            was_paused = self.paused
+            started = time.monotonic()
+            self.wake.wait(None if was_paused else remaining)
+            if not was_paused:
+                remaining -= time.monotonic() - started
+            if self.wake.is_set():
+                self.wake.clear()
+                if self.skip:
+                    self.skip = False
+                    self.paused = False
+                    return
+
+    def _show(self, frame):
+        started = time.monotonic()
+        media = self.vlc_instance.media_new(frame)
+        media.add_option("image-duration=-1")  # Stay up until we replace it
+        self.player.set_media(media)
+        self.player.play()
+        media.release()
+        self.last_transition_ms = round((time.monotonic() - started) * 1000, 1)
+
+    def run(self, paths):
+        """Show each path from an iterable (may be endless), decoding the following image
+        while the current one is up"""
+        paths = iter(paths)
+        path = next(paths, None)
+        if path is None:
+            return 0
+        pending = self.decoder.submit(self.cache.get, path)
+        shown = 0
+        while path is not None:
+            try:
+                frame = pending.result()
+            except OSError as e:
+                log.warning(f"⚠️ Skipping {path}: {e}")
+                frame = None
+            following = next(paths, None)
+            if following is not None:
+                pending = self.decoder.submit(self.cache.get, following)
+            if frame is None:
+                path = following
+                continue
+            self._show(frame)
+            shown += 1
+            log.debug(f"🖼️ {os.path.basename(path)} ({self.last_transition_ms} ms)")
+            self._wait_dwell()
+            path = following
+        return shown
+
+    def close(self):
+        self.decoder.shutdown(wait=False)
+        self.player.stop()
+        self.player.release()
+        self.cache.clear()
@@ -0,0 +1,63 @@
+# mp4museum - boot-time helpers shared by the player scripts
+# The scripts used to run four glob()s over /media/* and /boot (two per sync mode, each
+# listing the same directories) before anything played. find_files() lists every directory
+# once and picks out all wanted names in that single pass. The sync itself is sync_engine.py.
+# process_start_time() lets the backend report boot time from the moment the process was
+# started (interpreter start-up and imports included), not from when main() ran.
+
+import os
+import time
+import logging
+
+log = logging.getLogger("mp4museum.startup")
+
+SYNC_FILES = ("sync-leader.txt", "sync-player.txt", "sync.mp4")
+
+
+def find_files(names, media_root="/media", boot="/boot"):
+    """First path of each wanted name in <media_root>/*/ (sorted) and then boot - one listing per directory"""
+    wanted = set(names)
+    found = {}
+    try:
+        with os.scandir(media_root) as entries:
+            directories = sorted(entry.path for entry in entries
+                                 if entry.is_dir() and not entry.name.startswith("."))
+    except OSError:
+        directories = []
+    directories.append(boot)
+    for directory in directories:
+        try:
+            present = wanted.intersection(os.listdir(directory))
+        except OSError:
+            continue
+        for name in present:
+            found.setdefault(name, os.path.join(directory, name))
+        if len(found) == len(wanted):
+            break
+    return found
+
+
+def sync_mode(media_root="/media", boot="/boot"):
+    """("leader" | "follower", path of sync.mp4) if the sync files ask for it, else None"""
+    found = find_files(SYNC_FILES, media_root, boot)
+    sync_file = found.get("sync.mp4")
+    if not sync_file:
+        return None
+    if "sync-leader.txt" in found:
+        return "leader", sync_file
+    if "sync-player.txt" in found:
+        return "follower", sync_file
+    return None
+
+
+def process_start_time():
+    """time.time() at which this process was started (Linux /proc), or None"""
+    try:
+        with open("/proc/self/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        started_ticks = int(fields[19])  # Field 22 (starttime); the split starts at field 3
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - (uptime - started_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return None
@@ -0,0 +1,52 @@
+# mp4museum - helpers for state that has to survive a restart (indexes, caches)
+# Everything is plain JSON so it can be inspected or deleted by hand on the Pi.
+
+import os
+import logging
+import json
+import tempfile
+
+log = logging.getLogger("mp4museum.state")
+
+# Override with MP4MUSEUM_STATE_DIR, e.g. to point at a tmpfs when the SD card is read-only
+STATE_DIR = os.environ.get("MP4MUSEUM_STATE_DIR", os.path.expanduser("~/.mp4museum"))
+
+
+def state_path(name):
+    """Return the full path of a state file, creating the state directory if needed"""
+    try:
+        os.makedirs(STATE_DIR, exist_ok=True)
+    except OSError:
+        pass  # Read-only filesystem - load/save will fail soft
+    return os.path.join(STATE_DIR, name)
+
+
+def load_json(path, default=None):
+    """Read a JSON state file in one go, returning default if missing or corrupt"""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json(path, data):
+    """Atomically replace a JSON state file (write temp file, then rename)"""
+    tmp_path = None
+    try:
+        # Unique temp file - two threads saving the same state file must not share one
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".",
+                                        prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.chmod(tmp_path, 0o644)  # mkstemp makes it 0600; keep the files readable as before
+        os.replace(tmp_path, path)
+        return True
+    except (OSError, TypeError, ValueError) as e:
+        log.warning(f"⚠️ Could not save state file {path}: {e}")
+        if tmp_path:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        return False
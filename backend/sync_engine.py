@@ -0,0 +1,280 @@
+# mp4museum - multi-screen sync without omxplayer-sync
+# The leader broadcasts its playback clock over UDP (multicast by default) ten times a second:
+#
+#   {"v": 1, "seq": n, "file": "sync.mp4", "pos": seconds, "state": "playing"}
+#
+# Each follower compares the leader's position (plus half the measured round trip) with its
+# own. A PI controller turns the error into a playback rate: the proportional part pulls the
+# error in, the integral part learns the follower's clock drift, so a steady state needs no
+# correction bursts. Large errors (start-up, a missed loop) are fixed with one seek.
+# The player stays under mp4museum's control, so the API keeps running in sync mode.
+#
+#   MP4MUSEUM_SYNC_GROUP    multicast group (default 239.255.77.77)
+#   MP4MUSEUM_SYNC_PORT     UDP port (default 7777)
+#   MP4MUSEUM_SYNC_TARGETS  leader only: "host:port,host:port" unicast targets instead of the
+#                           group, e.g. several followers on one machine
+
+import os
+import json
+import time
+import socket
+import struct
+import logging
+from collections import deque
+from threading import Thread, Event, Lock
+
+log = logging.getLogger("mp4museum.sync")
+
+SYNC_GROUP = os.environ.get("MP4MUSEUM_SYNC_GROUP", "239.255.77.77")
+SYNC_PORT = int(os.environ.get("MP4MUSEUM_SYNC_PORT", "7777"))
+BROADCAST_INTERVAL = 0.1  # Leader clock packets per second: 10
+PING_INTERVAL = 1.0  # Follower round-trip probes
+SEEK_THRESHOLD = 0.5  # Errors above this are fixed with a seek instead of a rate nudge
+MAX_NUDGE = 0.05  # Rate stays within 1 +- 5 % (pitch shift is inaudible at a few %)
+KP = 0.5  # Rate change per second of error
+KI = 0.05  # Integral gain - learns the clock drift
+RATE_STEP = 0.0001  # Smaller rate changes are not sent to the player (100 ppm = 0.1 ms/s)
+LEADER_TIMEOUT = 3.0  # Seconds without leader packets before the follower reports it lost
+
+
+def parse_targets(value):
+    """"host:port,host:port" -> [(host, port)]"""
+    targets = []
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        host, _, port = item.rpartition(":")
+        targets.append((host, int(port)))
+    return targets
+
+
+def _is_multicast(address):
+    try:
+        return 224 <= int(address.split(".")[0]) <= 239
+    except ValueError:
+        return False
+
+
+class SyncLeader:
+    """Broadcasts the backend's playback position and answers follower pings"""
+
+    role = "leader"
+
+    def __init__(self, backend, file_name, group=SYNC_GROUP, port=SYNC_PORT, targets=None,
+                 interval=BROADCAST_INTERVAL):
+        self.backend = backend
+        self.file_name = file_name
+        self.targets = targets or parse_targets(os.environ.get("MP4MUSEUM_SYNC_TARGETS", "")) or [(group, port)]
+        self.interval = interval
+        self.stop_event = Event()
+        self.seq = 0
+        self.followers = {}  # address -> monotonic time of the last ping
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)  # Stay on the LAN
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)  # Followers on this host too
+        self.sock.bind(("", 0))
+        self.thread = Thread(target=self._run, daemon=True, name="SyncLeader")
+
+    def start(self):
+        self.thread.start()
+        log.info(f"📡 Sync leader for {self.file_name} -> {', '.join(f'{h}:{p}' for h, p in self.targets)}")
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _broadcast(self):
+        self.seq += 1
+        packet = json.dumps({"v": 1, "seq": self.seq, "file": self.file_name,
+                             "pos": round(self.backend.position(), 6),
+                             "state": self.backend.state()}).encode()
+        for target in self.targets:
+            try:
+                self.sock.sendto(packet, target)
+            except OSError as e:
+                log.warning(f"⚠️ Sync packet to {target} failed: {e}")
+
+    def _run(self):
+        next_send = time.monotonic()
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            if now >= next_send:
+                self._broadcast()
+                next_send = max(next_send + self.interval, now)
+            # Wait for pings until the next broadcast is due
+            self.sock.settimeout(max(0.001, next_send - time.monotonic()))
+            try:
+                data, address = self.sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            try:
+                message = json.loads(data)
+            except ValueError:
+                continue
+            if "ping" in message:
+                self.followers[address] = time.monotonic()
+                self.sock.sendto(json.dumps({"pong": message["ping"]}).encode(), address)
+        self.sock.close()
+
+    def status(self):
+        now = time.monotonic()
+        return {
+            "role": self.role,
+            "file": self.file_name,
+            "position_s": round(self.backend.position(), 3),
+            "followers": sum(1 for seen in self.followers.values() if now - seen < 3 * PING_INTERVAL),
+        }
+
+
+class SyncFollower:
+    """Steers the backend's rate (or seeks) to stay on the leader's clock"""
+
+    role = "follower"
+
+    def __init__(self, backend, file_name, group=SYNC_GROUP, port=SYNC_PORT):
+        self.backend = backend
+        self.file_name = file_name
+        self.group = group
+        self.port = port
+        self.stop_event = Event()
+        self.lock = Lock()
+        self.leader = None  # (host, port) the clock packets come from
+        self.last_packet = None
+        self.last_ping = 0.0
+        self.rtts = deque(maxlen=10)  # Recent round trips; the minimum is the least-queued one
+        self.errors = deque(maxlen=5)  # Median of these filters player clock jitter
+        self.error = None  # Filtered follower - leader position, seconds
+        self.integral = 0.0
+        self.rate = 1.0
+        self.seeks = 0
+        self.last_update = None
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, "SO_REUSEPORT"):
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)  # Several followers per host
+        self.sock.bind(("", port))
+        if _is_multicast(group):
+            membership = struct.pack("4s4s", socket.inet_aton(group), socket.inet_aton("0.0.0.0"))
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+        self.sock.settimeout(PING_INTERVAL / 2)
+        self.thread = Thread(target=self._run, daemon=True, name="SyncFollower")
+
+    def start(self):
+        self.thread.start()
+        log.info(f"📡 Sync follower for {self.file_name} on {self.group}:{self.port}")
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            if self.leader and now - self.last_ping >= PING_INTERVAL:
+                self.last_ping = now
+                try:
+                    self.sock.sendto(json.dumps({"ping": now}).encode(), self.leader)
+                except OSError:
+                    pass
+            try:
+                data, address = self.sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            received = time.monotonic()
+            try:
+                message = json.loads(data)
+            except ValueError:
+                continue
+            if "pong" in message:
+                if message["pong"] == self.last_ping:  # Not another follower's on this host
+                    self.rtts.append(received - message["pong"])
+            elif message.get("file") == self.file_name:
+                self.leader = address
+                self.last_packet = received
+                try:
+                    self.on_clock(message["pos"], message.get("state"), received)
+                except Exception as e:
+                    log.warning(f"⚠️ Sync correction failed: {e}")
+        self.sock.close()
+
+    def on_clock(self, leader_position, leader_state, now=None):
+        """One leader clock sample - measure the error and correct"""
+        now = time.monotonic() if now is None else now
+        state = self.backend.state()
+        if leader_state == "paused" and state == "playing":
+            self.backend.pause()
+            return
+        if leader_state == "playing" and state == "paused":
+            self.backend.resume()
+            return
+        if leader_state != "playing" or state != "playing":
+            return
+
+        delay = min(self.rtts) / 2 if self.rtts else 0.0
+        target = leader_position + delay * self.rate
+        error = self.backend.position() - target
+        duration = self.backend.duration()
+        if duration:
+            # Loop clips: 0.1 s before the end and 0.1 s after the start are 0.2 s apart
+            error = (error + duration / 2) % duration - duration / 2
+
+        if abs(error) > SEEK_THRESHOLD:
+            self.backend.seek(target)
+            self.seeks += 1
+            self.errors.clear()
+            self.last_update = None
+            log.info(f"⏩ Sync seek: {round(error * 1000)} ms off the leader")
+            return
+
+        self.errors.append(error)
+        error = sorted(self.errors)[len(self.errors) // 2]
+        dt = now - self.last_update if self.last_update is not None else 0.0
+        self.last_update = now
+        with self.lock:
+            self.error = error
+            if abs(KP * error) < MAX_NUDGE:
+                # Anti-windup: learn the drift only once the rate is no longer pinned at its limit
+                self.integral += error * dt
+                self.integral = max(-MAX_NUDGE / KI, min(MAX_NUDGE / KI, self.integral))
+            rate = 1.0 - KP * error - KI * self.integral
+            rate = max(1.0 - MAX_NUDGE, min(1.0 + MAX_NUDGE, rate))
+            if abs(rate - self.rate) >= RATE_STEP:
+                self.rate = rate
+                self.backend.set_rate(rate)
+
+    def status(self):
+        now = time.monotonic()
+        with self.lock:
+            return {
+                "role": self.role,
+                "file": self.file_name,
+                "leader": f"{self.leader[0]}:{self.leader[1]}" if self.leader else None,
+                "leader_lost": self.last_packet is None or now - self.last_packet > LEADER_TIMEOUT,
+                "drift_ms": round(self.error * 1000, 2) if self.error is not None else None,
+                "clock_drift_ppm": round(KI * self.integral * 1e6),  # How fast this screen's clock runs, learned
+                "rate": round(self.rate, 5),
+                "rtt_ms": round(min(self.rtts) * 1000, 2) if self.rtts else None,
+                "seeks": self.seeks,
+            }
+
+
+def create_sync(role, backend, file_name):
+    """SyncLeader or SyncFollower for the role found by startup.sync_mode()"""
+    if role == "leader":
+        return SyncLeader(backend, file_name)
+    return SyncFollower(backend, file_name)
+
+
+def run_standalone(role, sync_file, backend):
+    """For the scripts without an API: loop sync_file under the sync engine, forever"""
+    ended = Event()
+    backend.on_end = ended.set
+    create_sync(role, backend, os.path.basename(sync_file)).start()
+    media = backend.new_media(sync_file)
+    backend.preparse(media)
+    while True:
+        ended.clear()
+        backend.play(media)
+        ended.wait()
@@ -7,6 +7,7 @@ function App() {
   const [collections, setCollections] = useState([]);
   const [selectedCollection, setSelectedCollection] = useState(null);
   const [status, setStatus] = useState("");
+  const [playback, setPlayback] = useState({ state: null, file: null });
 
   useEffect(() => {
     axios.get(`${API_BASE}/collections`)
@@ -14,6 +15,31 @@ function App() {
       .catch(err => setStatus("Failed to fetch collections"));
   }, []);
 
+  // Live playback updates pushed by the player (no polling)
+  useEffect(() => {
+    const source = new EventSource(`${API_BASE}/events`);
+    source.addEventListener('status', (e) => {
+      const data = JSON.parse(e.data);
+      setPlayback({ state: data.playback_state || null, file: data.current_file });
+      if (data.current_collection) setSelectedCollection(data.current_collection);
+    });
+    source.addEventListener('track', (e) => {
+      const data = JSON.parse(e.data);
+      setPlayback({ state: data.state || 'playing', file: data.file });
+    });
+    source.addEventListener('state', (e) => {
+      const data = JSON.parse(e.data);
+      setPlayback(prev => ({ ...prev, state: data.state }));
+    });
+    source.addEventListener('collection', (e) => {
+      setSelectedCollection(JSON.parse(e.data).collection);
+    });
+    source.addEventListener('error', (e) => {
+      if (e.data) setStatus(`❌ ${JSON.parse(e.data).message}`);
+    });
+    return () => source.close();
+  }, []);
+
   const setCollection = (collection) => {
     axios.post(`${API_BASE}/set_collection`, { collection })
       .then(() => {
@@ -59,6 +85,7 @@ function App() {
         <button onClick={() => sendCommand('pause')} style={{ color: '#ff0080', background: 'transparent', border: '1px solid #ff0080', marginRight: 8, padding: '6px 12px', cursor: 'pointer' }}>⏸ Pause</button>
         <button onClick={() => sendCommand('restart')} style={{ color: '#ff0080', background: 'transparent', border: '1px solid #ff0080', padding: '6px 12px', cursor: 'pointer' }}>🔁 Restart</button>
       </div>
+      <p>{playback.file ? `🎬 ${playback.file}${playback.state ? ` (${playback.state})` : ''}` : ''}</p>
       <p>{status}</p>
     </div>
   );